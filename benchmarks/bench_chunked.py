@@ -0,0 +1,46 @@
+"""Compare single-call transcription with long-audio chunked mode on a real file.
+
+Usage:
+    python benchmarks/bench_chunked.py AUDIO_FILE [--model MODEL] [--chunk-length 600] [--workers 1 2 4]
+
+Decodes the file once, then times one mlx_whisper.transcribe call over the
+whole array against transcribe_chunked with each worker count. Requires
+Apple Silicon and the model weights.
+"""
+
+import argparse
+import time
+
+from macscribe.audio import SAMPLE_RATE, decode_audio
+from macscribe.transcriber import transcribe_audio, transcribe_chunked
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("audio_file")
+    parser.add_argument("--model", default="mlx-community/whisper-large-v3-mlx")
+    parser.add_argument("--chunk-length", type=float, default=600.0)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    audio = decode_audio(args.audio_file)
+    duration = len(audio) / SAMPLE_RATE
+    print(f"audio: {duration / 60:.1f} min")
+
+    # Warm-up so model loading isn't counted against the first run
+    transcribe_audio(audio[:SAMPLE_RATE * 5], args.model, copy=False)
+
+    start = time.perf_counter()
+    transcribe_audio(audio, args.model, copy=False)
+    single = time.perf_counter() - start
+    print(f"single call:        {single:8.1f} s  (RTF {single / duration:.3f})")
+
+    for workers in args.workers:
+        start = time.perf_counter()
+        transcribe_chunked(audio, args.model, chunk_length=args.chunk_length, workers=workers)
+        elapsed = time.perf_counter() - start
+        print(f"chunked, {workers} workers: {elapsed:8.1f} s  (RTF {elapsed / duration:.3f}, {single / elapsed:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
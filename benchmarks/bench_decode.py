@@ -0,0 +1,73 @@
+"""Compare the old MP3 re-encode path with decoding the native stream once.
+
+Usage:
+    python benchmarks/bench_decode.py [--minutes 10]
+
+Generates a synthetic Opus file (the usual YouTube 'bestaudio' stream), then times:
+
+- mp3: re-encode to 192 kbps MP3 (the old FFmpegExtractAudio step) and decode that to 16 kHz PCM
+- native: decode the Opus stream straight to 16 kHz PCM
+
+Results are reported as seconds per hour of audio. Requires ffmpeg on PATH.
+"""
+
+import argparse
+import os
+import subprocess
+import tempfile
+import time
+
+from macscribe.audio import decode_audio
+
+
+def make_source(path: str, seconds: int) -> None:
+    """Write a synthetic speech-band Opus file of the given length."""
+    subprocess.run(
+        [
+            "ffmpeg", "-nostdin", "-y", "-loglevel", "error",
+            "-f", "lavfi", "-i", f"sine=frequency=220:duration={seconds}",
+            "-f", "lavfi", "-i", f"anoisesrc=color=pink:amplitude=0.1:duration={seconds}",
+            "-filter_complex", "amix=inputs=2", "-ac", "2", "-ar", "48000",
+            "-c:a", "libopus", "-b:a", "128k", path,
+        ],
+        check=True,
+    )
+
+
+def time_mp3_path(source: str, tmpdir: str) -> float:
+    start = time.perf_counter()
+    mp3 = os.path.join(tmpdir, "reencoded.mp3")
+    subprocess.run(
+        ["ffmpeg", "-nostdin", "-y", "-loglevel", "error", "-i", source, "-vn", "-c:a", "libmp3lame", "-b:a", "192k", mp3],
+        check=True,
+    )
+    decode_audio(mp3)
+    return time.perf_counter() - start
+
+
+def time_native_path(source: str) -> float:
+    start = time.perf_counter()
+    decode_audio(source)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=int, default=10, help="Length of the synthetic input")
+    args = parser.parse_args()
+
+    seconds = args.minutes * 60
+    scale = 3600 / seconds
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = os.path.join(tmpdir, "source.webm")
+        make_source(source, seconds)
+        mp3 = time_mp3_path(source, tmpdir)
+        native = time_native_path(source)
+
+    print(f"mp3 re-encode + decode: {mp3 * scale:7.2f} s per hour of audio")
+    print(f"native decode:          {native * scale:7.2f} s per hour of audio")
+    print(f"saved:                  {(mp3 - native) * scale:7.2f} s per hour of audio")
+
+
+if __name__ == "__main__":
+    main()
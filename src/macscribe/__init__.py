@@ -1 +1,2 @@
-from .cli import app
\ No newline at end of file
+from .cli import app
+from .runner import transcribe_many
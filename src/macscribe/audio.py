@@ -0,0 +1,518 @@
+"""Audio decoding helpers shared by the transcription paths."""
+
+import importlib
+import json
+import os
+import subprocess
+import tempfile
+import threading
+import wave
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from macscribe.metrics import stage
+from macscribe.resample import Resampler
+
+# Whisper models expect 16 kHz mono input
+SAMPLE_RATE = 16000
+
+# 'ffmpeg' decodes in a subprocess; 'native' decodes in-process and falls back to ffmpeg
+DECODERS = ("ffmpeg", "native")
+DEFAULT_DECODER = "ffmpeg"
+
+# Frames analysed at a time by frame_energy_db (10 minutes of 30 ms frames)
+_ENERGY_BLOCK_FRAMES = 20000
+
+
+def decode_audio(path: str, sample_rate: int = SAMPLE_RATE, decoder: str = DEFAULT_DECODER) -> np.ndarray:
+    """
+    Decode any audio/video file to mono float32 PCM.
+
+    Args:
+        path: Path to the audio or video file
+        sample_rate: Target sample rate in Hz
+        decoder: 'ffmpeg' for a single ffmpeg pass in a subprocess, or 'native'
+            to decode in-process (see NativeDecoder), using ffmpeg only for
+            files no in-process reader supports
+
+    Returns:
+        1-D float32 array with samples in [-1, 1)
+    """
+    if decoder not in DECODERS:
+        raise ValueError(f"Unknown decoder '{decoder}'. Available: {', '.join(DECODERS)}")
+    with stage("decode") as timing:
+        audio = native_decoder().decode(path, sample_rate) if decoder == "native" else None
+        if audio is None:
+            audio = _ffmpeg_decode(path, sample_rate)
+        # Counted as 16-bit PCM whichever decoder ran, so profiles stay comparable
+        timing.add(bytes=2 * len(audio), audio_seconds=len(audio) / sample_rate)
+        return audio
+
+
+def _ffmpeg_decode(path: str, sample_rate: int) -> np.ndarray:
+    cmd = [
+        "ffmpeg",
+        "-nostdin",
+        "-threads", "0",
+        "-i", path,
+        "-f", "s16le",
+        "-ac", "1",
+        "-acodec", "pcm_s16le",
+        "-ar", str(sample_rate),
+        "-",
+    ]
+    try:
+        out = subprocess.run(cmd, capture_output=True, check=True).stdout
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Failed to decode audio: {e.stderr.decode(errors='replace').strip()}") from e
+    return np.frombuffer(out, np.int16).astype(np.float32) / 32768.0
+
+
+class NativeDecoder:
+    """
+    Decode audio files in-process and resample them with Resampler.
+
+    Spawning ffmpeg costs tens of milliseconds per file, which dominates when
+    the files are short clips. This reads the samples in the process instead,
+    trying PyAV (any container ffmpeg handles), then soundfile (WAV, FLAC,
+    Ogg, MP3 with recent libsndfile), then the standard library's wave module
+    (PCM WAV). PyAV and soundfile are optional; a file none of the available
+    readers supports makes decode() return None.
+
+    The channel mixdown buffer and the resampler's filters and padding buffer
+    are kept between files, so a batch of clips allocates little beyond each
+    returned array. Instances are not thread-safe; native_decoder() hands out
+    one per thread.
+    """
+
+    def __init__(self):
+        self.resampler = Resampler()
+        self._mono = np.empty(0, dtype=np.float32)
+
+    def decode(self, path: str, sample_rate: int = SAMPLE_RATE) -> Optional[np.ndarray]:
+        """Decode path to mono float32 at sample_rate, or return None if no reader supports it."""
+        for reader in (_read_av, _read_soundfile, _read_wave):
+            read = reader(path)
+            if read is not None:
+                blocks, rate = read
+                return self.resampler.resample(self._mix(blocks), rate, sample_rate)
+        return None
+
+    def _mix(self, blocks: List[Tuple[np.ndarray, float, float]]) -> np.ndarray:
+        """Average (frames, channels) blocks into the reusable mono buffer, as (sample - offset) * scale."""
+        total = sum(len(samples) for samples, _, _ in blocks)
+        if len(self._mono) < total:
+            self._mono = np.empty(max(total, 2 * len(self._mono)), dtype=np.float32)
+        mono = self._mono[:total]
+        position = 0
+        for samples, offset, scale in blocks:
+            target = mono[position:position + len(samples)]
+            # Summing column by column is several times faster than mean(axis=1) on interleaved audio
+            np.copyto(target, samples[:, 0], casting="unsafe")
+            for channel in range(1, samples.shape[1]):
+                target += samples[:, channel]
+            if offset:
+                target -= offset * samples.shape[1]
+            scale /= samples.shape[1]
+            if scale != 1.0:
+                target *= scale
+            position += len(samples)
+        return mono
+
+
+_native = threading.local()
+
+
+def native_decoder() -> NativeDecoder:
+    """This thread's NativeDecoder, so its buffers are reused by every file the thread decodes."""
+    if not hasattr(_native, "decoder"):
+        _native.decoder = NativeDecoder()
+    return _native.decoder
+
+
+_optional_modules = {}
+
+
+def _optional_module(name: str):
+    """Import an optional reader library once per process; None if it isn't installed."""
+    if name not in _optional_modules:
+        try:
+            _optional_modules[name] = importlib.import_module(name)
+        except (ImportError, OSError):
+            # OSError: soundfile is installed but the libsndfile library is not
+            _optional_modules[name] = None
+    return _optional_modules[name]
+
+
+# Each reader returns ([(samples of shape (frames, channels), offset, scale), ...], sample rate),
+# or None when it can't read the file
+
+def _read_av(path: str):
+    av = _optional_module("av")
+    if av is None:
+        return None
+    try:
+        with av.open(path) as container:
+            if not container.streams.audio:
+                return None
+            stream = container.streams.audio[0]
+            resampler = av.AudioResampler(format="flt", layout="mono", rate=stream.rate)
+            blocks = []
+            for frame in container.decode(stream):
+                for converted in resampler.resample(frame):
+                    blocks.append((converted.to_ndarray().reshape(-1, 1), 0.0, 1.0))
+            for converted in resampler.resample(None):
+                blocks.append((converted.to_ndarray().reshape(-1, 1), 0.0, 1.0))
+            return blocks, stream.rate
+    except (av.error.FFmpegError, OSError, ValueError):
+        return None
+
+
+def _read_soundfile(path: str):
+    soundfile = _optional_module("soundfile")
+    if soundfile is None:
+        return None
+    try:
+        samples, rate = soundfile.read(path, dtype="float32", always_2d=True)
+    except (RuntimeError, OSError, TypeError):
+        # soundfile.LibsndfileError subclasses RuntimeError
+        return None
+    return [(samples, 0.0, 1.0)], rate
+
+
+def _read_wave(path: str):
+    try:
+        with wave.open(path, "rb") as f:
+            channels, width, rate = f.getnchannels(), f.getsampwidth(), f.getframerate()
+            data = f.readframes(f.getnframes())
+    except (OSError, EOFError, wave.Error):
+        return None
+    if width == 1:
+        # 8-bit WAV is unsigned
+        samples, offset = np.frombuffer(data, np.uint8), 128.0
+    elif width == 2:
+        samples, offset = np.frombuffer(data, "<i2"), 0.0
+    elif width == 3:
+        # Sign-extend packed 24-bit samples through the top three bytes of an int32
+        packed = np.frombuffer(data, np.uint8).reshape(-1, 3)
+        samples, offset = np.zeros((len(packed), 4), dtype=np.uint8), 0.0
+        samples[:, 1:] = packed
+        samples = samples.view("<i4").reshape(-1) >> 8
+    elif width == 4:
+        samples, offset = np.frombuffer(data, "<i4"), 0.0
+    else:
+        return None
+    samples = samples[:len(samples) - len(samples) % channels].reshape(-1, channels)
+    return [(samples, offset, 1.0 / 2 ** (8 * width - 1))], rate
+
+
+def decode_to_pcm_file(path: str, pcm_path: str, sample_rate: int = SAMPLE_RATE) -> None:
+    """
+    Decode any audio/video file to a raw 16-bit mono PCM file.
+
+    ffmpeg writes straight to disk, so the decoded audio never has to fit in memory.
+
+    Args:
+        path: Path to the audio or video file
+        pcm_path: Where to write the raw s16le samples
+        sample_rate: Target sample rate in Hz
+    """
+    cmd = [
+        "ffmpeg",
+        "-nostdin",
+        "-threads", "0",
+        "-i", path,
+        "-f", "s16le",
+        "-ac", "1",
+        "-acodec", "pcm_s16le",
+        "-ar", str(sample_rate),
+        "-y", pcm_path,
+    ]
+    with stage("decode") as timing:
+        try:
+            subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, check=True)
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(f"Failed to decode audio: {e.stderr.decode(errors='replace').strip()}") from e
+        size = os.path.getsize(pcm_path)
+        timing.add(bytes=size, audio_seconds=size / 2 / sample_rate)
+
+
+def probe_media(path: str) -> Optional[dict]:
+    """
+    Read the duration and audio codec of a file from its container, without decoding it.
+
+    Uses ffprobe, falling back to the WAV header when ffprobe isn't installed.
+
+    Returns:
+        Dict with 'duration' (seconds, or None if the container doesn't say)
+        and 'codec' (name of the first audio stream's codec, 'none' if the
+        file has no audio stream), or None if the file can't be read
+    """
+    cmd = [
+        "ffprobe",
+        "-v", "error",
+        "-show_entries", "format=duration:stream=codec_type,codec_name",
+        "-of", "json",
+        path,
+    ]
+    try:
+        probe = json.loads(subprocess.run(cmd, capture_output=True, text=True, check=True).stdout)
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        probe = None
+    if probe is not None:
+        duration = (probe.get("format") or {}).get("duration")
+        codecs = [stream.get("codec_name") for stream in probe.get("streams") or [] if stream.get("codec_type") == "audio"]
+        return {
+            "duration": float(duration) if duration else None,
+            "codec": codecs[0] if codecs else "none",
+        }
+    try:
+        with wave.open(path, "rb") as f:
+            return {"duration": f.getnframes() / f.getframerate(), "codec": f"pcm_s{8 * f.getsampwidth()}le"}
+    except (OSError, EOFError, wave.Error):
+        return None
+
+
+class PCMFile:
+    """
+    A raw 16-bit mono PCM file that reads like a float32 array.
+
+    len() gives the number of samples and slicing reads just those samples
+    from disk, so code written for decoded arrays (find_split_points,
+    transcribe_chunked, iter_segments) can walk hours of audio while holding
+    only the current window in memory. Reads use pread, so several threads
+    can slice the same file at once.
+    """
+
+    def __init__(self, path: str, sample_rate: int = SAMPLE_RATE):
+        self.path = path
+        self.sample_rate = sample_rate
+        self._fd = os.open(path, os.O_RDONLY)
+        self._length = os.fstat(self._fd).st_size // 2
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index: slice) -> np.ndarray:
+        if not isinstance(index, slice):
+            raise TypeError("PCMFile only supports slicing")
+        start, stop, step = index.indices(self._length)
+        if step != 1:
+            raise ValueError("PCMFile slices can't have a step")
+        data = os.pread(self._fd, max(0, stop - start) * 2, start * 2)
+        pcm = np.frombuffer(data, np.int16)
+        # Scale straight into the output so a window costs one float32 array, not two
+        samples = np.empty(len(pcm), dtype=np.float32)
+        np.multiply(pcm, 1 / 32768.0, out=samples)
+        return samples
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self) -> "PCMFile":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+@contextmanager
+def open_pcm(path: str, sample_rate: int = SAMPLE_RATE) -> Iterator[PCMFile]:
+    """Decode path to a temporary PCM file and yield it as a PCMFile; the file is deleted afterwards."""
+    with tempfile.TemporaryDirectory(prefix="macscribe-pcm-") as tmpdir:
+        pcm_path = os.path.join(tmpdir, "audio.pcm")
+        decode_to_pcm_file(path, pcm_path, sample_rate)
+        with PCMFile(pcm_path, sample_rate) as pcm:
+            yield pcm
+
+
+def frame_energy_db(audio: np.ndarray, frame_length: int) -> np.ndarray:
+    """
+    Mean energy of consecutive non-overlapping frames, in dB.
+
+    The audio is processed a block of frames at a time, so a PCMFile is never
+    read into memory as a whole.
+
+    Args:
+        audio: 1-D PCM array or PCMFile
+        frame_length: Frame size in samples
+
+    Returns:
+        Array with one value per full frame (a trailing partial frame is padded)
+    """
+    n_frames = max(1, -(-len(audio) // frame_length))
+    energy = np.empty(n_frames, dtype=np.float32)
+    for first in range(0, n_frames, _ENERGY_BLOCK_FRAMES):
+        last = min(n_frames, first + _ENERGY_BLOCK_FRAMES)
+        samples = audio[first * frame_length:last * frame_length]
+        padded = np.zeros((last - first) * frame_length, dtype=np.float32)
+        padded[:len(samples)] = samples
+        frames = padded.reshape(last - first, frame_length)
+        energy[first:last] = np.mean(frames * frames, axis=1)
+    return 10.0 * np.log10(energy + 1e-10)
+
+
+def find_split_points(
+    audio: np.ndarray,
+    chunk_length: float,
+    search: float = 10.0,
+    sample_rate: int = SAMPLE_RATE,
+) -> list:
+    """
+    Pick split points roughly every chunk_length seconds, placed in the quietest pause nearby.
+
+    For every target boundary the preceding `search` seconds are scanned and the
+    split goes in the middle of the 300 ms stretch with the lowest energy, so
+    chunks end in silence rather than mid-word.
+
+    Args:
+        audio: 1-D PCM array or PCMFile
+        chunk_length: Target chunk length in seconds
+        search: How far before each target boundary to look for a pause, in seconds
+        sample_rate: Sample rate of audio
+
+    Returns:
+        Sorted sample offsets where the audio should be split (excluding 0 and the end)
+    """
+    frame_length = int(0.03 * sample_rate)
+    energy = frame_energy_db(audio, frame_length)
+    # Smooth over ~300 ms so single quiet frames inside words don't win
+    smooth = 10
+    smoothed = np.convolve(energy, np.ones(smooth) / smooth, mode="same")
+
+    frames_per_chunk = max(1, int(chunk_length * sample_rate / frame_length))
+    search_frames = max(1, min(int(search * sample_rate / frame_length), frames_per_chunk - 1))
+
+    splits = []
+    target = frames_per_chunk
+    while target < len(energy):
+        start = max(target - search_frames, (splits[-1] // frame_length + 1) if splits else 1)
+        best = start + int(np.argmin(smoothed[start:target + 1]))
+        splits.append(best * frame_length)
+        target = best + frames_per_chunk
+    return [s for s in splits if 0 < s < len(audio)]
+
+
+class TimeMap:
+    """
+    Maps timestamps in trimmed audio back to the original audio.
+
+    Args:
+        regions: Kept (start, end) sample ranges of the original audio, in order
+        total_samples: Length of the original audio in samples
+        sample_rate: Sample rate of the audio
+    """
+
+    def __init__(self, regions: list, total_samples: int, sample_rate: int = SAMPLE_RATE):
+        self.regions = regions
+        self.total_samples = total_samples
+        self.sample_rate = sample_rate
+        lengths = np.array([end - start for start, end in regions], dtype=np.int64)
+        self._trimmed_starts = np.concatenate([[0], np.cumsum(lengths)[:-1]]) if regions else np.zeros(0, dtype=np.int64)
+
+    @property
+    def skipped_seconds(self) -> float:
+        """Seconds of original audio that were dropped."""
+        kept = sum(end - start for start, end in self.regions)
+        return (self.total_samples - kept) / self.sample_rate
+
+    def to_original(self, seconds: float) -> float:
+        """Convert a time in the trimmed audio to the matching time in the original audio."""
+        if not self.regions:
+            return seconds
+        sample = seconds * self.sample_rate
+        index = max(0, int(np.searchsorted(self._trimmed_starts, sample, side="right")) - 1)
+        original = self.regions[index][0] + (sample - self._trimmed_starts[index])
+        return round(float(original) / self.sample_rate, 3)
+
+
+def speech_mask(
+    audio: np.ndarray,
+    frame_length: int,
+    threshold_db: float = -45.0,
+    noise_zcr: float = 0.35,
+) -> np.ndarray:
+    """
+    Classify frames as speech using energy and zero-crossing rate.
+
+    Frames quieter than threshold_db are non-speech. Frames that are only
+    moderately loud but cross zero very often (hiss, wind, broadband noise)
+    are non-speech as well.
+
+    Args:
+        audio: 1-D PCM array
+        frame_length: Frame size in samples
+        threshold_db: Energy below which a frame is silence, in dBFS
+        noise_zcr: Zero-crossing rate above which a quiet-ish frame counts as noise
+
+    Returns:
+        Boolean array with one entry per frame
+    """
+    energy = frame_energy_db(audio, frame_length)
+    n_frames = len(energy)
+    padded = np.zeros(n_frames * frame_length, dtype=np.float32)
+    padded[:len(audio)] = audio
+    signs = np.signbit(padded.reshape(n_frames, frame_length))
+    crossings = np.sum(signs[:, 1:] != signs[:, :-1], axis=1)
+    # The trailing frame may be zero-padded; only count its real samples
+    lengths = np.full(n_frames, frame_length - 1)
+    lengths[-1] = max(1, len(audio) - (n_frames - 1) * frame_length - 1)
+    zcr = crossings / lengths
+    noisy = (zcr > noise_zcr) & (energy < threshold_db + 15.0)
+    return (energy > threshold_db) & ~noisy
+
+
+def trim_non_speech(
+    audio: np.ndarray,
+    min_silence: float = 1.0,
+    padding: float = 0.2,
+    threshold_db: float = -45.0,
+    sample_rate: int = SAMPLE_RATE,
+):
+    """
+    Drop stretches of non-speech longer than min_silence seconds.
+
+    Args:
+        audio: 1-D PCM array
+        min_silence: Shortest non-speech stretch that is removed, in seconds
+        padding: Audio kept on each side of speech, in seconds
+        threshold_db: Energy threshold passed to speech_mask
+        sample_rate: Sample rate of audio
+
+    Returns:
+        Tuple of (trimmed audio, TimeMap for mapping timestamps back)
+    """
+    frame_length = int(0.03 * sample_rate)
+    speech = speech_mask(audio, frame_length, threshold_db)
+
+    # Widen speech by the padding so word onsets and tails survive
+    pad_frames = int(padding * sample_rate / frame_length)
+    if pad_frames and speech.any():
+        speech = np.convolve(speech.astype(np.int32), np.ones(2 * pad_frames + 1, dtype=np.int32), mode="same") > 0
+
+    # Run boundaries of the speech mask: starts and ends of speech regions
+    edges = np.diff(np.concatenate([[0], speech.astype(np.int8), [0]]))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    # Merge speech regions separated by gaps shorter than min_silence
+    min_gap = int(min_silence * sample_rate / frame_length)
+    regions = []
+    for start, end in zip(starts, ends):
+        if regions and start - regions[-1][1] < min_gap:
+            regions[-1][1] = end
+        else:
+            regions.append([start, end])
+
+    sample_regions = [
+        (int(start * frame_length), int(min(end * frame_length, len(audio))))
+        for start, end in regions
+    ]
+    if not sample_regions:
+        return audio[:0], TimeMap([], len(audio), sample_rate)
+    trimmed = np.concatenate([audio[start:end] for start, end in sample_regions])
+    return trimmed, TimeMap(sample_regions, len(audio), sample_rate)
@@ -0,0 +1,253 @@
+"""Transcription backends.
+
+A backend turns audio (a file path or 16 kHz mono float32 PCM) into a
+Whisper-style result dict with 'text' and 'segments'. The MLX backend runs on
+Apple Silicon; the faster-whisper backend runs on any CPU.
+
+Backends may also implement transcribe_batch(clips, model), which
+batching.transcribe_clips uses to run many padded 30-second clips through
+the model in one forward pass.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, List, Optional, Protocol, Union
+
+if TYPE_CHECKING:
+    import numpy as np
+
+DEFAULT_BACKEND = "mlx"
+
+# Loaded models each backend keeps in memory, least recently used dropped first
+MODEL_CACHE_SIZE = 2
+
+
+class Backend(Protocol):
+    """Interface every transcription backend implements."""
+
+    name: str
+
+    def transcribe(
+        self,
+        audio: Union[str, "np.ndarray"],
+        model: str,
+        initial_prompt: Optional[str] = None,
+        word_timestamps: bool = False,
+    ) -> dict:
+        """
+        Transcribe audio and return a dict with 'text' and 'segments' (each with 'start', 'end', 'text').
+
+        With word_timestamps, every segment also carries 'words', each with 'start', 'end' and 'word'.
+        """
+        ...
+
+    def load(self, model: str) -> None:
+        """Load the model ahead of the first transcription (a no-op if it is already loaded)."""
+        ...
+
+
+class MLXBackend:
+    """
+    mlx-whisper on Apple Silicon.
+
+    mlx_whisper itself only keeps the last loaded model, so switching models
+    reloads weights from disk. The backend keeps up to max_models loaded
+    models and hands the right one back to mlx_whisper before each call.
+
+    Calls are serialized: mlx_whisper's model holder is process-wide state and
+    concurrent calls on one model have not been shown to run any faster, so
+    threads (such as long-audio chunk workers) take turns.
+    """
+
+    name = "mlx"
+
+    def __init__(self, max_models: int = MODEL_CACHE_SIZE):
+        self.max_models = max_models
+        self._models: "OrderedDict[str, object]" = OrderedDict()
+        # Reentrant: transcribe_batch falls back to transcribe while holding it
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _holder():
+        try:
+            from mlx_whisper.transcribe import ModelHolder
+        except ImportError:
+            # Older or newer mlx_whisper layouts: mlx_whisper then loads models itself on every switch
+            return None
+        return ModelHolder
+
+    def _activate(self, model: str) -> None:
+        """Point mlx_whisper at model if it is in the cache, so it isn't loaded again."""
+        holder = self._holder()
+        if holder is None or model not in self._models:
+            return
+        self._models.move_to_end(model)
+        if holder.model_path != model:
+            holder.model, holder.model_path = self._models[model], model
+
+    def _remember(self, model: str) -> None:
+        """Cache the model mlx_whisper has loaded, evicting the least recently used beyond max_models."""
+        holder = self._holder()
+        if holder is None or holder.model_path != model or holder.model is None:
+            return
+        self._models[model] = holder.model
+        self._models.move_to_end(model)
+        while len(self._models) > self.max_models:
+            self._models.popitem(last=False)
+
+    def transcribe(
+        self,
+        audio: Union[str, "np.ndarray"],
+        model: str,
+        initial_prompt: Optional[str] = None,
+        word_timestamps: bool = False,
+    ) -> dict:
+        import mlx_whisper
+
+        options = {}
+        if initial_prompt is not None:
+            options["initial_prompt"] = initial_prompt
+        if word_timestamps:
+            options["word_timestamps"] = True
+        with self._lock:
+            self._activate(model)
+            result = mlx_whisper.transcribe(audio, path_or_hf_repo=model, **options)
+            self._remember(model)
+        return result
+
+    def load(self, model: str) -> None:
+        # Without mlx_whisper's holder the model loads on the first transcribe call
+        self._loaded(model)
+
+    def _loaded(self, model: str):
+        """Load model through mlx_whisper's holder and return it, or None if the holder isn't available."""
+        holder = self._holder()
+        if holder is None:
+            return None
+        import mlx.core as mx
+
+        with self._lock:
+            self._activate(model)
+            # transcribe() loads models through the same holder, in float16 by default
+            whisper = holder.get_model(model, mx.float16)
+            self._remember(model)
+        return whisper
+
+    def transcribe_batch(self, clips: "np.ndarray", model: str) -> List[str]:
+        """
+        Transcribe a (batch, 30 s of samples) array of padded clips in one encoder and decoder pass.
+
+        Decoding is greedy and without timestamps, with the language detected per clip.
+        """
+        whisper = self._loaded(model)
+        if whisper is None:
+            return [self.transcribe(clip, model).get("text", "") for clip in clips]
+        import mlx.core as mx
+        from mlx_whisper.audio import N_FRAMES, log_mel_spectrogram
+        from mlx_whisper.decoding import DecodingOptions, decode
+
+        mel = mx.stack([
+            log_mel_spectrogram(clip, n_mels=whisper.dims.n_mels)[:N_FRAMES] for clip in clips
+        ]).astype(mx.float16)
+        with self._lock:
+            results = decode(whisper, mel, DecodingOptions(without_timestamps=True))
+        return [result.text for result in results]
+
+
+class FasterWhisperBackend:
+    """
+    faster-whisper (CTranslate2) on the CPU, for machines without Apple Silicon.
+
+    MLX model names such as 'mlx-community/whisper-large-v3-mlx' are mapped to
+    the matching faster-whisper size ('large-v3'); any other name is passed
+    through unchanged. Up to max_models loaded models are kept in memory.
+    """
+
+    name = "faster-whisper"
+
+    def __init__(self, device: str = "cpu", compute_type: str = "int8", max_models: int = MODEL_CACHE_SIZE):
+        self.device = device
+        self.compute_type = compute_type
+        self.max_models = max_models
+        self._models: "OrderedDict[str, object]" = OrderedDict()
+
+    def _load(self, model: str):
+        name = faster_whisper_model_name(model)
+        if name in self._models:
+            self._models.move_to_end(name)
+        else:
+            try:
+                from faster_whisper import WhisperModel
+            except ImportError as e:
+                raise RuntimeError(
+                    "The faster-whisper backend needs the 'faster-whisper' package. "
+                    "Install it with: pip install 'macscribe[cpu]'"
+                ) from e
+            self._models[name] = WhisperModel(name, device=self.device, compute_type=self.compute_type)
+            while len(self._models) > self.max_models:
+                self._models.popitem(last=False)
+        return self._models[name]
+
+    def load(self, model: str) -> None:
+        self._load(model)
+
+    def transcribe(
+        self,
+        audio: Union[str, "np.ndarray"],
+        model: str,
+        initial_prompt: Optional[str] = None,
+        word_timestamps: bool = False,
+    ) -> dict:
+        segments, _ = self._load(model).transcribe(
+            audio, initial_prompt=initial_prompt, word_timestamps=word_timestamps
+        )
+        result_segments = []
+        for segment in segments:
+            result_segment = {"start": segment.start, "end": segment.end, "text": segment.text}
+            if word_timestamps and segment.words:
+                result_segment["words"] = [
+                    {"start": word.start, "end": word.end, "word": word.word} for word in segment.words
+                ]
+            result_segments.append(result_segment)
+        return {
+            "text": "".join(segment["text"] for segment in result_segments),
+            "segments": result_segments,
+        }
+
+
+def faster_whisper_model_name(model: str) -> str:
+    """
+    Map an mlx-community Whisper repo name to the faster-whisper model size it corresponds to.
+
+    Quantized MLX variants map to the same size; faster-whisper quantizes with its compute_type instead.
+    """
+    name = model
+    if name.startswith("mlx-community/whisper-"):
+        name = name[len("mlx-community/whisper-"):]
+        for suffix in ("-4bit", "-8bit", "-mlx"):
+            if name.endswith(suffix):
+                name = name[:-len(suffix)]
+    return name
+
+
+BACKENDS = {
+    MLXBackend.name: MLXBackend,
+    FasterWhisperBackend.name: FasterWhisperBackend,
+}
+
+_instances: Dict[str, Backend] = {}
+
+
+def register_backend(name: str, backend_class) -> None:
+    """Make a backend class available under name (e.g. for benchmarks or plugins)."""
+    BACKENDS[name] = backend_class
+    _instances.pop(name, None)
+
+
+def get_backend(name: str = DEFAULT_BACKEND) -> Backend:
+    """Return the shared instance of the named backend."""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend '{name}'. Choose one of: {', '.join(BACKENDS)}")
+    if name not in _instances:
+        _instances[name] = BACKENDS[name]()
+    return _instances[name]
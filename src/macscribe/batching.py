@@ -0,0 +1,89 @@
+"""Batched transcription of many short clips.
+
+Whisper encodes audio in fixed 30-second windows, so a 5-second voice note
+costs a full window of encoder work, and transcribing thousands of notes one
+call at a time leaves most of the accelerator idle between small launches.
+transcribe_clips() pads every clip of up to 30 seconds to one window, stacks
+batch_size windows and hands the whole batch to the backend, which runs the
+encoder and decoder over it in one forward pass and returns one text per
+clip. Longer inputs are transcribed on their own as usual.
+
+Backends opt in with a transcribe_batch(clips, model) method; for backends
+without one the clips of a batch are transcribed one by one, so results
+never depend on the backend supporting batches.
+"""
+
+from typing import List, Sequence, Union
+
+import numpy as np
+
+from macscribe.audio import DEFAULT_DECODER, SAMPLE_RATE, decode_audio
+from macscribe.backends import DEFAULT_BACKEND, get_backend
+from macscribe.metrics import stage
+
+# One Whisper window: clips up to this long are padded to it and batched
+CLIP_SECONDS = 30.0
+CLIP_SAMPLES = int(CLIP_SECONDS * SAMPLE_RATE)
+
+DEFAULT_BATCH_SIZE = 8
+
+
+def fits_batch(audio: np.ndarray) -> bool:
+    """Whether decoded audio is short enough to be transcribed as part of a batch."""
+    return len(audio) <= CLIP_SAMPLES
+
+
+def pad_batch(clips: Sequence[np.ndarray]) -> np.ndarray:
+    """Stack clips into a (len(clips), CLIP_SAMPLES) float32 array, zero-padded at the end of each row."""
+    batch = np.zeros((len(clips), CLIP_SAMPLES), dtype=np.float32)
+    for row, clip in zip(batch, clips):
+        row[:len(clip)] = clip
+    return batch
+
+
+def transcribe_clips(
+    clips: Sequence[Union[str, np.ndarray]],
+    model: str,
+    backend: str = DEFAULT_BACKEND,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    decoder: str = DEFAULT_DECODER,
+) -> List[dict]:
+    """
+    Transcribe many short clips, batch_size clips per forward pass.
+
+    Args:
+        clips: Paths to audio/video files or 16 kHz mono PCM arrays
+        model: Hugging Face model to use
+        backend: Name of the transcription backend
+        batch_size: Clips padded into one batch
+        decoder: How files are decoded: 'ffmpeg' or 'native' (in-process)
+
+    Returns:
+        One dict per clip, in input order, with 'text' and 'segments'. A
+        batched clip gets a single segment spanning the whole clip; its text
+        is empty if the model heard nothing.
+    """
+    from macscribe.transcriber import transcribe_result
+
+    audios = [decode_audio(clip, decoder=decoder) if isinstance(clip, str) else clip for clip in clips]
+    results: List[dict] = [{} for _ in audios]
+    short = []
+    for index, audio in enumerate(audios):
+        if fits_batch(audio):
+            short.append(index)
+        else:
+            results[index] = transcribe_result(audio, model, backend=backend)
+
+    engine = get_backend(backend)
+    for first in range(0, len(short), max(1, batch_size)):
+        indexes = short[first:first + max(1, batch_size)]
+        batch = [audios[index] for index in indexes]
+        with stage("transcribe", audio_seconds=sum(len(audio) for audio in batch) / SAMPLE_RATE):
+            if hasattr(engine, "transcribe_batch"):
+                texts = engine.transcribe_batch(pad_batch(batch), model)
+            else:
+                texts = [engine.transcribe(audio, model).get("text", "") for audio in batch]
+        for index, text in zip(indexes, texts):
+            end = round(len(audios[index]) / SAMPLE_RATE, 3)
+            results[index] = {"text": text, "segments": [{"start": 0.0, "end": end, "text": text}] if text else []}
+    return results
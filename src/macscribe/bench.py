@@ -0,0 +1,335 @@
+"""Benchmark harness that times each stage of a transcription run.
+
+Synthetic speech-like audio of the requested durations is written to WAV
+files and pushed through the same functions the CLI uses. Every stage is timed
+separately, and the run records the real-time factor of transcription and the
+peak resident memory. Results are plain JSON so they can be stored as a
+baseline and compared against later runs.
+
+The 'stand-in' backend does a fixed amount of NumPy work per second of audio
+instead of running a model, so the harness also runs on Linux CI machines.
+
+run_decode_benchmark() compares the decoders on many short clips, where
+starting an ffmpeg process per file costs more than the decoding itself, and
+run_clip_benchmark() compares transcribing short clips one call at a time
+with batched transcription.
+"""
+
+import json
+import os
+import platform
+import shutil
+import statistics
+import tempfile
+import time
+import wave
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from macscribe.audio import DECODERS, SAMPLE_RATE, decode_audio
+from macscribe.backends import BACKENDS, get_backend, register_backend
+from macscribe.batching import DEFAULT_BATCH_SIZE, transcribe_clips
+from macscribe.clipboard import copy_to_clipboard
+from macscribe.downloader import prepare_audio, validate_input
+from macscribe.metrics import peak_rss_bytes
+from macscribe.saver import save_transcript_to_file
+from macscribe.transcriber import transcribe_audio
+
+STAGES = (
+    "validate_input",
+    "prepare_audio",
+    "decode",
+    "model_load",
+    "transcribe_audio",
+    "save_transcript_to_file",
+    "clipboard",
+)
+
+
+class StandInBackend:
+    """Backend that spends a small, fixed amount of CPU per second of audio and returns placeholder text."""
+
+    name = "stand-in"
+
+    def transcribe(self, audio, model: str, initial_prompt: Optional[str] = None, word_timestamps: bool = False) -> dict:
+        if isinstance(audio, str):
+            audio = decode_audio(audio)
+        window = SAMPLE_RATE
+        segments = []
+        for index, start in enumerate(range(0, len(audio), window)):
+            # A short FFT per second of audio stands in for model compute
+            np.abs(np.fft.rfft(audio[start:start + window], n=window))
+            segments.append({"start": float(index), "end": float(index + 1), "text": " word"})
+        return {"text": "".join(s["text"] for s in segments), "segments": segments}
+
+    def transcribe_batch(self, clips: np.ndarray, model: str) -> List[str]:
+        # The same work per second of audio as transcribe(), as one vectorized pass over the batch;
+        # seconds that are all padding are skipped, so only the batching overhead is measured
+        seconds = clips.reshape(-1, SAMPLE_RATE)
+        np.abs(np.fft.rfft(seconds[np.any(seconds, axis=1)], axis=1))
+        return [" word"] * len(clips)
+
+    def load(self, model: str) -> None:
+        pass
+
+
+if StandInBackend.name not in BACKENDS:
+    register_backend(StandInBackend.name, StandInBackend)
+
+
+def synthesize_audio(seconds: float, seed: int = 0) -> np.ndarray:
+    """Speech-like test signal: bursts of harmonic tones separated by short pauses."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    pitch = 120 + 40 * np.sin(2 * np.pi * 0.3 * t)
+    voice = sum(np.sin(2 * np.pi * k * pitch * t) / k for k in range(1, 5))
+    envelope = (np.sin(2 * np.pi * 0.5 * t) > -0.3).astype(np.float32)
+    noise = rng.standard_normal(len(t)) * 0.01
+    return (0.2 * voice * envelope + noise).astype(np.float32)
+
+
+def write_wav(path: str, audio: np.ndarray, sample_rate: int = SAMPLE_RATE, channels: int = 1) -> None:
+    """Write float PCM as a 16-bit WAV file; with several channels, the mono signal is written to each."""
+    pcm = (np.clip(audio, -1, 1) * 32767).astype(np.int16)
+    with wave.open(path, "wb") as f:
+        f.setnchannels(channels)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(np.repeat(pcm, channels).tobytes())
+
+
+def read_wav(path: str) -> np.ndarray:
+    """Read a 16-bit mono WAV file written by write_wav."""
+    with wave.open(path, "rb") as f:
+        return np.frombuffer(f.readframes(f.getnframes()), np.int16).astype(np.float32) / 32768.0
+
+
+def _timed(stages: Dict[str, Optional[float]], name: str, func: Callable, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    stages[name] = time.perf_counter() - start
+    return result
+
+
+def run_once(seconds: float, model: str, backend: str, workdir: str) -> dict:
+    """
+    Time every stage once for a synthetic input of the given length.
+
+    Stages that can't run on this machine (decoding without ffmpeg, the
+    clipboard without pbcopy) are recorded as None.
+    """
+    stages: Dict[str, Optional[float]] = dict.fromkeys(STAGES)
+    audio_path = os.path.join(workdir, f"bench_{int(seconds)}s.wav")
+    write_wav(audio_path, synthesize_audio(seconds))
+
+    _timed(stages, "validate_input", validate_input, audio_path)
+    audio_file = _timed(stages, "prepare_audio", prepare_audio, audio_path, workdir)
+    if shutil.which("ffmpeg"):
+        audio = _timed(stages, "decode", decode_audio, audio_file)
+    else:
+        audio = read_wav(audio_file)
+
+    _timed(stages, "model_load", get_backend(backend).load, model)
+    transcript = _timed(
+        stages, "transcribe_audio", transcribe_audio, audio, model, copy=False, backend=backend
+    )
+    _timed(stages, "save_transcript_to_file", save_transcript_to_file, transcript, workdir + os.sep, audio_file)
+    if shutil.which("pbcopy"):
+        _timed(stages, "clipboard", copy_to_clipboard, transcript)
+
+    return {"stages": stages, "peak_rss_bytes": peak_rss_bytes()}
+
+
+def run_benchmark(
+    durations: List[float],
+    model: str = "mlx-community/whisper-large-v3-mlx",
+    backend: str = "stand-in",
+    repeat: int = 1,
+) -> dict:
+    """
+    Benchmark every stage for each duration and return the results as a JSON-ready dict.
+
+    With repeat > 1 each stage reports the median over the runs. The real-time
+    factor (rtf) is transcribe_audio time divided by audio duration.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for seconds in durations:
+            runs = [run_once(seconds, model, backend, workdir) for _ in range(repeat)]
+            stages = {}
+            for stage in STAGES:
+                values = [run["stages"][stage] for run in runs if run["stages"][stage] is not None]
+                stages[stage] = statistics.median(values) if values else None
+            results.append({
+                "duration": seconds,
+                "stages": stages,
+                "rtf": stages["transcribe_audio"] / seconds,
+                "peak_rss_bytes": max(run["peak_rss_bytes"] for run in runs),
+            })
+
+    return {
+        "backend": backend,
+        "model": model,
+        "repeat": repeat,
+        "machine": {
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            "python": platform.python_version(),
+        },
+        "results": results,
+    }
+
+
+def run_decode_benchmark(
+    clips: int = 100,
+    seconds: float = 5.0,
+    sample_rate: int = 44100,
+    channels: int = 2,
+) -> dict:
+    """
+    Decode the same set of short clips with each decoder and report clips per second.
+
+    The clips are CD-style WAV files (44.1 kHz stereo by default), so every
+    decoder has to mix down and resample to 16 kHz. The ffmpeg decoder is
+    recorded as None when ffmpeg isn't installed.
+    """
+    # synthesize_audio counts 16 kHz samples; scale so the clip lasts `seconds` at sample_rate
+    signal = synthesize_audio(seconds * sample_rate / SAMPLE_RATE)
+    decoders = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        paths = []
+        for index in range(clips):
+            path = os.path.join(workdir, f"clip_{index}.wav")
+            write_wav(path, signal, sample_rate=sample_rate, channels=channels)
+            paths.append(path)
+        for decoder in DECODERS:
+            if decoder == "ffmpeg" and not shutil.which("ffmpeg"):
+                decoders[decoder] = None
+                continue
+            start = time.perf_counter()
+            for path in paths:
+                decode_audio(path, decoder=decoder)
+            elapsed = time.perf_counter() - start
+            decoders[decoder] = {"seconds": elapsed, "clips_per_sec": clips / elapsed}
+    return {
+        "clips": clips,
+        "clip_seconds": seconds,
+        "sample_rate": sample_rate,
+        "channels": channels,
+        "decoders": decoders,
+    }
+
+
+def run_clip_benchmark(
+    clips: int = 64,
+    seconds: float = 5.0,
+    model: str = "mlx-community/whisper-large-v3-mlx",
+    backend: str = "stand-in",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> dict:
+    """
+    Transcribe the same short clips one call per clip and in batches, and report clips per second.
+
+    The clips are decoded up front so only transcription is timed, and the
+    model is loaded before either run.
+    """
+    audios = [synthesize_audio(seconds, seed=index) for index in range(clips)]
+    get_backend(backend).load(model)
+    modes = {}
+
+    start = time.perf_counter()
+    for audio in audios:
+        transcribe_audio(audio, model, copy=False, backend=backend)
+    elapsed = time.perf_counter() - start
+    modes["sequential"] = {"seconds": elapsed, "clips_per_sec": clips / elapsed}
+
+    start = time.perf_counter()
+    transcribe_clips(audios, model, backend=backend, batch_size=batch_size)
+    elapsed = time.perf_counter() - start
+    modes[f"batch of {batch_size}"] = {"seconds": elapsed, "clips_per_sec": clips / elapsed}
+
+    return {"clips": clips, "clip_seconds": seconds, "batch_size": batch_size, "modes": modes}
+
+
+def format_clip_report(report: dict) -> str:
+    """Render clip benchmark results as a table."""
+    lines = [
+        f"transcribing {report['clips']} clips of {report['clip_seconds']:g}s",
+        f"{'mode':<26}{'total':>13}{'clips/sec':>13}",
+    ]
+    for mode, result in report["modes"].items():
+        lines.append(f"{mode:<26}{result['seconds'] * 1000:>10.1f} ms{result['clips_per_sec']:>13.1f}")
+    return "\n".join(lines)
+
+
+def format_decode_report(report: dict) -> str:
+    """Render decode benchmark results as a table."""
+    lines = [
+        f"decoding {report['clips']} clips of {report['clip_seconds']:g}s "
+        f"({report['sample_rate']} Hz, {report['channels']} ch)",
+        f"{'decoder':<26}{'total':>13}{'clips/sec':>13}",
+    ]
+    for decoder, result in report["decoders"].items():
+        if result is None:
+            lines.append(f"{decoder:<26}{'skipped':>13}{'skipped':>13}")
+        else:
+            lines.append(f"{decoder:<26}{result['seconds'] * 1000:>10.1f} ms{result['clips_per_sec']:>13.1f}")
+    return "\n".join(lines)
+
+
+def compare_to_baseline(current: dict, baseline: dict, tolerance: float = 0.2, min_delta: float = 0.005) -> List[str]:
+    """
+    List the stages that got slower than the baseline.
+
+    A stage regresses when it is more than `tolerance` (relative) and more than
+    `min_delta` seconds (absolute) slower than the baseline for the same duration.
+
+    Returns:
+        Human-readable descriptions of each regression; empty if none
+    """
+    baseline_by_duration = {result["duration"]: result for result in baseline.get("results", [])}
+    regressions = []
+    for result in current["results"]:
+        reference = baseline_by_duration.get(result["duration"])
+        if reference is None:
+            continue
+        for stage, seconds in result["stages"].items():
+            before = reference["stages"].get(stage)
+            if seconds is None or before is None:
+                continue
+            if seconds - before > min_delta and seconds > before * (1 + tolerance):
+                regressions.append(
+                    f"{stage} @ {result['duration']:g}s: {before * 1000:.1f} ms -> {seconds * 1000:.1f} ms "
+                    f"(+{(seconds / before - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def format_report(report: dict) -> str:
+    """Render benchmark results as a table."""
+    lines = [f"backend: {report['backend']}  model: {report['model']}  repeat: {report['repeat']}"]
+    header = f"{'stage':<26}" + "".join(f"{result['duration']:>12g}s" for result in report["results"])
+    lines.append(header)
+    for stage in STAGES:
+        cells = []
+        for result in report["results"]:
+            seconds = result["stages"][stage]
+            cells.append(f"{'skipped':>13}" if seconds is None else f"{seconds * 1000:>10.1f} ms")
+        lines.append(f"{stage:<26}" + "".join(cells))
+    lines.append(f"{'real-time factor':<26}" + "".join(f"{result['rtf']:>13.4f}" for result in report["results"]))
+    lines.append(
+        f"{'peak RSS':<26}"
+        + "".join(f"{result['peak_rss_bytes'] / 2**20:>10.0f} MB" for result in report["results"])
+    )
+    return "\n".join(lines)
+
+
+def load_report(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_report(report: dict, path: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
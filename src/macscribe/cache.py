@@ -0,0 +1,224 @@
+"""Persistent on-disk state: cached transcripts, cached downloads and sync manifests."""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Iterable, Optional
+
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+DEFAULT_MEDIA_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+# Transcription options that only affect speed, not the transcript, so they stay out of cache keys
+NON_OUTPUT_OPTIONS = {"chunk_workers", "decoder"}
+
+
+def default_cache_dir() -> Path:
+    """Return the macscribe cache directory, honouring MACSCRIBE_CACHE_DIR and XDG_CACHE_HOME."""
+    override = os.environ.get("MACSCRIBE_CACHE_DIR")
+    if override:
+        return Path(override)
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(base) / "macscribe"
+
+
+def file_digest(path: str) -> str:
+    """Return the SHA-256 hex digest of a file's contents."""
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def cache_key(identity: str, model: str, **options) -> str:
+    """
+    Build a cache key from the input identity, model and decode options.
+
+    Args:
+        identity: Stable identity of the input (see downloader.source_id)
+        model: Model used for transcription
+        **options: Any option that changes the transcript
+
+    Returns:
+        Hex digest identifying the transcript
+    """
+    payload = json.dumps({"input": identity, "model": model, "options": options}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TranscriptCache:
+    """
+    Transcripts stored as one JSON file per key, evicted least-recently-used first.
+
+    The modification time of an entry is bumped on every hit, so eviction
+    removes the entries that were read or written longest ago once the
+    directory grows past max_bytes.
+    """
+
+    def __init__(self, directory: Optional[Path] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = Path(directory) if directory else default_cache_dir() / "transcripts"
+        self.max_bytes = max_bytes
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return the cached entry for key, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return entry
+
+    def put(self, key: str, transcript: str, name: str, segments: Optional[list] = None) -> None:
+        """
+        Store a transcript and evict old entries if the cache is over budget.
+
+        Args:
+            key: Cache key from cache_key()
+            transcript: The transcript text
+            name: Base name used when the transcript is saved to a directory
+            segments: Timed segments of the transcript, if they were kept
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp_path = path.with_suffix(".tmp")
+        entry = {"text": transcript, "name": name, "created": time.time()}
+        if segments is not None:
+            entry["segments"] = segments
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self) -> None:
+        """Delete least-recently-used entries until the cache fits in max_bytes."""
+        entries = []
+        total = 0
+        for path in self.directory.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+
+
+class MediaCache:
+    """
+    Downloaded media kept between runs, one directory per input, evicted least-recently-used first.
+
+    Downloads go straight into the entry directory of their input, so an
+    interrupted download leaves yt-dlp's .part file there and the next
+    attempt continues it. An entry only counts as complete once put() has
+    recorded its file.
+    """
+
+    def __init__(self, directory: Optional[Path] = None, max_bytes: int = DEFAULT_MEDIA_MAX_BYTES):
+        self.directory = Path(directory) if directory else default_cache_dir() / "media"
+        self.max_bytes = max_bytes
+
+    def _entry(self, identity: str) -> Path:
+        return self.directory / hashlib.sha256(identity.encode("utf-8")).hexdigest()[:32]
+
+    def entry_dir(self, identity: str) -> Path:
+        """Return (and create) the directory the input's media should be downloaded into."""
+        path = self._entry(identity)
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def get(self, identity: str) -> Optional[str]:
+        """Return the path of the cached media for identity, or None on a miss."""
+        marker = self._entry(identity) / "entry.json"
+        try:
+            with open(marker, "r", encoding="utf-8") as f:
+                path = self._entry(identity) / json.load(f)["file"]
+        except (OSError, ValueError, KeyError):
+            return None
+        if not path.is_file():
+            return None
+        os.utime(marker)
+        return str(path)
+
+    def put(self, identity: str, path: str) -> None:
+        """
+        Mark the download at path as the complete media for identity and evict old entries.
+
+        Files outside the entry directory (for example local inputs) are not tracked.
+        """
+        entry = self._entry(identity)
+        if Path(path).parent.resolve() != entry.resolve() or not os.path.isfile(path):
+            return
+        with open(entry / "entry.json", "w", encoding="utf-8") as f:
+            json.dump({"identity": identity, "file": Path(path).name, "created": time.time()}, f)
+        self.evict(keep=entry)
+
+    def evict(self, keep: Optional[Path] = None) -> None:
+        """Delete least-recently-used entries (never keep) until the cache fits in max_bytes."""
+        entries = []
+        total = 0
+        for entry in self.directory.iterdir() if self.directory.is_dir() else []:
+            if not entry.is_dir():
+                continue
+            try:
+                size = sum(path.stat().st_size for path in entry.iterdir())
+                marker = entry / "entry.json"
+                last_used = (marker if marker.exists() else entry).stat().st_mtime
+            except OSError:
+                continue
+            entries.append((last_used, size, entry))
+            total += size
+
+        entries.sort()
+        for _, size, entry in entries:
+            if total <= self.max_bytes:
+                break
+            if keep is not None and entry == keep:
+                continue
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+
+class SyncManifest:
+    """
+    Identities of the inputs already transcribed into an output directory.
+
+    Stored as .macscribe-sync.json inside the output directory, so syncing a
+    playlist or feed into the same directory again only processes episodes
+    that are not in the manifest yet.
+    """
+
+    FILENAME = ".macscribe-sync.json"
+
+    def __init__(self, directory: str):
+        self.path = Path(directory) / self.FILENAME
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.done = set(json.load(f).get("done", []))
+        except (OSError, ValueError):
+            self.done = set()
+
+    def __contains__(self, identity: str) -> bool:
+        return identity in self.done
+
+    def add(self, identities: Iterable[str]) -> None:
+        """Record identities as transcribed and write the manifest straight away."""
+        self.done.update(identities)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"done": sorted(self.done)}, f, indent=1)
+        os.replace(tmp_path, self.path)
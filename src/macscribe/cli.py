@@ -1,57 +1,1492 @@
+import functools
 import os
+import shutil
+import sys
 import tempfile
+import time
 import typer
-from typing import Optional
+from contextlib import contextmanager
+from dataclasses import dataclass, field, replace
+from enum import Enum
+from typing import Container, Dict, List, Optional, Tuple
 
-from macscribe.downloader import validate_input, prepare_audio
-from macscribe.transcriber import transcribe_audio
-from macscribe.saver import save_transcript_to_file
+from pathlib import Path
 
-app = typer.Typer()
+# transcriber and audio pull in numpy and the model backends, so they are
+# imported inside the functions that need them to keep --help fast
+from macscribe.downloader import (
+    validate_input,
+    prepare_audio,
+    source_id,
+    is_collection_url,
+    expand_collection,
+    is_local_pattern,
+    find_media_files,
+    probe_input,
+    parse_rate,
+    pop_download_report,
+    DEFAULT_POLICY,
+    DownloadReport,
+    MediaInfo,
+)
+from macscribe.saver import save_transcript_to_file, save_transcript_formats, resolve_output_path, format_segment_line
+from macscribe.pipeline import DownloadPipeline
+from macscribe.cache import NON_OUTPUT_OPTIONS, MediaCache, SyncManifest, TranscriptCache, cache_key
+from macscribe.clipboard import copy_to_clipboard
+from macscribe.backends import DEFAULT_BACKEND
+from macscribe.metrics import collecting, stage
+from macscribe.jobs import Job, default_jobs_dir, job_key
+from macscribe import models as model_registry
+from macscribe.daemon import DaemonError, TranscriptionServer, default_socket_path, is_running, request_transcription
+from typer.core import TyperGroup
 
-@app.command(no_args_is_help=True)
-def main(
-    input_source: str = typer.Argument(..., help="URL of a YouTube/Apple Podcast/X video, or path to local audio/video file"),
-    model: str = typer.Option(
-        "mlx-community/whisper-large-v3-mlx",
-        help="Hugging Face model to use for transcription. Defaults to the large model."
-    ),
-    output: Optional[str] = typer.Option(
-        None,
-        "--output",
-        "-o",
-        help="Path to save the transcript as a text file. Can be a directory or a file path."
-    )
-):
-    if not validate_input(input_source):
+class _DefaultCommandGroup(TyperGroup):
+    """Command group that runs `transcribe` unless the first argument names another command.
+
+    This keeps `macscribe <URL_OR_FILE>` working next to subcommands such as `macscribe serve`.
+    No arguments, `--help` and `-h` are left to the group, whose help lists every command.
+    """
+
+    default_command = "transcribe"
+
+    def parse_args(self, ctx, args):
+        if args and args[0] not in self.commands and args[0] not in ("--help", "-h"):
+            args = [self.default_command, *args]
+        return super().parse_args(ctx, args)
+
+
+app = typer.Typer(
+    cls=_DefaultCommandGroup,
+    help="Transcribe audio and video with Whisper: `macscribe URL_OR_FILE [OPTIONS]`. "
+    "Run `macscribe transcribe --help` for every transcription option.",
+    no_args_is_help=True,
+    context_settings={"help_option_names": ["--help", "-h"]},
+)
+models_app = typer.Typer(help="List, download and remove Whisper models.", no_args_is_help=True)
+app.add_typer(models_app, name="models")
+
+
+class DownloadQuality(str, Enum):
+    asr = "asr"
+    best = "best"
+
+
+class Decoder(str, Enum):
+    ffmpeg = "ffmpeg"
+    native = "native"
+
+
+class StreamFormat(str, Enum):
+    text = "text"
+    jsonl = "jsonl"
+
+
+class OutputFormat(str, Enum):
+    txt = "txt"
+    srt = "srt"
+    vtt = "vtt"
+    json = "json"
+    tsv = "tsv"
+
+
+class BackendName(str, Enum):
+    mlx = "mlx"
+    faster_whisper = "faster-whisper"
+
+
+def read_input_list(path: str) -> List[str]:
+    """Read inputs from a file (or stdin when path is '-'), one per line. Blank lines and '#' comments are skipped."""
+    if path == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    return [line.strip() for line in lines if line.strip() and not line.strip().startswith("#")]
+
+
+class InvalidInputError(ValueError):
+    """Raised for inputs that are neither a supported URL nor a supported local file."""
+
+
+def _media_identity(input_source: str, download: Optional[dict] = None) -> str:
+    """Media cache identity of a URL: its source identity, tagged with the format policy unless it is the default."""
+    identity = source_id(input_source)
+    policy = (download or {}).get("policy", DEFAULT_POLICY)
+    return identity if policy == DEFAULT_POLICY else f"{identity}#{policy}"
+
+
+def _fetch_audio(
+    input_source: str, tmpdir: str, media_cache: Optional[MediaCache] = None, download: Optional[dict] = None
+) -> Tuple[str, Optional[DownloadReport]]:
+    """
+    Prepare audio for an input, reusing and filling the media cache for URLs.
+
+    Returns:
+        The audio file, and the download report if anything was downloaded
+    """
+    download = download or {}
+    if media_cache is None or os.path.isfile(input_source):
+        return prepare_audio(input_source, tmpdir, **download), pop_download_report()
+    identity = _media_identity(input_source, download)
+    cached = media_cache.get(identity)
+    if cached:
+        return cached, None
+    audio_file = prepare_audio(input_source, str(media_cache.entry_dir(identity)), **download)
+    media_cache.put(identity, audio_file)
+    return audio_file, pop_download_report()
+
+
+def _prepare_valid_audio(
+    input_source: str,
+    tmpdir: str,
+    media_cache: Optional[MediaCache] = None,
+    trusted: Container[str] = (),
+    download: Optional[dict] = None,
+    reports: Optional[Dict[str, DownloadReport]] = None,
+) -> str:
+    if input_source not in trusted and not validate_input(input_source):
+        raise InvalidInputError(input_source)
+    audio_file, report = _fetch_audio(input_source, tmpdir, media_cache, download)
+    if report is not None and reports is not None:
+        reports[input_source] = report
+    return audio_file
+
+
+def _download_summary(report: DownloadReport) -> str:
+    line = f"Downloaded {(report.bytes or 0) / 2**20:.1f} MB"
+    if report.format_id:
+        line += f" (format {report.format_id})"
+    saved = report.saved_bytes
+    if saved and saved > 0:
+        line += f", {saved / 2**20:.1f} MB less than the best-quality stream"
+    return line + "."
+
+
+def _keep_audio(input_source: str, audio_file: str, output: Optional[str]) -> None:
+    """Copy downloaded audio next to where the transcript goes (local inputs are already on disk)."""
+    if os.path.isfile(input_source):
+        return
+    target = resolve_output_path(output or "." + os.sep, audio_file).with_suffix(Path(audio_file).suffix)
+    try:
+        shutil.copy2(audio_file, target)
+        typer.echo(f"Audio saved to: {target.resolve()}")
+    except OSError as e:
+        typer.echo(f"Error saving audio: {e}")
+
+
+@dataclass
+class RunSettings:
+    """Settings shared by every input of one macscribe run."""
+
+    model: str
+    # Extra keyword arguments for transcribe_audio; empty means the plain path
+    options: dict = field(default_factory=dict)
+    cache: Optional[TranscriptCache] = None
+    refresh: bool = False
+    trim_silence: bool = False
+    use_daemon: bool = True
+    resume: bool = False
+    media_cache: Optional[MediaCache] = None
+    keep_audio: bool = False
+    # Formats every transcript is saved in
+    formats: tuple = ("txt",)
+    # Extra keyword arguments for download_audio (policy, concurrent_fragments, rate_limit)
+    download: dict = field(default_factory=dict)
+
+    @property
+    def backend(self) -> str:
+        return self.options.get("backend", DEFAULT_BACKEND)
+
+    @property
+    def needs_segments(self) -> bool:
+        """Formats other than plain text need the timed segments, not just the text."""
+        return self.formats != ("txt",) or "word_timestamps" in self.options
+
+    @property
+    def checkpointed(self) -> bool:
+        """Long-audio runs keep their progress in a job directory so they can be resumed."""
+        return "chunk_length" in self.options
+
+    def job_directory(self, input_source: str) -> Optional[Path]:
+        """Return the job directory for an input, or None if its identity can't be determined."""
+        try:
+            return default_jobs_dir() / job_key(source_id(input_source), self.model, self.backend)
+        except Exception:
+            return None
+
+    def cache_key(self, input_source: str, batched: bool = False) -> Optional[str]:
+        """Return the transcript cache key for an input, or None if caching is off or its identity can't be determined.
+
+        batched marks a clip transcribed by batching.transcribe_clips: greedy,
+        without timestamps and as one segment, so it never answers for a normal run.
+        """
+        if self.cache is None:
+            return None
+        key_options = {k: v for k, v in self.options.items() if k not in NON_OUTPUT_OPTIONS}
+        if self.trim_silence:
+            key_options["trim_silence"] = True
+        if batched:
+            key_options["batched"] = True
+        if "policy" in self.download and not os.path.isfile(input_source):
+            # A different stream of the same URL may transcribe differently
+            key_options["download_policy"] = self.download["policy"]
+        try:
+            return cache_key(source_id(input_source), self.model, **key_options)
+        except Exception:
+            return None
+
+    def has_media(self, input_source: str) -> bool:
+        """Return True if the media of a URL input is already in the media cache."""
+        if self.media_cache is None or os.path.isfile(input_source):
+            return False
+        try:
+            return self.media_cache.get(_media_identity(input_source, self.download)) is not None
+        except Exception:
+            return False
+
+    def cached(self, key: Optional[str]) -> Optional[dict]:
+        """Return the cache entry for key unless caching is off or a refresh was asked for.
+
+        Entries stored without segments are a miss when the output formats need them.
+        """
+        if key is None or self.refresh:
+            return None
+        entry = self.cache.get(key)
+        if entry and self.needs_segments and "segments" not in entry:
+            return None
+        return entry
+
+    def store(self, key: Optional[str], transcript: str, audio_file: str, segments: Optional[list] = None) -> None:
+        """Store a transcript in the cache. Cache write failures never fail the run."""
+        if self.cache is None or key is None:
+            return
+        try:
+            self.cache.put(key, transcript, Path(audio_file).stem, segments=segments)
+        except OSError:
+            pass
+
+    def save(self, transcript: str, segments: Optional[list], output: str, audio_file: str) -> List[str]:
+        """Save a transcript in every output format and return the saved paths."""
+        if not self.needs_segments:
+            return [save_transcript_to_file(transcript, output, audio_file)]
+        return save_transcript_formats(transcript, segments or [], output, audio_file, self.formats)
+
+
+def _decode_for_transcription(audio_file: str, trim_silence: bool, decoder: Optional[str] = None):
+    """Decode audio to PCM, dropping non-speech when trim_silence is set. Returns (audio, TimeMap or None)."""
+    from macscribe.audio import SAMPLE_RATE, decode_audio, trim_non_speech
+
+    audio = decode_audio(audio_file, decoder=decoder) if decoder else decode_audio(audio_file)
+    if not trim_silence:
+        return audio, None
+    with stage("trim_silence", audio_seconds=len(audio) / SAMPLE_RATE):
+        return trim_non_speech(audio)
+
+
+def _skip_report(time_map) -> str:
+    total = time_map.total_samples / time_map.sample_rate
+    percent = 100 * time_map.skipped_seconds / total if total else 0
+    return f"Skipped {time_map.skipped_seconds:.1f} s of non-speech audio ({percent:.0f}%)."
+
+
+def _save_or_exit(
+    transcript: str, output: str, audio_file: str, settings: RunSettings, segments: Optional[list] = None
+) -> None:
+    try:
+        for saved_path in settings.save(transcript, segments, output, audio_file):
+            typer.echo(f"Transcript saved to: {saved_path}")
+    except Exception as e:
+        typer.echo(f"Error saving transcript: {e}")
+        raise typer.Exit(code=1)
+
+
+def _stream_transcript(
+    audio_file,
+    model: str,
+    output: Optional[str],
+    audio_name: str,
+    stream_format: str,
+    time_map=None,
+    backend: str = DEFAULT_BACKEND,
+    segments: Optional[list] = None,
+    low_memory: bool = False,
+    decoder: str = Decoder.ffmpeg.value,
+) -> str:
+    """Print segments as they are transcribed, appending them to the output file if given. Returns the full transcript.
+
+    With a time_map (from silence trimming), timestamps are mapped back to the original audio.
+    Every segment is also appended to segments, if given.
+    """
+    from macscribe.transcriber import iter_segments
+
+    out_file = None
+    if output:
+        extension = ".jsonl" if stream_format == "jsonl" else ".txt"
+        out_path = resolve_output_path(output, audio_name, extension)
+        out_file = open(out_path, "w", encoding="utf-8")
+
+    texts = []
+    try:
+        for segment in iter_segments(audio_file, model, backend=backend, low_memory=low_memory, decoder=decoder):
+            if time_map is not None:
+                segment = dict(segment, start=time_map.to_original(segment["start"]), end=time_map.to_original(segment["end"]))
+            texts.append(segment["text"])
+            if segments is not None:
+                segments.append(segment)
+            typer.echo(format_segment_line(segment, stream_format))
+            if out_file:
+                out_file.write(format_segment_line(segment, "jsonl") + "\n" if stream_format == "jsonl" else segment["text"])
+                out_file.flush()
+    finally:
+        if out_file:
+            out_file.close()
+
+    transcript = "".join(texts)
+    if not transcript:
+        raise ValueError("No transcription result.")
+    if out_file:
+        typer.echo(f"Transcript saved to: {out_path.resolve()}")
+    return transcript
+
+
+@contextmanager
+def _instrumented(profile: bool, metrics_json: Optional[str], profile_dump: Optional[str]):
+    """Collect stage metrics for the enclosed run and report them however the user asked."""
+    if not (profile or metrics_json or profile_dump):
+        yield
+        return
+
+    profiler = None
+    if profile_dump:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        with collecting() as metrics:
+            yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(profile_dump)
+            typer.echo(f"cProfile stats saved to: {profile_dump}")
+        if profile:
+            typer.echo(metrics.summary())
+        if metrics_json:
+            metrics.save(metrics_json)
+            typer.echo(f"Metrics saved to: {metrics_json}")
+
+
+def _expand_local_patterns(inputs: List[str]):
+    """
+    Replace directories and glob patterns by the media files they contain.
+
+    Returns:
+        (inputs, output_dirs) where output_dirs maps every file found to its
+        directory relative to the directory or pattern it was found under
+    """
+    resolved: List[str] = []
+    output_dirs: Dict[str, str] = {}
+    for input_source in inputs:
+        if not is_local_pattern(input_source):
+            resolved.append(input_source)
+            continue
+        files = find_media_files(input_source)
+        if not files:
+            typer.echo(f"No supported audio or video files found in {input_source}.")
+        for path, relative_dir in files:
+            if path not in output_dirs:
+                output_dirs[path] = relative_dir
+                resolved.append(path)
+    return resolved, output_dirs
+
+
+def _expand_collections(inputs: List[str]):
+    """
+    Replace playlist, channel and feed URLs by their episode URLs.
+
+    Returns:
+        (inputs, expanded) where expanded maps every listed episode URL to its identity
+    """
+    resolved: List[str] = []
+    expanded: Dict[str, str] = {}
+    for input_source in inputs:
+        if not is_collection_url(input_source):
+            resolved.append(input_source)
+            continue
+        typer.echo(f"Listing {input_source}...")
+        try:
+            with stage("list"):
+                episodes = expand_collection(input_source)
+        except Exception as e:
+            typer.echo(f"Error listing {input_source}: {e}")
+            raise typer.Exit(code=1)
+        typer.echo(f"Found {len(episodes)} episode(s).")
+        for url in episodes:
+            if url not in expanded:
+                expanded[url] = source_id(url)
+                resolved.append(url)
+    return resolved, expanded
+
+
+def _transcribe_with_daemon(input_source: str, output: Optional[str], settings: RunSettings, key: Optional[str]) -> None:
+    """Hand one input to the running daemon, then copy and save the result locally."""
+    typer.echo("Transcribing with the running macscribe daemon...")
+    try:
+        response = request_transcription(
+            input_source, settings.model, settings.options, segments=settings.needs_segments, download=settings.download
+        )
+    except DaemonError as e:
+        if e.stage == "prepare":
+            typer.echo(f"Error preparing audio: {e}")
+        elif e.stage == "invalid":
+            typer.echo("Invalid input. Please provide a valid URL (YouTube, Apple Podcast, X) or path to a local audio/video file.")
+        else:
+            typer.echo(f"Error during transcription: {e}")
+        raise typer.Exit(code=1)
+    except OSError as e:
+        typer.echo(f"Error talking to the daemon: {e}")
+        raise typer.Exit(code=1)
+
+    transcript = response["text"]
+    copy_to_clipboard(transcript)
+    settings.store(key, transcript, response["name"], response.get("segments"))
+    typer.echo("Transcription copied to clipboard.")
+    if output:
+        _save_or_exit(transcript, output, response["name"], settings, response.get("segments"))
+
+
+def _transcribe_single(
+    input_source: str,
+    output: Optional[str],
+    settings: RunSettings,
+    stream: bool = False,
+    stream_format: str = "text",
+) -> None:
+    """Transcribe one input, copy it to the clipboard and optionally save it. Exits on any error."""
+    from macscribe.transcriber import map_segments, transcribe_audio, transcribe_result
+
+    with stage("validate"):
+        valid = validate_input(input_source)
+    if not valid:
         typer.echo("Invalid input. Please provide a valid URL (YouTube, Apple Podcast, X) or path to a local audio/video file.")
         raise typer.Exit(code=1)
 
+    checkpointed = settings.checkpointed and not stream
+    job_dir = settings.job_directory(input_source) if checkpointed else None
+    job = Job.load(job_dir) if job_dir and settings.resume else None
+    if job is not None:
+        # Finish the job with the chunking it was started with
+        settings = replace(settings, options=job.options)
+        typer.echo(f"Resuming: {len(job.completed)} chunk(s) already transcribed.")
+    elif settings.resume and checkpointed:
+        typer.echo("No interrupted job to resume; starting a new one.")
+
+    with stage("cache_lookup"):
+        key = settings.cache_key(input_source)
+        entry = settings.cached(key)
+    if entry:
+        if job is not None:
+            job.remove()
+        typer.echo("Using cached transcript.")
+        if stream:
+            typer.echo(entry["text"])
+        copy_to_clipboard(entry["text"])
+        typer.echo("Transcription copied to clipboard.")
+        if output:
+            _save_or_exit(entry["text"], output, entry["name"], settings, entry.get("segments"))
+        return
+
+    # The daemon downloads into its own temp dir, so URLs that fill the media cache or keep their audio stay here
+    needs_local_audio = not os.path.isfile(input_source) and (settings.keep_audio or settings.media_cache is not None)
+    if (
+        settings.use_daemon and not stream and not settings.trim_silence and not checkpointed
+        and not needs_local_audio and is_running()
+    ):
+        _transcribe_with_daemon(input_source, output, settings, key)
+        return
+
+    if job is None and job_dir is not None:
+        if not settings.resume and (job_dir / "job.json").exists():
+            typer.echo("Discarding an earlier interrupted run of this input (use --resume to continue it).")
+        job = Job.create(job_dir, input_source, settings.model, settings.options)
+
     with tempfile.TemporaryDirectory() as tmpdir:
         try:
-            if os.path.isfile(input_source):
-                typer.echo("Preparing local file for transcription...")
+            audio_file = job.audio_file if job is not None else None
+            if audio_file:
+                typer.echo("Using audio saved by the interrupted run...")
             else:
-                typer.echo("Downloading audio...")
-            audio_file = prepare_audio(input_source, tmpdir)
+                if os.path.isfile(input_source):
+                    typer.echo("Preparing local file for transcription...")
+                elif settings.has_media(input_source):
+                    typer.echo("Using cached audio...")
+                else:
+                    typer.echo("Downloading audio...")
+                # Without the media cache, checkpointed runs download into the job directory so a resume needn't fetch again
+                audio_file, report = _fetch_audio(
+                    input_source, job.media_dir if job is not None else tmpdir, settings.media_cache, settings.download
+                )
+                if report is not None:
+                    typer.echo(_download_summary(report))
+                if job is not None:
+                    job.audio_file = audio_file
+            audio, time_map = audio_file, None
+            if settings.trim_silence:
+                audio, time_map = _decode_for_transcription(
+                    audio_file, trim_silence=True, decoder=settings.options.get("decoder")
+                )
+                typer.echo(_skip_report(time_map))
+                if len(audio) == 0:
+                    raise ValueError("No speech detected.")
         except Exception as e:
             typer.echo(f"Error preparing audio: {e}")
             raise typer.Exit(code=1)
 
+        segments = None
         try:
             typer.echo("Transcribing audio...")
-            transcript = transcribe_audio(audio_file, model)
+            if stream:
+                segments = []
+                transcript = _stream_transcript(
+                    audio, settings.model, output, audio_file, stream_format, time_map,
+                    backend=settings.backend, segments=segments, low_memory=settings.options.get("low_memory", False),
+                    decoder=settings.options.get("decoder", Decoder.ffmpeg.value),
+                )
+                copy_to_clipboard(transcript)
+            else:
+                options = dict(settings.options, checkpoint=job) if job is not None else settings.options
+                if settings.needs_segments:
+                    result = transcribe_result(audio, settings.model, **options)
+                    transcript, segments = result["text"], map_segments(result["segments"], time_map)
+                    copy_to_clipboard(transcript)
+                else:
+                    transcript = transcribe_audio(audio, settings.model, **options)
         except Exception as e:
             typer.echo(f"Error during transcription: {e}")
+            if job is not None:
+                typer.echo("Progress saved. Run the same command with --resume to continue.")
             raise typer.Exit(code=1)
 
+        settings.store(key, transcript, audio_file, segments if settings.needs_segments else None)
+        if settings.keep_audio:
+            _keep_audio(input_source, audio_file, output)
+        if job is not None:
+            job.remove()
         typer.echo("Transcription copied to clipboard.")
 
-        # Save transcript to file if output path is specified
-        if output:
-            try:
-                saved_path = save_transcript_to_file(transcript, output, audio_file)
+        # Save transcript to file if output path is specified (streaming already wrote it, unless other formats were asked for)
+        if output and (not stream or settings.needs_segments):
+            _save_or_exit(transcript, output, audio_file, settings, segments)
+
+
+def _transcribe_batch(
+    input_sources: List[str],
+    output_dir: str,
+    settings: RunSettings,
+    download_workers: int = 2,
+    queue_depth: int = 2,
+    max_temp_bytes: Optional[int] = None,
+    predecode: bool = False,
+    expanded: Optional[Dict[str, str]] = None,
+    manifest: Optional[SyncManifest] = None,
+    output_dirs: Optional[Dict[str, str]] = None,
+    workers: int = 1,
+    batch_size: int = 1,
+) -> None:
+    """Transcribe several inputs and save one transcript per input to output_dir.
+
+    mlx_whisper keeps the most recently loaded model in memory, so running every
+    input through the same process pays the model load only once. Downloads run
+    on a pool of workers while the current file is being transcribed; with
+    predecode (implied by silence trimming) the workers also decode to PCM so
+    the transcriber gets arrays in memory. Inputs with a cached transcript skip
+    both stages.
+
+    expanded maps episode URLs listed from a playlist or feed to their
+    identity. They are accepted without validate_input (feed enclosures live
+    on any host) and recorded in manifest once their transcript is saved.
+
+    output_dirs maps inputs found by walking a directory to their directory
+    relative to output_dir, so the transcripts mirror the input tree. With
+    workers > 1, local files are instead transcribed by a pool of worker
+    processes, each holding its own model, largest files first so a long file
+    doesn't start last and hold up the end of the run.
+
+    With batch_size > 1, inputs of up to 30 seconds are decoded by the
+    download workers and collected into batches that are transcribed in one
+    forward pass each (see batching.transcribe_clips); longer inputs are
+    transcribed one at a time as usual.
+    """
+    from macscribe.batching import fits_batch, transcribe_clips
+    from macscribe.transcriber import map_segments, transcribe_audio, transcribe_result
+
+    expanded = expanded or {}
+    output_dirs = output_dirs or {}
+
+    def target_dir(input_source: str) -> str:
+        return os.path.join(output_dir, output_dirs.get(input_source, ""), "")
+
+    def synced(input_source: str) -> None:
+        if manifest is not None and input_source in expanded:
+            manifest.add([expanded[input_source]])
+
+    def finish(
+        input_source: str,
+        audio_file: str,
+        transcript: str,
+        segments: Optional[list] = None,
+        audio_kept: bool = False,
+        batched: bool = False,
+    ) -> None:
+        key = keys[input_source]
+        if batched and key is not None:
+            key = settings.cache_key(input_source, batched=True)
+        settings.store(key, transcript, audio_file, segments)
+        if settings.keep_audio and not audio_kept:
+            _keep_audio(input_source, audio_file, target_dir(input_source))
+        try:
+            for saved_path in settings.save(transcript, segments, target_dir(input_source), audio_file):
                 typer.echo(f"Transcript saved to: {saved_path}")
-            except Exception as e:
-                typer.echo(f"Error saving transcript: {e}")
-                raise typer.Exit(code=1)
\ No newline at end of file
+            synced(input_source)
+        except Exception as e:
+            typer.echo(f"Error saving transcript: {e}")
+            failed.append(input_source)
+
+    failed = []
+    done = 0
+    total = len(input_sources)
+    keys = {}
+    pending = []
+    # Download reports, filled by the download workers
+    reports: Dict[str, DownloadReport] = {}
+    downloaded = saved = 0
+    for input_source in input_sources:
+        with stage("cache_lookup"):
+            valid = input_source in expanded or validate_input(input_source)
+            key = settings.cache_key(input_source) if valid else None
+            entry = settings.cached(key)
+            if not entry and batch_size > 1 and key is not None:
+                # A clip transcribed by an earlier batched run
+                entry = settings.cached(settings.cache_key(input_source, batched=True))
+        if not entry:
+            keys[input_source] = key
+            pending.append(input_source)
+            continue
+
+        done += 1
+        typer.echo(f"[{done}/{total}] {input_source}")
+        try:
+            for saved_path in settings.save(entry["text"], entry.get("segments"), target_dir(input_source), entry["name"]):
+                typer.echo(f"Transcript saved to: {saved_path} (cached)")
+            synced(input_source)
+        except Exception as e:
+            typer.echo(f"Error saving transcript: {e}")
+            failed.append(input_source)
+
+    local_files = []
+    if workers > 1:
+        local_files = [s for s in pending if os.path.isfile(s) and validate_input(s)]
+        local = set(local_files)
+        pending = [s for s in pending if s not in local]
+    if local_files:
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        from macscribe.workers import init_worker, transcribe_file
+
+        # File size stands in for duration: probing thousands of files would cost more than it saves
+        local_files.sort(key=os.path.getsize, reverse=True)
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=init_worker, initargs=(settings.model, settings.backend)
+        ) as pool:
+            futures = {
+                pool.submit(
+                    transcribe_file, input_source, settings.model, settings.options,
+                    settings.trim_silence, settings.needs_segments,
+                ): input_source
+                for input_source in local_files
+            }
+            for future in as_completed(futures):
+                input_source = futures[future]
+                done += 1
+                typer.echo(f"[{done}/{total}] {input_source}")
+                try:
+                    result = future.result()
+                except Exception as e:
+                    typer.echo(f"Error during transcription: {e}")
+                    failed.append(input_source)
+                    continue
+                if settings.needs_segments:
+                    finish(input_source, input_source, result["text"], result["segments"])
+                else:
+                    finish(input_source, input_source, result)
+
+    def decode(audio_file: str):
+        return _decode_for_transcription(audio_file, settings.trim_silence, settings.options.get("decoder"))
+
+    # Short inputs waiting for a full batch, as (item, audio, time map)
+    clips = []
+
+    def transcribe_waiting_clips() -> None:
+        try:
+            results = transcribe_clips(
+                [audio for _, audio, _ in clips], settings.model, backend=settings.backend, batch_size=batch_size
+            )
+        except Exception as e:
+            typer.echo(f"Error during transcription: {e}")
+            failed.extend(item.input_source for item, _, _ in clips)
+            results = []
+        for (item, _, time_map), result in zip(clips, results):
+            if not result["text"]:
+                typer.echo(f"Error during transcription of {item.input_source}: No transcription result.")
+                failed.append(item.input_source)
+                continue
+            segments = map_segments(result["segments"], time_map) if settings.needs_segments else None
+            finish(item.input_source, item.audio_file, result["text"], segments, audio_kept=True, batched=True)
+        clips.clear()
+
+    pipeline = DownloadPipeline(
+        pending,
+        functools.partial(
+            _prepare_valid_audio,
+            media_cache=settings.media_cache,
+            trusted=expanded,
+            download=settings.download,
+            reports=reports,
+        ),
+        workers=download_workers,
+        queue_depth=queue_depth,
+        max_temp_bytes=max_temp_bytes,
+        decode=decode if predecode or settings.trim_silence or batch_size > 1 else None,
+    )
+    for item in pipeline:
+        done += 1
+        typer.echo(f"[{done}/{total}] {item.input_source}")
+        report = reports.pop(item.input_source, None)
+        if report is not None:
+            typer.echo(_download_summary(report))
+            downloaded += report.bytes or 0
+            saved += max(report.saved_bytes or 0, 0)
+        if item.error is not None:
+            if isinstance(item.error, InvalidInputError):
+                typer.echo("Invalid input, skipping.")
+            else:
+                typer.echo(f"Error preparing audio: {item.error}")
+            failed.append(item.input_source)
+            continue
+
+        audio, time_map = item.audio_file, None
+        if item.audio is not None:
+            audio, time_map = item.audio
+            if time_map is not None:
+                typer.echo(_skip_report(time_map))
+                if len(audio) == 0:
+                    typer.echo("No speech detected, skipping.")
+                    failed.append(item.input_source)
+                    continue
+
+        if batch_size > 1 and item.audio is not None and fits_batch(audio):
+            if settings.keep_audio:
+                # The download's temp directory is gone by the time its batch is transcribed
+                _keep_audio(item.input_source, item.audio_file, target_dir(item.input_source))
+            clips.append((item, audio, time_map))
+            if len(clips) == batch_size:
+                transcribe_waiting_clips()
+            continue
+
+        segments = None
+        try:
+            if settings.needs_segments:
+                result = transcribe_result(audio, settings.model, **settings.options)
+                transcript, segments = result["text"], map_segments(result["segments"], time_map)
+            else:
+                transcript = transcribe_audio(audio, settings.model, copy=False, **settings.options)
+        except Exception as e:
+            typer.echo(f"Error during transcription: {e}")
+            failed.append(item.input_source)
+            continue
+
+        finish(item.input_source, item.audio_file, transcript, segments)
+    if clips:
+        transcribe_waiting_clips()
+
+    succeeded = total - len(failed)
+    if downloaded:
+        typer.echo(f"Downloaded {downloaded / 2**20:.1f} MB in total, {saved / 2**20:.1f} MB less than the best-quality streams.")
+    typer.echo(f"Done: {succeeded} of {total} inputs transcribed.")
+    for input_source in sorted(failed, key=input_sources.index):
+        typer.echo(f"Failed: {input_source}")
+    if failed:
+        raise typer.Exit(code=1)
+
+
+@dataclass
+class PlanEntry:
+    """What a run will do with one input, decided before anything is downloaded."""
+
+    input_source: str
+    model: str
+    # transcribe, cached or skip
+    action: str = "transcribe"
+    reason: str = ""
+    info: Optional[MediaInfo] = None
+
+
+def _rejection(info: MediaInfo, max_duration: Optional[float], max_size: Optional[int]) -> str:
+    """Return why a probed input should be skipped, or an empty string to transcribe it."""
+    if info.is_live:
+        return "live stream"
+    if info.codec == "none":
+        return "no audio stream"
+    if max_duration and info.duration and info.duration > max_duration:
+        return f"{_clock(info.duration)} is longer than --max-duration {_clock(max_duration)}"
+    if max_size and info.size and info.size > max_size:
+        return f"{info.size / 2**20:.0f} MB is larger than --max-size {max_size / 2**20:.0f} MB"
+    return ""
+
+
+def _clock(seconds: float) -> str:
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+def _plan_inputs(
+    input_sources: List[str],
+    settings: RunSettings,
+    budget: Optional[float] = None,
+    offline: bool = False,
+    max_duration: Optional[float] = None,
+    max_size: Optional[int] = None,
+) -> List[PlanEntry]:
+    """
+    Decide per input whether to transcribe, use the cache or skip it, before any download or decode.
+
+    Inputs with a cached transcript are not probed at all. The others are
+    probed from metadata only and checked against the guards; with a latency
+    budget (--model auto) the probed duration also picks the model.
+    """
+    speeds = model_registry.SpeedLog() if budget is not None else None
+    plan = []
+    for input_source in input_sources:
+        entry = PlanEntry(input_source, settings.model)
+        plan.append(entry)
+        if budget is None and settings.cached(settings.cache_key(input_source)):
+            entry.action = "cached"
+            continue
+
+        entry.info = probe_input(input_source, policy=settings.download.get("policy", DEFAULT_POLICY))
+        if budget is not None:
+            try:
+                entry.model = model_registry.choose_model(
+                    entry.info.duration, budget, settings.backend, speeds, available_only=offline
+                )
+            except model_registry.ModelNotAvailableError as e:
+                typer.echo(f"Error: {e}")
+                raise typer.Exit(code=1)
+            model_settings = replace(settings, model=entry.model)
+            if model_settings.cached(model_settings.cache_key(input_source)):
+                entry.action = "cached"
+                continue
+
+        entry.reason = _rejection(entry.info, max_duration, max_size)
+        if entry.reason:
+            entry.action = "skip"
+    return plan
+
+
+def _print_plan(plan: List[PlanEntry]) -> None:
+    """Print what a run would do with each input (--plan)."""
+    counts = {action: sum(entry.action == action for entry in plan) for action in ("transcribe", "cached", "skip")}
+    todo = [entry.info for entry in plan if entry.action == "transcribe" and entry.info is not None]
+    download = sum(info.size or 0 for info in todo)
+    audio = sum(info.duration or 0 for info in todo)
+    typer.echo(
+        f"Plan: {counts['transcribe']} to transcribe, {counts['cached']} cached, {counts['skip']} skipped "
+        f"({audio / 3600:.1f} h of audio, {download / 2**20:.0f} MB to fetch or read)"
+    )
+    for entry in plan:
+        info = entry.info or MediaInfo()
+        duration = _clock(info.duration) if info.duration else "-"
+        size = f"{info.size / 2**20:.1f} MB" if info.size else "-"
+        line = f"{entry.action:<11}{duration:>9}{size:>11}  {info.codec or '-':<7}{entry.model}  {entry.input_source}"
+        if entry.reason:
+            line += f"  ({entry.reason})"
+        elif info.error:
+            line += f"  (probe failed: {info.error})"
+        typer.echo(line)
+
+
+@app.command("transcribe", no_args_is_help=True)
+def main(
+    input_sources: Optional[List[str]] = typer.Argument(
+        None,
+        help="URL of a YouTube/Apple Podcast/X video, or path to local audio/video file. Playlists, feeds, directories and glob patterns are expanded. Pass several to transcribe them in one run.",
+        show_default=False,
+    ),
+    model: Optional[str] = typer.Option(
+        None,
+        show_default=False,
+        help="Hugging Face model to use for transcription. Defaults to the large model. Presets such as small or large-4bit are listed by `macscribe models list`. Use auto to pick the largest model that fits --latency-budget."
+    ),
+    max_duration: Optional[float] = typer.Option(
+        None,
+        "--max-duration",
+        min=1,
+        help="Skip inputs longer than this many seconds, checked from metadata before anything is downloaded."
+    ),
+    max_size: Optional[int] = typer.Option(
+        None,
+        "--max-size",
+        min=1,
+        help="Skip inputs whose audio is larger than this many MB, checked from metadata before anything is downloaded."
+    ),
+    plan: bool = typer.Option(
+        False,
+        "--plan",
+        help="Dry run: probe every input and print whether it would be transcribed, served from the cache or skipped, then exit."
+    ),
+    latency_budget: Optional[float] = typer.Option(
+        None,
+        "--latency-budget",
+        min=1,
+        help=f"Seconds a transcription may take; picks the model per input from its duration and the speeds measured on this machine. Implies --model auto (default budget with auto: {model_registry.DEFAULT_LATENCY_BUDGET:g} s)."
+    ),
+    output: Optional[str] = typer.Option(
+        None,
+        "--output",
+        "-o",
+        help="Path to save the transcript as a text file. Can be a directory or a file path. With several inputs this is a directory (default: current directory)."
+    ),
+    formats: Optional[List[OutputFormat]] = typer.Option(
+        None,
+        "--format",
+        "-f",
+        help="Output format: txt, srt, vtt, json (JSON lines, one segment per line) or tsv. Repeat to write several formats from one transcription."
+    ),
+    word_timestamps: bool = typer.Option(
+        False,
+        "--word-timestamps",
+        help="Keep per-word timings in the segments (included in json output)."
+    ),
+    from_file: Optional[str] = typer.Option(
+        None,
+        "--from-file",
+        help="Read inputs from a file, one per line. Use '-' to read from stdin."
+    ),
+    download_workers: int = typer.Option(
+        2,
+        "--download-workers",
+        min=1,
+        help="Number of inputs downloaded concurrently while transcribing (batch mode)."
+    ),
+    queue_depth: int = typer.Option(
+        2,
+        "--queue-depth",
+        min=1,
+        help="Maximum number of downloaded files waiting to be transcribed (batch mode)."
+    ),
+    workers: int = typer.Option(
+        1,
+        "--workers",
+        min=1,
+        help="Transcribe local files in this many worker processes, each loading its own copy of the model (batch mode)."
+    ),
+    batch_size: int = typer.Option(
+        1,
+        "--batch-size",
+        min=1,
+        help="Transcribe inputs of up to 30 s this many at a time in one forward pass, e.g. 16 for folders of voice notes (batch mode)."
+    ),
+    download_quality: DownloadQuality = typer.Option(
+        DownloadQuality.asr,
+        "--download-quality",
+        help="asr: the smallest audio-only stream that is good enough for speech recognition (opus/m4a, at least 48 kbps); best: the highest-bitrate audio."
+    ),
+    fragments: int = typer.Option(
+        1,
+        "--fragments",
+        min=1,
+        help="Download this many fragments of HLS/DASH streams concurrently."
+    ),
+    rate_limit: Optional[str] = typer.Option(
+        None,
+        "--rate-limit",
+        help="Maximum download rate per download in bytes per second, e.g. 500K or 2M."
+    ),
+    max_temp_size: Optional[int] = typer.Option(
+        None,
+        "--max-temp-size",
+        min=1,
+        help="Pause new downloads while downloaded files waiting for transcription use this many MB of disk (batch mode)."
+    ),
+    no_cache: bool = typer.Option(
+        False,
+        "--no-cache",
+        help="Neither read nor write the transcript and download caches."
+    ),
+    keep_audio: bool = typer.Option(
+        False,
+        "--keep-audio",
+        help="Also save downloaded audio next to the transcript."
+    ),
+    refresh: bool = typer.Option(
+        False,
+        "--refresh",
+        help="Ignore cached transcripts and transcribe again, updating the cache."
+    ),
+    predecode: bool = typer.Option(
+        False,
+        "--predecode",
+        help="Decode audio to 16 kHz PCM in the download workers (batch mode). Uses about 230 MB of RAM per queued hour of audio."
+    ),
+    stream: bool = typer.Option(
+        False,
+        "--stream",
+        help="Print segments as each 30 s window is transcribed instead of waiting for the whole file."
+    ),
+    stream_format: StreamFormat = typer.Option(
+        StreamFormat.text,
+        "--stream-format",
+        help="Format of streamed segments: timestamped text lines or JSON lines."
+    ),
+    chunk_length: Optional[float] = typer.Option(
+        None,
+        "--chunk-length",
+        min=30,
+        help="Long-audio mode: split the audio at pauses into chunks of about this many seconds and transcribe them separately."
+    ),
+    chunk_overlap: float = typer.Option(
+        1.0,
+        "--chunk-overlap",
+        min=0,
+        help="Seconds of extra audio decoded on each side of a chunk (long-audio mode)."
+    ),
+    chunk_workers: int = typer.Option(
+        1,
+        "--chunk-workers",
+        min=1,
+        help="Number of chunks transcribed concurrently (long-audio mode). The mlx backend runs one at a time regardless."
+    ),
+    low_memory: bool = typer.Option(
+        False,
+        "--low-memory",
+        help="Decode to a temporary file on disk and transcribe it a chunk at a time, so memory use stays flat for multi-hour inputs."
+    ),
+    decoder: Decoder = typer.Option(
+        Decoder.ffmpeg,
+        "--decoder",
+        help="How audio is decoded: ffmpeg (subprocess per file) or native (in-process with PyAV or soundfile when installed, "
+        "falling back to ffmpeg). native is faster for many short clips."
+    ),
+    trim_silence: bool = typer.Option(
+        False,
+        "--trim-silence",
+        help="Drop silence and non-speech stretches longer than a second before transcribing. Timestamps still refer to the original audio."
+    ),
+    backend: BackendName = typer.Option(
+        DEFAULT_BACKEND,
+        "--backend",
+        help="Transcription backend: mlx (Apple Silicon) or faster-whisper (any CPU, needs the cpu extra)."
+    ),
+    no_daemon: bool = typer.Option(
+        False,
+        "--no-daemon",
+        help="Transcribe in this process even if a `macscribe serve` daemon is running."
+    ),
+    offline: bool = typer.Option(
+        False,
+        "--offline",
+        envvar="MACSCRIBE_OFFLINE",
+        help="Never download models; fail straight away if the model isn't in the local cache."
+    ),
+    resume: bool = typer.Option(
+        False,
+        "--resume",
+        help="Continue an interrupted long-audio run from its last finished chunk, reusing its downloaded audio and settings."
+    ),
+    profile: bool = typer.Option(
+        False,
+        "--profile",
+        help="Print wall time, CPU time, bytes, audio length, real-time factor and peak memory per stage. Implies --no-daemon."
+    ),
+    metrics_json: Optional[str] = typer.Option(
+        None,
+        "--metrics-json",
+        help="Write the per-stage metrics to this JSON file. Implies --no-daemon."
+    ),
+    profile_dump: Optional[str] = typer.Option(
+        None,
+        "--profile-dump",
+        help="Write cProfile stats for the run to this file (open with pstats or snakeviz). Implies --no-daemon."
+    ),
+):
+    """Transcribe URLs or local files (the default command). See `macscribe serve`, `macscribe bench` and `macscribe models` for the background daemon, benchmarks and model management."""
+    if latency_budget is not None and model not in (None, "auto"):
+        typer.echo("Error: --latency-budget chooses the model itself; drop --model or use --model auto.")
+        raise typer.Exit(code=1)
+    # None means --model wasn't given, which --latency-budget needs to tell apart from an explicit large
+    model = model_registry.resolve_model(model or "large")
+    auto = model == "auto" or latency_budget is not None
+    if batch_size > 1 and word_timestamps:
+        typer.echo("Error: --batch-size transcribes without timestamps inside a clip; drop --word-timestamps.")
+        raise typer.Exit(code=1)
+    if offline:
+        if not auto:
+            try:
+                model_registry.ensure_available(model, backend.value)
+            except model_registry.ModelNotAvailableError as e:
+                typer.echo(f"Error: {e}")
+                raise typer.Exit(code=1)
+        model_registry.enable_offline()
+
+    inputs = list(input_sources or [])
+    if from_file:
+        try:
+            inputs.extend(read_input_list(from_file))
+        except OSError as e:
+            typer.echo(f"Error reading input list: {e}")
+            raise typer.Exit(code=1)
+
+    if not inputs:
+        typer.echo("No inputs given.")
+        raise typer.Exit(code=1)
+
+    inputs, output_dirs = _expand_local_patterns(inputs)
+    if not inputs:
+        raise typer.Exit(code=1)
+    inputs, expanded = _expand_collections(inputs)
+    manifest = None
+    if expanded:
+        manifest = SyncManifest(output or ".")
+        already = [] if refresh else [url for url in inputs if url in expanded and expanded[url] in manifest]
+        if already:
+            typer.echo(f"Skipping {len(already)} episode(s) already transcribed into {output or '.'}.")
+            inputs = [url for url in inputs if url not in already]
+        if not inputs:
+            typer.echo("Nothing new to transcribe.")
+            return
+    single = len(inputs) == 1 and not from_file and not expanded and not output_dirs
+    if resume and not single:
+        typer.echo("Error: --resume applies to a single input; run it once per input to resume.")
+        raise typer.Exit(code=1)
+    if stream and not single:
+        typer.echo("Error: --stream applies to a single input; drop it to transcribe several inputs.")
+        raise typer.Exit(code=1)
+
+    # Only non-default options are passed on, so the plain path stays transcribe_audio(audio, model)
+    options = {}
+    if resume and not chunk_length:
+        # Only long-audio runs are checkpointed, so resuming implies long-audio mode
+        chunk_length = 600.0
+    if chunk_length:
+        options.update(chunk_length=chunk_length, chunk_overlap=chunk_overlap, chunk_workers=chunk_workers)
+    if backend.value != DEFAULT_BACKEND:
+        options["backend"] = backend.value
+    if word_timestamps:
+        options["word_timestamps"] = True
+    if low_memory:
+        options["low_memory"] = True
+    if decoder != Decoder.ffmpeg:
+        options["decoder"] = decoder.value
+
+    # Like options, only non-default download settings are passed on
+    download = {}
+    if download_quality.value != DEFAULT_POLICY:
+        download["policy"] = download_quality.value
+    if fragments > 1:
+        download["concurrent_fragments"] = fragments
+    if rate_limit:
+        try:
+            download["rate_limit"] = parse_rate(rate_limit)
+        except ValueError as e:
+            raise typer.BadParameter(str(e), param_hint="--rate-limit")
+
+    settings = RunSettings(
+        model=model,
+        options=options,
+        cache=None if no_cache else TranscriptCache(),
+        refresh=refresh,
+        trim_silence=trim_silence,
+        # The daemon's stages happen in another process, so profiling always runs in-process
+        use_daemon=not (no_daemon or profile or metrics_json or profile_dump),
+        resume=resume,
+        media_cache=None if no_cache else MediaCache(),
+        keep_audio=keep_audio,
+        formats=tuple(dict.fromkeys(fmt.value for fmt in formats)) if formats else ("txt",),
+        download=download,
+    )
+
+    models = {}
+    if auto or plan or max_duration or max_size:
+        budget = (latency_budget or model_registry.DEFAULT_LATENCY_BUDGET) if auto else None
+        entries = _plan_inputs(
+            inputs, settings, budget, offline, max_duration, max_size * 2**20 if max_size else None
+        )
+        if plan:
+            _print_plan(entries)
+            return
+        for entry in entries:
+            if entry.action == "skip":
+                typer.echo(f"Skipping {entry.input_source}: {entry.reason}.")
+                continue
+            if auto and entry.info is not None:
+                duration = entry.info.duration
+                length = "unknown length" if duration is None else f"{duration:.0f} s of audio"
+                typer.echo(f"Auto-selected {entry.model} for {entry.input_source} ({length}, budget {budget:g} s)")
+            models[entry.input_source] = entry.model
+        inputs = [input_source for input_source in inputs if input_source in models]
+        if not inputs:
+            typer.echo("Nothing to transcribe.")
+            return
+
+    # With --model auto each input runs with its own model; inputs sharing one are batched together
+    groups: Dict[str, List[str]] = {}
+    for input_source in inputs:
+        groups.setdefault(models.get(input_source, model), []).append(input_source)
+    try:
+        registry = model_registry.ModelRegistry()
+        for group_model in groups:
+            registry.touch(model_registry.hub_repo(group_model, backend.value))
+    except OSError:
+        pass
+
+    with _instrumented(profile, metrics_json, profile_dump):
+        if single:
+            settings = replace(settings, model=models.get(inputs[0], model))
+            _transcribe_single(inputs[0], output, settings, stream=stream, stream_format=stream_format.value)
+            return
+
+        failed = False
+        for group_model, group in groups.items():
+            try:
+                _transcribe_batch(
+                    group,
+                    output or ".",
+                    replace(settings, model=group_model),
+                    download_workers=download_workers,
+                    queue_depth=queue_depth,
+                    max_temp_bytes=max_temp_size * 1024 * 1024 if max_temp_size else None,
+                    predecode=predecode,
+                    expanded=expanded,
+                    manifest=manifest,
+                    output_dirs=output_dirs,
+                    workers=workers,
+                    batch_size=batch_size,
+                )
+            except typer.Exit:
+                failed = True
+        if failed:
+            raise typer.Exit(code=1)
+
+
+@app.command("serve")
+def serve(
+    model: str = typer.Option(
+        "mlx-community/whisper-large-v3-mlx",
+        help="Model to keep loaded. Requests may still name another model."
+    ),
+    backend: BackendName = typer.Option(
+        DEFAULT_BACKEND,
+        "--backend",
+        help="Backend used to warm up the model."
+    ),
+    socket_path: Optional[Path] = typer.Option(
+        None,
+        "--socket",
+        help="Unix socket to listen on. Defaults to daemon.sock in the macscribe cache directory."
+    ),
+    warm: bool = typer.Option(
+        True,
+        "--warm/--no-warm",
+        help="Load the model before accepting jobs."
+    ),
+):
+    """Run a background daemon that keeps the model loaded. Other macscribe invocations forward to it."""
+    model = model_registry.resolve_model(model)
+    socket_path = socket_path or default_socket_path()
+    try:
+        server = TranscriptionServer(socket_path, model, backend=backend.value)
+    except (RuntimeError, OSError) as e:
+        typer.echo(f"Error starting daemon: {e}")
+        raise typer.Exit(code=1)
+
+    try:
+        if warm:
+            typer.echo(f"Loading {model}...")
+            server.warm_up()
+        typer.echo(f"Listening on {socket_path}")
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+@app.command("bench")
+def bench(
+    durations: Optional[List[float]] = typer.Option(
+        None,
+        "--duration",
+        help="Synthetic audio length in seconds. Repeat for several lengths (default: 30 and 300)."
+    ),
+    model: str = typer.Option(
+        "mlx-community/whisper-large-v3-mlx",
+        help="Model to benchmark."
+    ),
+    backend: str = typer.Option(
+        "stand-in",
+        "--backend",
+        help="Backend to benchmark: mlx, faster-whisper, or stand-in (no model, runs anywhere)."
+    ),
+    repeat: int = typer.Option(
+        1,
+        "--repeat",
+        min=1,
+        help="Runs per duration; each stage reports the median."
+    ),
+    json_path: Optional[str] = typer.Option(
+        None,
+        "--json",
+        help="Write the results to this JSON file."
+    ),
+    baseline: Optional[str] = typer.Option(
+        None,
+        "--baseline",
+        help="Compare against results from an earlier --json run and exit 1 on regressions."
+    ),
+    tolerance: float = typer.Option(
+        0.2,
+        "--tolerance",
+        min=0.0,
+        help="Relative slowdown per stage allowed before --baseline reports a regression."
+    ),
+    decode_clips: int = typer.Option(
+        0,
+        "--decode-clips",
+        min=0,
+        help="Also decode this many 5-second 44.1 kHz stereo clips with each decoder (ffmpeg, native) and report clips/sec."
+    ),
+    clips: int = typer.Option(
+        0,
+        "--clips",
+        min=0,
+        help="Also transcribe this many 5-second clips one at a time and in batches of --batch-size, and report clips/sec."
+    ),
+    batch_size: int = typer.Option(
+        8,
+        "--batch-size",
+        min=1,
+        help="Clips per batch for --clips."
+    ),
+):
+    """Time each stage of a transcription on synthetic audio and report real-time factor and peak memory."""
+    from macscribe import bench as benchmark
+
+    try:
+        report = benchmark.run_benchmark(
+            durations or [30.0, 300.0], model=model_registry.resolve_model(model), backend=backend, repeat=repeat
+        )
+    except ValueError as e:
+        typer.echo(f"Error: {e}")
+        raise typer.Exit(code=1)
+
+    typer.echo(benchmark.format_report(report))
+    if decode_clips:
+        report["decode"] = benchmark.run_decode_benchmark(decode_clips)
+        typer.echo(benchmark.format_decode_report(report["decode"]))
+    if clips:
+        report["clips"] = benchmark.run_clip_benchmark(
+            clips, model=model_registry.resolve_model(model), backend=backend, batch_size=batch_size
+        )
+        typer.echo(benchmark.format_clip_report(report["clips"]))
+    if json_path:
+        benchmark.save_report(report, json_path)
+        typer.echo(f"Results saved to {json_path}")
+
+    if baseline:
+        regressions = benchmark.compare_to_baseline(report, benchmark.load_report(baseline), tolerance=tolerance)
+        if regressions:
+            typer.echo("Regressions against baseline:")
+            for regression in regressions:
+                typer.echo(f"  {regression}")
+            raise typer.Exit(code=1)
+        typer.echo("No regressions against baseline.")
+
+
+@models_app.command("list")
+def models_list(
+    backend: BackendName = typer.Option(
+        DEFAULT_BACKEND,
+        "--backend",
+        help="Backend whose model files are checked."
+    ),
+):
+    """Show the presets and every pulled model, and which are downloaded."""
+    registry = model_registry.ModelRegistry()
+    entries = registry.entries()
+    typer.echo(f"{'preset':<13}{'size':>8}{'speed':>7}  {'downloaded':<11}model")
+    for name, preset in model_registry.PRESETS.items():
+        downloaded = "yes" if model_registry.is_available(preset.repo, backend.value) else "-"
+        speed = f"{'~' if preset.speedup != 1 else ''}{preset.speedup:g}x"
+        typer.echo(f"{name:<13}{preset.size:>8}{speed:>7}  {downloaded:<11}{preset.repo}")
+
+    if entries:
+        typer.echo("")
+        typer.echo(f"{'pulled model':<50}{'backend':<16}{'size':>9}  last used")
+        for repo, entry in sorted(entries.items()):
+            last_used = time.strftime("%Y-%m-%d", time.localtime(entry["last_used"]))
+            typer.echo(f"{repo:<50}{entry['backend']:<16}{entry['bytes'] / 2**20:>6.0f} MB  {last_used}")
+
+
+@models_app.command("pull")
+def models_pull(
+    names: List[str] = typer.Argument(..., help="Preset names or Hugging Face repos to download."),
+    backend: BackendName = typer.Option(
+        DEFAULT_BACKEND,
+        "--backend",
+        help="Backend to download the model files for."
+    ),
+):
+    """Download models ahead of time so transcription never waits on a download."""
+    failed = False
+    for name in names:
+        model = model_registry.resolve_model(name)
+        typer.echo(f"Pulling {model}...")
+        try:
+            entry = model_registry.pull(model, backend.value)
+        except Exception as e:
+            typer.echo(f"Error pulling {model}: {e}")
+            failed = True
+            continue
+        typer.echo(f"Pulled {model} ({entry['bytes'] / 2**20:.0f} MB).")
+    if failed:
+        raise typer.Exit(code=1)
+
+
+@models_app.command("prune")
+def models_prune(
+    keep: Optional[List[str]] = typer.Option(
+        None,
+        "--keep",
+        help="Model or preset to keep whatever its age. Repeat for several."
+    ),
+    unused_days: float = typer.Option(
+        30.0,
+        "--unused-days",
+        min=0,
+        help="Delete pulled models not used for this many days (0 deletes all but --keep)."
+    ),
+    dry_run: bool = typer.Option(
+        False,
+        "--dry-run",
+        help="Only list what would be deleted."
+    ),
+):
+    """Delete pulled models that haven't been used recently."""
+    registry = model_registry.ModelRegistry()
+    sizes = {repo: entry["bytes"] for repo, entry in registry.entries().items()}
+    removed = model_registry.prune(registry, keep=keep or (), unused_days=unused_days, dry_run=dry_run)
+    verb = "Would delete" if dry_run else "Deleted"
+    for repo in removed:
+        typer.echo(f"{verb} {repo} ({sizes[repo] / 2**20:.0f} MB)")
+    freed = sum(sizes[repo] for repo in removed) / 2**20
+    typer.echo(f"{verb} {len(removed)} model(s), {freed:.0f} MB.")
@@ -1,5 +1,8 @@
 import subprocess
 
+from macscribe.metrics import stage
+
 def copy_to_clipboard(text: str) -> None:
     """Copy the given text to the system clipboard using pbcopy."""
-    subprocess.run('pbcopy', input=text.encode(), check=True)
\ No newline at end of file
+    with stage("clipboard"):
+        subprocess.run('pbcopy', input=text.encode(), check=True)
\ No newline at end of file
@@ -0,0 +1,180 @@
+"""Long-running transcription daemon and the client used to talk to it.
+
+The daemon listens on a Unix socket and keeps the transcription model loaded
+between jobs. Each connection carries one JSON request line and gets one JSON
+response line back:
+
+    request:  {"input": "...", "model": "...", "options": {...}, "segments": false}
+    response: {"ok": true, "text": "...", "name": "..."}  (plus "segments": [...] if asked for)
+              {"ok": false, "stage": "invalid" | "prepare" | "transcribe", "error": "..."}
+
+A request of {"ping": true} returns {"ok": true, "pid": ..., "model": ...}.
+"""
+
+import json
+import os
+import socket
+import socketserver
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional
+
+from macscribe.cache import default_cache_dir
+
+
+def default_socket_path() -> Path:
+    """Return the default daemon socket path inside the macscribe cache directory."""
+    return default_cache_dir() / "daemon.sock"
+
+
+class DaemonError(RuntimeError):
+    """Raised when the daemon reports a failed job. stage says which step failed."""
+
+    def __init__(self, stage: str, message: str):
+        super().__init__(message)
+        self.stage = stage
+
+
+def _send(socket_path: Path, payload: dict, timeout: Optional[float]) -> dict:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(str(socket_path))
+        sock.sendall(json.dumps(payload).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as reader:
+            line = reader.readline()
+    if not line:
+        raise ConnectionError("Daemon closed the connection without answering.")
+    return json.loads(line)
+
+
+def is_running(socket_path: Optional[Path] = None) -> bool:
+    """Return True if a daemon answers on the socket."""
+    socket_path = Path(socket_path or default_socket_path())
+    if not socket_path.exists():
+        return False
+    try:
+        return bool(_send(socket_path, {"ping": True}, timeout=1.0).get("ok"))
+    except (OSError, ValueError):
+        return False
+
+
+def request_transcription(
+    input_source: str,
+    model: str,
+    options: Optional[dict] = None,
+    socket_path: Optional[Path] = None,
+    segments: bool = False,
+    download: Optional[dict] = None,
+) -> dict:
+    """
+    Ask a running daemon to prepare and transcribe one input.
+
+    Args:
+        input_source: URL or local file path (local paths are made absolute)
+        model: Model to transcribe with
+        options: Extra keyword arguments for transcribe_audio
+        socket_path: Daemon socket (defaults to default_socket_path())
+        segments: Also return the timed segments of the transcript
+        download: Extra keyword arguments for the download (see downloader.download_audio)
+
+    Returns:
+        Dict with 'text' and 'name' (base name for saving the transcript),
+        plus 'segments' when asked for
+
+    Raises:
+        DaemonError: If the daemon could not transcribe the input
+        OSError: If the daemon can't be reached
+    """
+    if os.path.exists(input_source):
+        input_source = os.path.abspath(input_source)
+    payload = {"input": input_source, "model": model, "options": options or {}}
+    if segments:
+        payload["segments"] = True
+    if download:
+        payload["download"] = download
+    response = _send(Path(socket_path or default_socket_path()), payload, timeout=None)
+    if not response.get("ok"):
+        raise DaemonError(response.get("stage", "transcribe"), response.get("error", "Unknown error"))
+    return response
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        try:
+            request = json.loads(self.rfile.readline())
+            if not isinstance(request, dict):
+                raise ValueError("expected a JSON object")
+            response = self.server.handle_request_payload(request)
+        except ValueError as e:
+            response = {"ok": False, "stage": "invalid", "error": f"Bad request: {e}"}
+        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+
+class TranscriptionServer(socketserver.ThreadingUnixStreamServer):
+    """
+    Unix-socket server that prepares inputs concurrently and transcribes them one at a time.
+
+    Args:
+        socket_path: Where to listen
+        model: Default model, used for requests that don't name one
+        backend: Transcription backend for the default model's warm-up
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: Path, model: str, backend: str = "mlx"):
+        self.socket_path = Path(socket_path)
+        self.model = model
+        self.backend = backend
+        self._transcribe_lock = threading.Lock()
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.socket_path.exists():
+            if is_running(self.socket_path):
+                raise RuntimeError(f"A daemon is already running on {self.socket_path}")
+            self.socket_path.unlink()
+        super().__init__(str(self.socket_path), _Handler)
+
+    def warm_up(self) -> None:
+        """Load the default model by transcribing a second of silence."""
+        import numpy as np
+        from macscribe.backends import get_backend
+
+        with self._transcribe_lock:
+            get_backend(self.backend).transcribe(np.zeros(16000, dtype=np.float32), self.model)
+
+    def handle_request_payload(self, request: dict) -> dict:
+        # Imported here so the client side of this module stays cheap to import
+        from macscribe.downloader import prepare_audio, validate_input
+        from macscribe.transcriber import transcribe_audio, transcribe_result
+
+        if request.get("ping"):
+            return {"ok": True, "pid": os.getpid(), "model": self.model}
+
+        input_source = request.get("input", "")
+        model = request.get("model") or self.model
+        options = request.get("options") or {}
+        if not validate_input(input_source):
+            return {"ok": False, "stage": "invalid", "error": "Invalid input."}
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            try:
+                audio_file = prepare_audio(input_source, tmpdir, **(request.get("download") or {}))
+            except Exception as e:
+                return {"ok": False, "stage": "prepare", "error": str(e)}
+            try:
+                with self._transcribe_lock:
+                    if request.get("segments"):
+                        result = transcribe_result(audio_file, model, **options)
+                    else:
+                        result = {"text": transcribe_audio(audio_file, model, copy=False, **options)}
+            except Exception as e:
+                return {"ok": False, "stage": "transcribe", "error": str(e)}
+        return dict(result, ok=True, name=Path(audio_file).stem)
+
+    def server_close(self) -> None:
+        super().server_close()
+        try:
+            self.socket_path.unlink()
+        except FileNotFoundError:
+            pass
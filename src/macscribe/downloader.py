@@ -1,18 +1,56 @@
+import glob
+import json
 import os
-from urllib.parse import urlparse
-import yt_dlp
+import re
+import threading
+import urllib.request
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from macscribe.cache import file_digest
+from macscribe.metrics import stage
+
+# Local file types validate_input accepts
+SUPPORTED_EXTENSIONS = {
+    '.mp3', '.wav', '.flac', '.m4a', '.ogg', '.wma',  # audio formats
+    '.mp4', '.mov', '.avi', '.mkv', '.webm', '.m4v', '.wmv'  # video formats
+}
+
+# yt-dlp format selectors for each download policy
+FORMAT_POLICIES = {
+    # Whisper hears 16 kHz mono, so the smallest audio-only stream of at least 48 kbps
+    # (opus, then AAC) loses nothing; sources with no audio-only stream fall back to
+    # the smallest file that has audio rather than the largest
+    'asr': (
+        'worstaudio[abr>=48][acodec^=opus]/worstaudio[abr>=48][ext=m4a]/worstaudio[abr>=48]'
+        '/bestaudio/worst[acodec!=none]'
+    ),
+    # The highest-bitrate audio, or the best full file if there is no audio-only stream
+    'best': 'bestaudio/best',
+}
+DEFAULT_POLICY = 'asr'
+
+_RATE_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+
+# Report of the last download prepare_audio made on each thread (see pop_download_report)
+_last_download = threading.local()
+
+# yt-dlp extractors for the sites validate_input accepts
+_KNOWN_EXTRACTORS = ('Youtube', 'ApplePodcasts', 'Twitter')
+
+# Apple Podcasts show pages (episode links carry an ?i= parameter)
+_APPLE_SHOW = re.compile(r"https?://podcasts\.apple\.com/(?:[^/?#]+/)?podcast/(?:[^/?#]+/)?id(\d+)")
+# Channels and playlists nest their video lists one or two levels deep
+_MAX_COLLECTION_DEPTH = 3
 
 def validate_input(input_source: str) -> bool:
     """Check if the input is a valid URL or local file path."""
     # Check if it's a local file
     if os.path.isfile(input_source):
         # Check if it has a supported file extension
-        supported_extensions = {
-            '.mp3', '.wav', '.flac', '.m4a', '.ogg', '.wma',  # audio formats
-            '.mp4', '.mov', '.avi', '.mkv', '.webm', '.m4v', '.wmv'  # video formats
-        }
         _, ext = os.path.splitext(input_source.lower())
-        return ext in supported_extensions
+        return ext in SUPPORTED_EXTENSIONS
     
     # Check if it's a valid URL
     try:
@@ -27,26 +65,338 @@ def validate_input(input_source: str) -> bool:
     except:
         return False
 
-def prepare_audio(input_source: str, temp_path: str) -> str:
-    """Prepare audio file from URL or local file path. Return path to audio file for transcription."""
-    # If it's a local file, just return the path (mlx-whisper handles various formats)
+def source_id(input_source: str) -> str:
+    """Return a stable identity for the input without downloading anything.
+
+    Local files are identified by a hash of their contents, URLs by the yt-dlp
+    extractor and video id parsed from the URL (falling back to the URL itself).
+    """
     if os.path.isfile(input_source):
-        return input_source
-    
-    # If it's a URL, download it
+        return f"file:{file_digest(input_source)}"
+
+    import yt_dlp
+
+    for key in _KNOWN_EXTRACTORS:
+        ie = yt_dlp.extractor.get_info_extractor(key)
+        if ie.suitable(input_source):
+            video_id = ie.get_temp_id(input_source)
+            if video_id:
+                return f"{key.lower()}:{video_id}"
+    return f"url:{input_source}"
+
+def is_local_pattern(input_source: str) -> bool:
+    """Check if the input is a local directory or a glob pattern such as 'talks/**/*.wav'."""
+    if os.path.isdir(input_source):
+        return True
+    return not os.path.exists(input_source) and glob.has_magic(input_source) and "://" not in input_source
+
+
+def find_media_files(input_source: str) -> List[Tuple[str, str]]:
+    """
+    List the supported media files in a directory tree or matching a glob pattern.
+
+    Args:
+        input_source: Directory (walked recursively) or glob pattern ('**' matches subdirectories)
+
+    Returns:
+        (path, relative_dir) pairs sorted by path, where relative_dir is the file's
+        directory relative to the directory (or the fixed leading part of the pattern)
+    """
+    if os.path.isdir(input_source):
+        root = input_source
+        paths = [
+            os.path.join(dirpath, name)
+            for dirpath, _, filenames in os.walk(input_source)
+            for name in filenames
+        ]
+    else:
+        parts = input_source.split(os.sep)
+        fixed = []
+        for part in parts:
+            if glob.has_magic(part):
+                break
+            fixed.append(part)
+        root = os.sep.join(fixed) or "."
+        paths = glob.glob(input_source, recursive=True)
+
+    files = []
+    for path in sorted(paths):
+        if os.path.isfile(path) and validate_input(path):
+            relative_dir = os.path.relpath(os.path.dirname(path), root)
+            files.append((path, "" if relative_dir == "." else relative_dir))
+    return files
+
+
+def is_collection_url(input_source: str) -> bool:
+    """Check if the input is a playlist, channel, podcast show or RSS feed rather than a single episode."""
+    if os.path.isfile(input_source):
+        return False
+    try:
+        parsed = urlparse(input_source)
+    except ValueError:
+        return False
+    if parsed.scheme not in ("http", "https"):
+        return False
+
+    domain = parsed.netloc.lower()
+    path = parsed.path.lower()
+    if 'youtube.com' in domain:
+        import yt_dlp
+
+        is_tab = yt_dlp.extractor.get_info_extractor('YoutubeTab').suitable(input_source)
+        return is_tab and 'v' not in parse_qs(parsed.query)
+    if 'podcasts.apple.com' in domain:
+        return bool(_APPLE_SHOW.match(input_source)) and 'i' not in parse_qs(parsed.query)
+    # Podcast feeds live on any host; go by the usual feed URL shapes
+    return (
+        path.endswith(('.rss', '.xml', '/rss', '/feed', '/feed/'))
+        or domain.startswith(('feeds.', 'feed.'))
+        or '/feed/' in path
+    )
+
+
+def _apple_podcast_feed(input_source: str) -> str:
+    """Look up the RSS feed of an Apple Podcasts show page."""
+    show_id = _APPLE_SHOW.match(input_source).group(1)
+    with urllib.request.urlopen(f"https://itunes.apple.com/lookup?id={show_id}&entity=podcast", timeout=30) as response:
+        results = json.load(response).get("results") or []
+    feed = next((result.get("feedUrl") for result in results if result.get("feedUrl")), None)
+    if not feed:
+        raise ValueError(f"No RSS feed found for Apple Podcasts show {show_id}")
+    return feed
+
+
+def expand_collection(input_source: str) -> List[str]:
+    """
+    List the episode URLs of a playlist, channel, podcast show or RSS feed.
+
+    Uses yt-dlp's flat extraction, which reads the listing only and fetches no
+    per-entry metadata or media. Apple Podcasts shows are resolved to their
+    RSS feed first. Entries keep the order of the listing, newest first for
+    channels and feeds.
+
+    Returns:
+        Episode URLs, without duplicates
+    """
+    import yt_dlp
+
+    if 'podcasts.apple.com' in urlparse(input_source).netloc.lower():
+        input_source = _apple_podcast_feed(input_source)
+
     ydl_opts = {
-        'format': 'bestaudio/best',
-        'outtmpl': os.path.join(temp_path, '%(id)s.%(ext)s'),
-        'postprocessors': [{
-            'key': 'FFmpegExtractAudio',
-            'preferredcodec': 'mp3',
-            'preferredquality': '192',
-        }],
+        'extract_flat': 'in_playlist',
+        'skip_download': True,
         'quiet': True,
         'no_warnings': True,
     }
+    urls: List[str] = []
     with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        def collect(info: dict, depth: int) -> None:
+            for entry in info.get('entries') or []:
+                if not entry:
+                    continue
+                url = entry.get('url') or entry.get('webpage_url')
+                nested = entry.get('_type') == 'playlist' or entry.get('ie_key') == 'YoutubeTab'
+                if nested:
+                    # Channel tabs (Videos, Shorts, Live) are themselves playlists
+                    if depth < _MAX_COLLECTION_DEPTH and (entry.get('entries') is not None or url):
+                        collect(entry if entry.get('entries') is not None else ydl.extract_info(url, download=False), depth + 1)
+                    continue
+                if not url:
+                    continue
+                if entry.get('ie_key') == 'Youtube' and not url.startswith('http'):
+                    url = f"https://www.youtube.com/watch?v={url}"
+                if url not in urls:
+                    urls.append(url)
+
+        collect(ydl.extract_info(input_source, download=False), 1)
+    return urls
+
+
+@dataclass
+class MediaInfo:
+    """What a pre-flight probe learned about an input without downloading or decoding it."""
+
+    duration: Optional[float] = None
+    # Bytes of the file, or of the audio a download would fetch (estimated by some sites)
+    size: Optional[int] = None
+    # Audio codec, 'none' if there is no audio stream, None if unknown
+    codec: Optional[str] = None
+    is_live: bool = False
+    # Why the probe failed, if it did
+    error: Optional[str] = None
+
+
+def probe_input(input_source: str, policy: str = DEFAULT_POLICY) -> MediaInfo:
+    """Probe an input from its metadata only: nothing is downloaded or decoded.
+
+    Local files are read with ffprobe. URLs go through yt-dlp's metadata
+    extraction with the format selection of the download policy, so size and
+    codec describe the audio a download would fetch.
+    """
+    with stage("probe"):
+        if os.path.isfile(input_source):
+            from macscribe.audio import probe_media
+
+            probe = probe_media(input_source)
+            size = os.path.getsize(input_source)
+            if probe is None:
+                return MediaInfo(size=size, error="unreadable file")
+            return MediaInfo(duration=probe["duration"], size=size, codec=probe["codec"])
+
+        import yt_dlp
+
+        ydl_opts = {
+            'format': FORMAT_POLICIES[policy],
+            'skip_download': True,
+            'quiet': True,
+            'no_warnings': True,
+            'noplaylist': True,
+        }
+        try:
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                info = ydl.extract_info(input_source, download=False) or {}
+        except yt_dlp.utils.DownloadError as e:
+            return MediaInfo(error=str(e))
+        size = info.get('filesize') or info.get('filesize_approx')
+        return MediaInfo(
+            duration=float(info['duration']) if info.get('duration') else None,
+            size=int(size) if size else None,
+            codec=info.get('acodec'),
+            is_live=bool(info.get('is_live')) or info.get('live_status') in ('is_live', 'is_upcoming'),
+        )
+
+
+@dataclass
+class DownloadReport:
+    """Bytes a download fetched, against what the 'best' policy would have fetched for the same input."""
+
+    format_id: Optional[str] = None
+    bytes: Optional[int] = None
+    baseline_bytes: Optional[int] = None
+
+    @property
+    def saved_bytes(self) -> Optional[int]:
+        if self.bytes is None or self.baseline_bytes is None:
+            return None
+        return self.baseline_bytes - self.bytes
+
+
+def parse_rate(rate: str) -> int:
+    """Parse a download rate such as '500K' or '2.5M' (bytes per second, binary units) into bytes per second."""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMG]?)i?B?\s*', rate, re.IGNORECASE)
+    if not match:
+        raise ValueError(f"Invalid rate '{rate}'. Use a number of bytes per second such as 500K or 2M.")
+    return int(float(match.group(1)) * _RATE_UNITS[match.group(2).upper()])
+
+
+def _format_bytes(fmt: dict, duration: Optional[float]) -> Optional[int]:
+    """Size of a yt-dlp format in bytes: as listed, or estimated from its bitrate."""
+    size = fmt.get('filesize') or fmt.get('filesize_approx')
+    bitrate = fmt.get('tbr') or fmt.get('abr')
+    if not size and bitrate and duration:
+        size = bitrate * 1000 / 8 * duration
+    return int(size) if size else None
+
+
+def _best_policy_format(formats: List[dict]) -> Optional[dict]:
+    """The format the 'best' policy ('bestaudio/best') picks; yt-dlp lists formats worst to best."""
+    audio_only = [f for f in formats if f.get('vcodec') == 'none' and f.get('acodec') not in (None, 'none')]
+    if audio_only:
+        return audio_only[-1]
+    combined = [f for f in formats if f.get('vcodec') != 'none' and f.get('acodec') != 'none']
+    return (combined or formats or [None])[-1]
+
+
+def download_audio(
+    input_source: str,
+    temp_path: str,
+    audio_codec: Optional[str] = None,
+    policy: str = DEFAULT_POLICY,
+    concurrent_fragments: int = 1,
+    rate_limit: Optional[int] = None,
+) -> Tuple[str, DownloadReport]:
+    """Download the audio of a URL into temp_path.
+
+    Args:
+        input_source: URL to download
+        temp_path: Directory to download into
+        audio_codec: Re-encode to this codec (e.g. 'mp3') instead of keeping the native stream
+        policy: Format policy, a key of FORMAT_POLICIES
+        concurrent_fragments: Fragments of HLS/DASH streams fetched at once
+        rate_limit: Maximum download rate in bytes per second
+
+    Returns:
+        The downloaded file and a report of its size against the 'best' policy
+    """
+    # yt-dlp is slow to import, so only URL runs pay for it
+    import yt_dlp
+
+    ydl_opts = {
+        'format': FORMAT_POLICIES[policy],
+        'outtmpl': os.path.join(temp_path, '%(id)s.%(ext)s'),
+        'quiet': True,
+        'no_warnings': True,
+        # Continue a .part file left by an interrupted download into the same directory
+        'continuedl': True,
+        # A watch URL with &list= means the video, not the whole playlist
+        'noplaylist': True,
+    }
+    if concurrent_fragments > 1:
+        ydl_opts['concurrent_fragment_downloads'] = concurrent_fragments
+    if rate_limit:
+        ydl_opts['ratelimit'] = rate_limit
+    if audio_codec:
+        ydl_opts['postprocessors'] = [{
+            'key': 'FFmpegExtractAudio',
+            'preferredcodec': audio_codec,
+            'preferredquality': '192',
+        }]
+    with stage("download") as timing, yt_dlp.YoutubeDL(ydl_opts) as ydl:
         info = ydl.extract_info(input_source, download=True)
-        base_filename = os.path.join(temp_path, f"{info['id']}")
-        audio_file = base_filename + '.mp3'
-        return audio_file
\ No newline at end of file
+        downloads = info.get('requested_downloads') or []
+        selected = downloads[0] if downloads else info
+        if audio_codec:
+            audio_file = os.path.join(temp_path, f"{info['id']}.{audio_codec}")
+        elif selected.get('filepath'):
+            audio_file = selected['filepath']
+        else:
+            audio_file = ydl.prepare_filename(info)
+        if os.path.isfile(audio_file):
+            timing.add(bytes=os.path.getsize(audio_file))
+
+    report = DownloadReport(format_id=selected.get('format_id') or info.get('format_id'))
+    if not audio_codec and os.path.isfile(audio_file):
+        report.bytes = os.path.getsize(audio_file)
+    else:
+        # Re-encoded: the download itself was the selected format
+        report.bytes = _format_bytes(selected, info.get('duration'))
+    baseline = _best_policy_format(info.get('formats') or [])
+    if policy == 'best' or baseline is None or baseline.get('format_id') == report.format_id:
+        report.baseline_bytes = report.bytes
+    else:
+        report.baseline_bytes = _format_bytes(baseline, info.get('duration'))
+    return audio_file, report
+
+
+def prepare_audio(input_source: str, temp_path: str, audio_codec: Optional[str] = None, **download_options) -> str:
+    """Prepare audio file from URL or local file path. Return path to audio file for transcription.
+
+    Downloads keep the native audio stream by default, since the transcriber
+    decodes to 16 kHz PCM anyway. Pass audio_codec (e.g. 'mp3') to re-encode.
+    download_options (policy, concurrent_fragments, rate_limit) are passed to
+    download_audio; pop_download_report() then returns how many bytes it fetched.
+    """
+    _last_download.report = None
+    # If it's a local file, just return the path (mlx-whisper handles various formats)
+    if os.path.isfile(input_source):
+        return input_source
+    audio_file, _last_download.report = download_audio(input_source, temp_path, audio_codec, **download_options)
+    return audio_file
+
+
+def pop_download_report() -> Optional[DownloadReport]:
+    """Return and forget the report of the last download prepare_audio made on this thread (None for local files)."""
+    report = getattr(_last_download, 'report', None)
+    _last_download.report = None
+    return report
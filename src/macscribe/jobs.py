@@ -0,0 +1,153 @@
+"""Checkpointed transcription jobs that survive crashes and interruptions.
+
+A job directory holds everything needed to pick a long transcription back up:
+
+    job.json         input, model, transcribe options, audio file and chunk boundaries
+    media/           the downloaded audio (local inputs are used in place)
+    segments.jsonl   one line per finished chunk, appended as each chunk completes
+
+The directory is removed once the transcript is complete, so anything left
+in the jobs directory is an interrupted run that `--resume` can continue.
+"""
+
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from macscribe.cache import cache_key, default_cache_dir
+
+
+def default_jobs_dir() -> Path:
+    """Return the directory that holds job directories."""
+    return default_cache_dir() / "jobs"
+
+
+def job_key(identity: str, model: str, backend: str) -> str:
+    """
+    Key identifying the job for an input.
+
+    Chunking options are not part of the key: they are stored in the job,
+    and a resumed run reuses them.
+    """
+    return cache_key(identity, model, backend=backend)
+
+
+class Job:
+    """
+    One checkpointed transcription.
+
+    Use Job.create() to start a job and Job.load() to reopen an interrupted
+    one. The job acts as the checkpoint for transcribe_chunked: it supplies
+    the chunk boundaries and finished chunks, and record() persists every
+    chunk as soon as it is transcribed.
+    """
+
+    def __init__(self, directory: Path, meta: dict, completed: Optional[Dict[int, list]] = None):
+        self.directory = Path(directory)
+        self.meta = meta
+        self.completed: Dict[int, list] = completed or {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, directory: Path, input_source: str, model: str, options: dict) -> "Job":
+        """Start a new job in directory, replacing any job already there."""
+        directory = Path(directory)
+        shutil.rmtree(directory, ignore_errors=True)
+        (directory / "media").mkdir(parents=True)
+        job = cls(directory, {
+            "input": input_source,
+            "model": model,
+            "options": options,
+            "audio_file": None,
+            "bounds": None,
+        })
+        job._save_meta()
+        return job
+
+    @classmethod
+    def load(cls, directory: Path) -> Optional["Job"]:
+        """Reopen the job in directory, or return None if there is no usable job."""
+        directory = Path(directory)
+        try:
+            with open(directory / "job.json", "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        completed = {}
+        try:
+            with open(directory / "segments.jsonl", "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A crash mid-write leaves a partial last line; that chunk is simply redone
+                        continue
+                    completed[entry["index"]] = entry["segments"]
+        except OSError:
+            pass
+        return cls(directory, meta, completed)
+
+    @property
+    def media_dir(self) -> str:
+        return str(self.directory / "media")
+
+    @property
+    def options(self) -> dict:
+        return self.meta["options"]
+
+    @property
+    def audio_file(self) -> Optional[str]:
+        """The prepared audio of the job, if it is still on disk."""
+        audio_file = self.meta.get("audio_file")
+        return audio_file if audio_file and os.path.isfile(audio_file) else None
+
+    @audio_file.setter
+    def audio_file(self, path: str) -> None:
+        self.meta["audio_file"] = path
+        self._save_meta()
+
+    def use_bounds(self, bounds: List[int]) -> List[int]:
+        """
+        Return the chunk boundaries to transcribe with.
+
+        The stored boundaries win if they cover the same audio, so finished
+        chunks line up with the ones still to do. Otherwise the audio changed,
+        the new boundaries are stored and finished chunks are discarded.
+        """
+        with self._lock:
+            stored = self.meta.get("bounds")
+            if stored and stored[-1] == bounds[-1]:
+                return stored
+            self.meta["bounds"] = bounds
+            self.completed = {}
+            self._save_meta()
+            try:
+                os.remove(self.directory / "segments.jsonl")
+            except FileNotFoundError:
+                pass
+            return bounds
+
+    def record(self, index: int, segments: list) -> None:
+        """Persist the segments of a finished chunk."""
+        line = json.dumps({"index": index, "segments": segments}) + "\n"
+        with self._lock:
+            self.completed[index] = segments
+            with open(self.directory / "segments.jsonl", "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def remove(self) -> None:
+        """Delete the job directory, including the downloaded media."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _save_meta(self) -> None:
+        path = self.directory / "job.json"
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f)
+        os.replace(tmp_path, path)
@@ -0,0 +1,189 @@
+"""Per-stage timing and resource metrics.
+
+Each stage of a run is wrapped in `with stage("decode") as s:`. Nothing is
+recorded unless a Metrics collector has been activated with collecting(), so
+with profiling off a stage costs one global lookup.
+
+For every stage the collector sums wall time, CPU time (this process plus
+finished child processes such as ffmpeg), bytes moved and seconds of audio
+handled, and keeps the peak resident memory seen when the stage ended.
+Stages running concurrently (batch downloads) overlap, so their CPU times
+are not additive.
+"""
+
+import json
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional
+
+
+def peak_rss_bytes() -> int:
+    """Peak resident set size of this process so far."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def cpu_seconds() -> float:
+    """CPU time used by this process and its finished child processes."""
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return time.process_time() + children.ru_utime + children.ru_stime
+
+
+@dataclass
+class StageMetrics:
+    """Totals for every run of one stage."""
+
+    name: str
+    count: int = 0
+    wall: float = 0.0
+    cpu: float = 0.0
+    bytes: int = 0
+    audio_seconds: float = 0.0
+    peak_rss_bytes: int = 0
+
+    @property
+    def rtf(self) -> Optional[float]:
+        """Real-time factor: wall time per second of audio, or None if the stage handled no audio."""
+        return self.wall / self.audio_seconds if self.audio_seconds else None
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "count": self.count,
+            "wall": self.wall,
+            "cpu": self.cpu,
+            "bytes": self.bytes,
+            "audio_seconds": self.audio_seconds,
+            "rtf": self.rtf,
+            "peak_rss_bytes": self.peak_rss_bytes,
+        }
+
+
+class Metrics:
+    """Collects stage metrics for one run. Safe to use from several threads."""
+
+    def __init__(self):
+        self.stages: Dict[str, StageMetrics] = {}
+        self._lock = threading.Lock()
+        self._wall_start = time.perf_counter()
+        self._cpu_start = cpu_seconds()
+        self.wall: Optional[float] = None
+        self.cpu: Optional[float] = None
+
+    def record(self, name: str, wall: float, cpu: float, bytes: int = 0, audio_seconds: float = 0.0) -> None:
+        """Add one run of a stage to its totals."""
+        peak = peak_rss_bytes()
+        with self._lock:
+            totals = self.stages.setdefault(name, StageMetrics(name))
+            totals.count += 1
+            totals.wall += wall
+            totals.cpu += cpu
+            totals.bytes += bytes
+            totals.audio_seconds += audio_seconds
+            totals.peak_rss_bytes = max(totals.peak_rss_bytes, peak)
+
+    def finish(self) -> None:
+        """Record the total wall and CPU time of the run."""
+        self.wall = time.perf_counter() - self._wall_start
+        self.cpu = cpu_seconds() - self._cpu_start
+
+    @property
+    def audio_seconds(self) -> float:
+        """Seconds of audio transcribed in this run."""
+        transcribe = self.stages.get("transcribe")
+        return transcribe.audio_seconds if transcribe else 0.0
+
+    def to_dict(self) -> dict:
+        audio_seconds = self.audio_seconds
+        return {
+            "wall": self.wall,
+            "cpu": self.cpu,
+            "audio_seconds": audio_seconds,
+            "rtf": self.wall / audio_seconds if self.wall is not None and audio_seconds else None,
+            "peak_rss_bytes": peak_rss_bytes(),
+            "stages": [totals.to_dict() for totals in self.stages.values()],
+        }
+
+    def save(self, path: str) -> None:
+        """Write the metrics as JSON."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def summary(self) -> str:
+        """Human-readable table of the stages, in the order they first ran."""
+        lines = [f"{'stage':<14}{'runs':>5}{'wall':>10}{'cpu':>10}{'MB':>9}{'audio':>10}{'RTF':>8}{'peak RSS':>11}"]
+        for totals in self.stages.values():
+            lines.append(
+                f"{totals.name:<14}{totals.count:>5}{totals.wall:>9.2f}s{totals.cpu:>9.2f}s"
+                f"{totals.bytes / 2**20:>9.1f}{totals.audio_seconds:>9.1f}s"
+                f"{totals.rtf if totals.rtf is not None else float('nan'):>8.3f}"
+                f"{totals.peak_rss_bytes / 2**20:>8.0f} MB"
+            )
+        data = self.to_dict()
+        if data["wall"] is not None:
+            total = f"Total: {data['wall']:.2f}s wall, {data['cpu']:.2f}s CPU"
+            if data["rtf"] is not None:
+                total += f", {data['audio_seconds']:.1f}s of audio (RTF {data['rtf']:.3f})"
+            lines.append(total + f", peak RSS {data['peak_rss_bytes'] / 2**20:.0f} MB")
+        return "\n".join(lines)
+
+
+_active: Optional[Metrics] = None
+
+
+def active() -> Optional[Metrics]:
+    """Return the collector of the current run, or None when metrics are off."""
+    return _active
+
+
+@contextmanager
+def collecting(metrics: Optional[Metrics] = None) -> Iterator[Metrics]:
+    """Record stages into metrics (a new collector by default) until the block exits."""
+    global _active
+    metrics = metrics or Metrics()
+    previous, _active = _active, metrics
+    try:
+        yield metrics
+    finally:
+        _active = previous
+        metrics.finish()
+
+
+class _Stage:
+    """One timed run of a stage. add() attaches quantities only known once the work is done."""
+
+    def __init__(self, metrics: Optional[Metrics], name: str, bytes: int, audio_seconds: float):
+        self.metrics = metrics
+        self.name = name
+        self.bytes = bytes
+        self.audio_seconds = audio_seconds
+
+    def add(self, bytes: int = 0, audio_seconds: float = 0.0) -> None:
+        self.bytes += bytes
+        self.audio_seconds += audio_seconds
+
+    def __enter__(self) -> "_Stage":
+        if self.metrics is not None:
+            self._wall = time.perf_counter()
+            self._cpu = cpu_seconds()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self.metrics is not None:
+            self.metrics.record(
+                self.name,
+                time.perf_counter() - self._wall,
+                cpu_seconds() - self._cpu,
+                bytes=self.bytes,
+                audio_seconds=self.audio_seconds,
+            )
+
+
+def stage(name: str, bytes: int = 0, audio_seconds: float = 0.0) -> _Stage:
+    """Time the enclosed block as one run of the named stage (a no-op unless collecting)."""
+    return _Stage(_active, name, bytes, audio_seconds)
@@ -0,0 +1,358 @@
+"""Model presets and the local registry of downloaded models.
+
+Presets give short names to the Whisper sizes, tiny to large, in float16
+and 4-bit quantized. `macscribe models pull` downloads a model ahead of time
+and records it in the registry (models.json in the cache directory), so a
+transcription never blocks on a surprise multi-GB download; `models prune`
+frees the disk again. Offline runs use is_available() to fail fast instead
+of trying to download.
+
+`--model auto` picks a preset per input with choose_model(): the most
+accurate one whose real-time factor, as measured on this machine (speeds.json,
+updated after every transcription) or estimated from the preset, fits the
+latency budget for the input's duration.
+
+Models live in the Hugging Face hub cache, the same place mlx_whisper and
+faster-whisper load them from. Availability is checked on the file system,
+so nothing here imports huggingface_hub until a download is asked for.
+"""
+
+import json
+import os
+import shutil
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from macscribe.backends import DEFAULT_BACKEND, faster_whisper_model_name
+from macscribe.cache import default_cache_dir
+
+
+@dataclass(frozen=True)
+class Preset:
+    """A named model with its approximate download size and speed relative to large."""
+
+    repo: str
+    size: str
+    speedup: float
+
+
+PRESETS: Dict[str, Preset] = {
+    "tiny": Preset("mlx-community/whisper-tiny-mlx", "75 MB", 10),
+    "tiny-4bit": Preset("mlx-community/whisper-tiny-mlx-4bit", "25 MB", 10),
+    "base": Preset("mlx-community/whisper-base-mlx", "145 MB", 7),
+    "base-4bit": Preset("mlx-community/whisper-base-mlx-4bit", "45 MB", 7),
+    "small": Preset("mlx-community/whisper-small-mlx", "480 MB", 4),
+    "small-4bit": Preset("mlx-community/whisper-small-mlx-4bit", "140 MB", 4),
+    "medium": Preset("mlx-community/whisper-medium-mlx", "1.5 GB", 2),
+    "medium-4bit": Preset("mlx-community/whisper-medium-mlx-4bit", "430 MB", 2),
+    "large": Preset("mlx-community/whisper-large-v3-mlx", "3.1 GB", 1),
+    "large-4bit": Preset("mlx-community/whisper-large-v3-mlx-4bit", "880 MB", 1),
+    "turbo": Preset("mlx-community/whisper-large-v3-turbo", "1.6 GB", 8),
+}
+
+# Presets `--model auto` chooses from, most accurate first
+AUTO_CANDIDATES = ("large", "turbo", "medium", "small", "base", "tiny")
+# Seconds of transcription `--model auto` aims for when no --latency-budget is given
+DEFAULT_LATENCY_BUDGET = 60.0
+# Real-time factor of large-v3 on an M1-class Mac, scaled by the preset speedups
+# until this machine has measured its own
+_ESTIMATED_LARGE_RTF = 0.15
+# Weight of the newest measurement in the running average of a model's real-time factor
+_RTF_SMOOTHING = 0.3
+
+# faster-whisper sizes published outside the Systran organisation
+_FASTER_WHISPER_REPOS = {
+    "large-v3-turbo": "mobiuslabsgmbh/faster-whisper-large-v3-turbo",
+    "turbo": "mobiuslabsgmbh/faster-whisper-large-v3-turbo",
+}
+
+
+class ModelNotAvailableError(RuntimeError):
+    """Raised in offline mode when a model has not been downloaded."""
+
+
+def resolve_model(name: str) -> str:
+    """Return the Hugging Face repo for a preset name; any other name is returned unchanged."""
+    preset = PRESETS.get(name)
+    return preset.repo if preset else name
+
+
+def hub_repo(model: str, backend: str = DEFAULT_BACKEND) -> Optional[str]:
+    """
+    Return the Hugging Face repo a backend loads model from.
+
+    Returns:
+        The repo id, or None if model is a local directory
+    """
+    if os.path.isdir(model):
+        return None
+    if backend != "faster-whisper":
+        return model
+    name = faster_whisper_model_name(model)
+    if "/" in name:
+        return name
+    return _FASTER_WHISPER_REPOS.get(name, f"Systran/faster-whisper-{name}")
+
+
+def hub_cache_dir() -> Path:
+    """Return the Hugging Face hub cache directory, honouring HF_HUB_CACHE and HF_HOME."""
+    override = os.environ.get("HF_HUB_CACHE")
+    if override:
+        return Path(override)
+    home = os.environ.get("HF_HOME") or os.path.join(os.path.expanduser("~"), ".cache", "huggingface")
+    return Path(home) / "hub"
+
+
+def _repo_cache_dir(repo: str) -> Path:
+    return hub_cache_dir() / ("models--" + repo.replace("/", "--"))
+
+
+def is_available(model: str, backend: str = DEFAULT_BACKEND) -> bool:
+    """Return True if model can be loaded without downloading anything."""
+    repo = hub_repo(model, backend)
+    if repo is None:
+        return True
+    snapshots = _repo_cache_dir(repo) / "snapshots"
+    try:
+        return any(snapshot.is_dir() for snapshot in snapshots.iterdir())
+    except OSError:
+        return False
+
+
+def ensure_available(model: str, backend: str = DEFAULT_BACKEND) -> None:
+    """
+    Fail fast if model would have to be downloaded.
+
+    Raises:
+        ModelNotAvailableError: If the model is not in the local cache
+    """
+    if not is_available(model, backend):
+        raise ModelNotAvailableError(
+            f"Model '{model}' is not downloaded. Run `macscribe models pull {model}` on a machine with network access."
+        )
+
+
+def enable_offline() -> None:
+    """Stop Hugging Face libraries, in this process and its children, from reaching the network."""
+    os.environ["HF_HUB_OFFLINE"] = "1"
+
+
+def _directory_bytes(path: Path) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            path_name = os.path.join(root, name)
+            # Snapshot files are symlinks into blobs/, which are counted themselves
+            if os.path.islink(path_name):
+                continue
+            try:
+                total += os.path.getsize(path_name)
+            except OSError:
+                continue
+    return total
+
+
+class ModelRegistry:
+    """
+    The models pulled with `macscribe models pull`, stored as one JSON file.
+
+    Entries are keyed by hub repo and record the backend, where the repo is
+    stored, its size on disk and when it was pulled and last used.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else default_cache_dir() / "models.json"
+
+    def entries(self) -> Dict[str, dict]:
+        """Return the registered models by hub repo."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f).get("models", {})
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, entries: Dict[str, dict]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"models": entries}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def record(self, repo: str, backend: str, path: str) -> dict:
+        """Register a downloaded repo and return its entry."""
+        entries = self.entries()
+        now = time.time()
+        entries[repo] = {
+            "backend": backend,
+            "path": path,
+            "bytes": _directory_bytes(Path(path)),
+            "pulled": now,
+            "last_used": now,
+        }
+        self._save(entries)
+        return entries[repo]
+
+    def touch(self, repo: Optional[str]) -> None:
+        """Mark a registered repo as used now (a no-op for unregistered ones)."""
+        entries = self.entries()
+        if repo in entries:
+            entries[repo]["last_used"] = time.time()
+            self._save(entries)
+
+    def remove(self, repo: str) -> None:
+        entries = self.entries()
+        if entries.pop(repo, None) is not None:
+            self._save(entries)
+
+
+def pull(model: str, backend: str = DEFAULT_BACKEND, registry: Optional[ModelRegistry] = None) -> dict:
+    """
+    Download model into the hub cache (if it isn't there yet) and register it.
+
+    Returns:
+        The registry entry (its key is hub_repo(model, backend))
+
+    Raises:
+        ValueError: If model is a local directory
+        RuntimeError: If huggingface_hub is not installed
+    """
+    repo = hub_repo(model, backend)
+    if repo is None:
+        raise ValueError(f"'{model}' is a local directory; there is nothing to pull.")
+    try:
+        from huggingface_hub import snapshot_download
+    except ImportError as e:
+        raise RuntimeError(
+            "Pulling models needs the 'huggingface_hub' package, which the mlx-whisper and faster-whisper backends install."
+        ) from e
+
+    snapshot = Path(snapshot_download(repo))
+    # Register the whole repo cache directory so prune removes blobs and snapshots alike
+    path = snapshot.parents[1] if snapshot.parent.name == "snapshots" else snapshot
+    return (registry or ModelRegistry()).record(repo, backend, str(path))
+
+
+def prune(
+    registry: Optional[ModelRegistry] = None,
+    keep: Iterable[str] = (),
+    unused_days: float = 30.0,
+    dry_run: bool = False,
+) -> List[str]:
+    """
+    Delete registered models that have not been used for unused_days.
+
+    Args:
+        registry: Registry to prune (defaults to the one in the cache directory)
+        keep: Model or preset names never to delete, for either backend
+        unused_days: Delete models last used longer ago than this; 0 deletes every model not kept
+        dry_run: Only report what would be deleted
+
+    Returns:
+        Hub repos of the deleted (or, with dry_run, deletable) models
+    """
+    registry = registry or ModelRegistry()
+    keep = {
+        hub_repo(resolve_model(name), backend) for name in keep for backend in (DEFAULT_BACKEND, "faster-whisper")
+    }
+    cutoff = time.time() - unused_days * 86400
+    removed = []
+    for repo, entry in registry.entries().items():
+        if repo in keep or entry.get("last_used", 0) > cutoff:
+            continue
+        removed.append(repo)
+        if not dry_run:
+            shutil.rmtree(entry["path"], ignore_errors=True)
+            registry.remove(repo)
+    return removed
+
+
+class SpeedLog:
+    """
+    Real-time factors measured on this machine, per backend and model, stored as one JSON file.
+
+    Every transcription adds its measurement to a running average, so the
+    figures follow the machine (and its thermal state) over time.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else default_cache_dir() / "speeds.json"
+
+    def _load(self) -> Dict[str, dict]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, model: str, backend: str = DEFAULT_BACKEND) -> Optional[float]:
+        """Return the measured real-time factor of model, or None if it has never run here."""
+        entry = self._load().get(f"{backend}:{model}")
+        return entry["rtf"] if entry else None
+
+    def record(self, model: str, backend: str, audio_seconds: float, wall: float) -> None:
+        """Add one transcription of audio_seconds that took wall seconds."""
+        if audio_seconds <= 0:
+            return
+        speeds = self._load()
+        key = f"{backend}:{model}"
+        rtf = wall / audio_seconds
+        entry = speeds.get(key)
+        if entry:
+            rtf = (1 - _RTF_SMOOTHING) * entry["rtf"] + _RTF_SMOOTHING * rtf
+        speeds[key] = {"rtf": rtf, "runs": (entry["runs"] if entry else 0) + 1}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(speeds, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def estimated_rtf(model: str, backend: str = DEFAULT_BACKEND, speeds: Optional[SpeedLog] = None) -> float:
+    """Real-time factor of model: measured on this machine if possible, otherwise estimated from its preset."""
+    measured = (speeds or SpeedLog()).get(model, backend)
+    if measured is not None:
+        return measured
+    speedup = next((preset.speedup for preset in PRESETS.values() if preset.repo == model), 1)
+    return _ESTIMATED_LARGE_RTF / speedup
+
+
+def choose_model(
+    duration: Optional[float],
+    budget: float = DEFAULT_LATENCY_BUDGET,
+    backend: str = DEFAULT_BACKEND,
+    speeds: Optional[SpeedLog] = None,
+    available_only: bool = False,
+) -> str:
+    """
+    Pick the most accurate preset expected to transcribe duration seconds of audio within budget seconds.
+
+    Args:
+        duration: Length of the audio in seconds, or None if unknown
+        budget: Seconds the transcription may take
+        backend: Backend the model will run on
+        speeds: Measured real-time factors (defaults to this machine's)
+        available_only: Only consider models already downloaded (offline mode)
+
+    Returns:
+        The model repo; the most accurate candidate if duration is unknown,
+        the fastest one if none fits the budget
+
+    Raises:
+        ModelNotAvailableError: If available_only is set and no candidate is downloaded
+    """
+    speeds = speeds or SpeedLog()
+    candidates = [PRESETS[name].repo for name in AUTO_CANDIDATES]
+    if available_only:
+        candidates = [repo for repo in candidates if is_available(repo, backend)]
+        if not candidates:
+            raise ModelNotAvailableError(
+                "No model is downloaded for --model auto. Run `macscribe models pull small` on a machine with network access."
+            )
+    if duration is None:
+        return candidates[0]
+    for repo in candidates:
+        if estimated_rtf(repo, backend, speeds) * duration <= budget:
+            return repo
+    return min(candidates, key=lambda repo: estimated_rtf(repo, backend, speeds))
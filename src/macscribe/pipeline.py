@@ -0,0 +1,174 @@
+"""Producer/consumer pipeline that overlaps audio downloads with transcription."""
+
+import os
+import queue
+import shutil
+import tempfile
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, List, Optional
+
+
+@dataclass
+class PreparedAudio:
+    """An input whose audio has been prepared by a download worker."""
+
+    index: int
+    input_source: str
+    audio_file: Optional[str] = None
+    audio: Any = None
+    error: Optional[Exception] = None
+    tmpdir: Optional[str] = None
+    size: int = 0
+
+
+_DONE = object()
+
+
+class DownloadPipeline:
+    """
+    Prepare audio for many inputs on a pool of worker threads.
+
+    Iterating the pipeline yields PreparedAudio items in the order their
+    downloads finish, so the caller can transcribe one file while the workers
+    fetch the next ones. Each item owns a temporary directory that is removed
+    when the caller moves on to the next item.
+
+    Args:
+        input_sources: URLs or local paths to prepare
+        prepare: Function called as prepare(input_source, tmpdir) returning an audio path
+        workers: Number of concurrent download workers
+        queue_depth: Maximum number of prepared items waiting to be transcribed
+        max_temp_bytes: Stop starting new downloads while prepared-but-unconsumed
+            downloads (in their tmpdir or the media cache) use at least this
+            many bytes (None for no limit)
+        decode: Optional function called as decode(audio_file) in the worker; its
+            result is stored on the item's audio attribute
+    """
+
+    def __init__(
+        self,
+        input_sources: List[str],
+        prepare: Callable[[str, str], str],
+        workers: int = 2,
+        queue_depth: int = 2,
+        max_temp_bytes: Optional[int] = None,
+        decode: Optional[Callable[[str], Any]] = None,
+    ):
+        self.input_sources = list(input_sources)
+        self.prepare = prepare
+        self.workers = max(1, workers)
+        self.queue_depth = max(1, queue_depth)
+        self.max_temp_bytes = max_temp_bytes
+        self.decode = decode
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=self.queue_depth)
+        self._lock = threading.Condition()
+        self._next_index = 0
+        self._temp_bytes = 0
+        self._stop = threading.Event()
+
+    def __iter__(self) -> Iterator[PreparedAudio]:
+        threads = [
+            threading.Thread(target=self._worker, daemon=True)
+            for _ in range(min(self.workers, len(self.input_sources)))
+        ]
+        for thread in threads:
+            thread.start()
+
+        finished = 0
+        current = None
+        try:
+            while finished < len(threads):
+                item = self._queue.get()
+                if item is _DONE:
+                    finished += 1
+                    continue
+                current = item
+                yield item
+                self._release(item)
+                current = None
+        finally:
+            self._stop.set()
+            if current is not None:
+                self._release(current)
+            with self._lock:
+                self._lock.notify_all()
+            # Drain anything the workers still hand over so their temp dirs are removed
+            while any(thread.is_alive() for thread in threads) or not self._queue.empty():
+                try:
+                    item = self._queue.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if item is not _DONE:
+                    self._release(item)
+
+    def _claim_next(self) -> Optional[int]:
+        """Return the next input index to prepare, waiting while the temp-disk budget is used up."""
+        with self._lock:
+            while (
+                self.max_temp_bytes is not None
+                and self._temp_bytes >= self.max_temp_bytes
+                and not self._stop.is_set()
+            ):
+                self._lock.wait()
+            if self._stop.is_set() or self._next_index >= len(self.input_sources):
+                return None
+            index = self._next_index
+            self._next_index += 1
+            return index
+
+    def _worker(self) -> None:
+        while True:
+            index = self._claim_next()
+            if index is None:
+                break
+            input_source = self.input_sources[index]
+            item = PreparedAudio(index=index, input_source=input_source)
+            item.tmpdir = tempfile.mkdtemp(prefix="macscribe-")
+            try:
+                item.audio_file = self.prepare(input_source, item.tmpdir)
+                item.size = _prepared_size(item.audio_file, input_source)
+                if self.decode is not None:
+                    item.audio = self.decode(item.audio_file)
+            except Exception as e:
+                item.error = e
+
+            with self._lock:
+                self._temp_bytes += item.size
+            self._put(item)
+        self._put(_DONE)
+
+    def _put(self, item) -> None:
+        while True:
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                if self._stop.is_set() and item is not _DONE:
+                    self._release(item)
+                    return
+
+    def _release(self, item: PreparedAudio) -> None:
+        if item.tmpdir:
+            shutil.rmtree(item.tmpdir, ignore_errors=True)
+            item.tmpdir = None
+        item.audio = None
+        with self._lock:
+            self._temp_bytes -= item.size
+            item.size = 0
+            self._lock.notify_all()
+
+
+def _prepared_size(audio_file: Optional[str], input_source: str) -> int:
+    """
+    Size in bytes of the prepared audio, or 0 for a local input used in place.
+
+    Downloads count whether they went to the item's tmpdir or to the media
+    cache: either way they are files on disk waiting to be transcribed.
+    """
+    if not audio_file or not os.path.isfile(audio_file):
+        return 0
+    if os.path.isfile(input_source) and os.path.samefile(audio_file, input_source):
+        return 0
+    return os.path.getsize(audio_file)
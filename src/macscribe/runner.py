@@ -0,0 +1,253 @@
+"""Asyncio job runner for embedding macscribe in async services.
+
+AsyncJobRunner (and the transcribe_many() shortcut) runs many inputs as
+tasks on the caller's event loop. Nothing blocking runs on the loop itself:
+
+- metadata lookups, downloads, cache reads and writes, transcript files and
+  the clipboard run on a shared I/O thread pool, with at most per_host
+  downloads against any one host and max_downloads overall;
+- transcription runs on a separate compute executor, one thread by default
+  since a backend keeps its models in memory, so later downloads overlap it.
+
+A thread is only held while one of those blocking calls is in flight. Jobs
+waiting their turn are plain coroutines, so a thousand queued inputs cost no
+threads.
+"""
+
+import asyncio
+import functools
+import os
+import shutil
+import tempfile
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence
+from urllib.parse import urlparse
+
+from macscribe.cache import NON_OUTPUT_OPTIONS, TranscriptCache, cache_key
+from macscribe.clipboard import copy_to_clipboard
+from macscribe.downloader import DEFAULT_POLICY, DownloadReport, download_audio, source_id, validate_input
+from macscribe.models import resolve_model
+from macscribe.saver import save_transcript_formats
+
+DEFAULT_MODEL = "mlx-community/whisper-large-v3-mlx"
+
+
+@dataclass
+class JobResult:
+    """Outcome of one input of a transcribe_many run."""
+
+    input_source: str
+    text: Optional[str] = None
+    segments: List[dict] = field(default_factory=list)
+    # Transcript files written for this input
+    saved: List[str] = field(default_factory=list)
+    cached: bool = False
+    # Bytes fetched for URL inputs, against the highest-bitrate stream
+    download: Optional[DownloadReport] = None
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def host_of(input_source: str) -> Optional[str]:
+    """Return the host a URL input downloads from ('www.' dropped), or None for local files."""
+    if os.path.isfile(input_source):
+        return None
+    host = urlparse(input_source).netloc.lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+class AsyncJobRunner:
+    """
+    Run transcription jobs as asyncio tasks.
+
+    Args:
+        model: Model every input is transcribed with
+        options: Extra keyword arguments for transcribe_result (chunk_length, backend, ...)
+        output: Directory (or, for a single input, file) to save transcripts to; None saves nothing
+        formats: Output formats to save, e.g. ('txt', 'srt')
+        cache: Transcript cache to read and fill, or None
+        per_host: Maximum concurrent downloads from one host
+        max_downloads: Maximum concurrent downloads overall
+        max_pending: Maximum inputs downloaded or downloading but not yet transcribed,
+            which bounds the temporary disk in use
+        io_workers: Threads for blocking I/O
+        download_options: Extra keyword arguments for download_audio (policy,
+            concurrent_fragments, rate_limit)
+        compute_executor: Executor transcription runs on; the default is a
+            single thread owned by the runner
+    """
+
+    def __init__(
+        self,
+        model: str = DEFAULT_MODEL,
+        options: Optional[dict] = None,
+        output: Optional[str] = None,
+        formats: Sequence[str] = ("txt",),
+        cache: Optional[TranscriptCache] = None,
+        per_host: int = 2,
+        max_downloads: int = 4,
+        max_pending: int = 4,
+        io_workers: int = 8,
+        download_options: Optional[dict] = None,
+        compute_executor: Optional[Executor] = None,
+    ):
+        self.model = model
+        self.options = dict(options or {})
+        self.output = output
+        self.formats = tuple(formats)
+        self.cache = cache
+        self.per_host = max(1, per_host)
+        self.max_downloads = max(1, max_downloads)
+        self.max_pending = max(1, max_pending)
+        self.io_workers = max(1, io_workers)
+        self.download_options = dict(download_options or {})
+        self.compute_executor = compute_executor
+
+    async def run(self, input_sources: Iterable[str], copy: bool = False) -> List[JobResult]:
+        """
+        Transcribe every input concurrently and return the results in input order.
+
+        Errors are reported per input on JobResult.error, never raised. With
+        copy, the transcripts are copied to the clipboard together at the end.
+        """
+        input_sources = list(input_sources)
+        owns_compute = self.compute_executor is None
+        self._io_pool = ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix="macscribe-io")
+        self._compute = self.compute_executor or ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="macscribe-compute"
+        )
+        self._downloads = asyncio.Semaphore(self.max_downloads)
+        self._pending = asyncio.Semaphore(self.max_pending)
+        self._hosts: Dict[str, asyncio.Semaphore] = {}
+        try:
+            results = await asyncio.gather(*(self._job(input_source) for input_source in input_sources))
+            if copy:
+                transcripts = [result.text for result in results if result.text]
+                if transcripts:
+                    await self._io(copy_to_clipboard, "\n\n".join(transcripts))
+            return list(results)
+        finally:
+            # Calls still in flight (after a cancellation) finish in the background
+            self._io_pool.shutdown(wait=False)
+            if owns_compute:
+                self._compute.shutdown(wait=False)
+
+    async def _io(self, func, *args, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(
+            self._io_pool, functools.partial(func, *args, **kwargs)
+        )
+
+    async def _job(self, input_source: str) -> JobResult:
+        result = JobResult(input_source)
+        try:
+            if not await self._io(validate_input, input_source):
+                raise ValueError(f"Invalid input: {input_source}")
+            key = await self._cache_key(input_source)
+            entry = await self._io(self.cache.get, key) if key else None
+            # Entries stored by a plain-text run have no segments to write other formats from
+            if entry and ("segments" in entry or self.formats == ("txt",)):
+                result.text, result.segments, result.cached = entry["text"], entry.get("segments", []), True
+                result.saved = await self._save(result, entry["name"])
+                return result
+
+            async with self._pending:
+                tmpdir = tempfile.mkdtemp(prefix="macscribe-")
+                try:
+                    audio_file = await self._download(result, tmpdir)
+                    transcribed = await asyncio.get_running_loop().run_in_executor(
+                        self._compute, functools.partial(_transcribe, audio_file, self.model, self.options)
+                    )
+                finally:
+                    await self._io(shutil.rmtree, tmpdir, ignore_errors=True)
+            result.text, result.segments = transcribed["text"], transcribed["segments"]
+            if key:
+                await self._io(self._store, key, result, audio_file)
+            result.saved = await self._save(result, audio_file)
+        except Exception as e:
+            result.error = e
+        return result
+
+    async def _cache_key(self, input_source: str) -> Optional[str]:
+        if self.cache is None:
+            return None
+        key_options = {k: v for k, v in self.options.items() if k not in NON_OUTPUT_OPTIONS}
+        policy = self.download_options.get("policy", DEFAULT_POLICY)
+        if policy != DEFAULT_POLICY and host_of(input_source) is not None:
+            # A different stream of the same URL may transcribe differently
+            key_options["download_policy"] = policy
+        try:
+            return cache_key(await self._io(source_id, input_source), self.model, **key_options)
+        except Exception:
+            return None
+
+    async def _download(self, result: JobResult, tmpdir: str) -> str:
+        host = host_of(result.input_source)
+        if host is None:
+            # Local files are used in place
+            return result.input_source
+        if host not in self._hosts:
+            self._hosts[host] = asyncio.Semaphore(self.per_host)
+        async with self._hosts[host], self._downloads:
+            audio_file, result.download = await self._io(
+                download_audio, result.input_source, tmpdir, **self.download_options
+            )
+        return audio_file
+
+    def _store(self, key: str, result: JobResult, audio_file: str) -> None:
+        try:
+            self.cache.put(key, result.text, os.path.splitext(os.path.basename(audio_file))[0], segments=result.segments)
+        except OSError:
+            # Cache write failures never fail the job
+            pass
+
+    async def _save(self, result: JobResult, audio_file: str) -> List[str]:
+        if self.output is None:
+            return []
+        return await self._io(save_transcript_formats, result.text, result.segments, self.output, audio_file, self.formats)
+
+
+def _transcribe(audio_file: str, model: str, options: dict) -> dict:
+    # Imported on the compute thread so importing the runner stays cheap
+    from macscribe.transcriber import transcribe_result
+
+    return transcribe_result(audio_file, model, **options)
+
+
+async def transcribe_many(
+    input_sources: Iterable[str],
+    model: str = DEFAULT_MODEL,
+    output: Optional[str] = None,
+    formats: Sequence[str] = ("txt",),
+    options: Optional[dict] = None,
+    cache: Optional[TranscriptCache] = None,
+    per_host: int = 2,
+    max_downloads: int = 4,
+    copy: bool = False,
+    compute_executor: Optional[Executor] = None,
+) -> List[JobResult]:
+    """
+    Transcribe URLs and local files concurrently from async code.
+
+    Example:
+        results = await transcribe_many(urls, "small", output="transcripts/")
+
+    See AsyncJobRunner for the arguments; model also accepts presets such as 'small'.
+
+    Returns:
+        One JobResult per input, in input order
+    """
+    runner = AsyncJobRunner(
+        resolve_model(model),
+        options=options,
+        output=output,
+        formats=formats,
+        cache=cache,
+        per_host=per_host,
+        max_downloads=max_downloads,
+        compute_executor=compute_executor,
+    )
+    return await runner.run(input_sources, copy=copy)
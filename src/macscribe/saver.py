@@ -1,39 +1,192 @@
-"""Module for saving transcripts to text files."""
+"""Module for saving transcripts to text, subtitle and data files."""
 
+import json
 import os
 from pathlib import Path
+from typing import Dict, List, Sequence
 
+from macscribe.metrics import stage
 
-def save_transcript_to_file(
-    transcript: str, output_path: str, audio_filename: str
-) -> str:
+# Extension written for each output format. JSON is written as JSON Lines, one
+# segment per line, so it can be read while it is still being produced.
+FORMAT_EXTENSIONS: Dict[str, str] = {
+    "txt": ".txt",
+    "srt": ".srt",
+    "vtt": ".vtt",
+    "json": ".jsonl",
+    "tsv": ".tsv",
+}
+
+
+def resolve_output_path(output_path: str, audio_filename: str, extension: str = ".txt") -> Path:
     """
-    Save transcript to a text file.
+    Work out where a transcript should be written and create its parent directories.
 
     Args:
-        transcript: The transcript text to save
         output_path: User-specified output path (file or directory)
         audio_filename: Name of the audio file (used for auto-naming)
+        extension: Extension used when auto-naming inside a directory
 
     Returns:
-        The full path where the transcript was saved
+        The file path to write to
     """
     output = Path(output_path)
 
     # Determine the final file path
     if output.is_dir() or output_path.endswith("/"):
-        # If it's a directory, use audio filename with .txt extension
+        # If it's a directory, use audio filename with the given extension
         base_name = Path(audio_filename).stem
-        final_path = output / f"{base_name}.txt"
+        final_path = output / f"{base_name}{extension}"
     else:
         # If it's a file path, use it directly
         final_path = output
 
     # Create parent directories if they don't exist
     final_path.parent.mkdir(parents=True, exist_ok=True)
+    return final_path
+
+
+def format_timestamp(seconds: float) -> str:
+    """Format seconds as HH:MM:SS.mmm."""
+    milliseconds = int(round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3_600_000)
+    minutes, milliseconds = divmod(milliseconds, 60_000)
+    secs, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}.{milliseconds:03d}"
+
+
+def format_segment_line(segment: dict, fmt: str = "text") -> str:
+    """
+    Format one streamed segment as a single line.
+
+    Args:
+        segment: Segment dict with 'start', 'end' and 'text'
+        fmt: 'text' for a timestamped line, 'jsonl' for a JSON object
+
+    Returns:
+        The formatted line, without a trailing newline
+    """
+    if fmt == "jsonl":
+        return json.dumps(segment, ensure_ascii=False)
+    start = format_timestamp(segment["start"])
+    end = format_timestamp(segment["end"])
+    return f"[{start} --> {end}] {segment['text'].strip()}"
+
+
+def _cue_timestamp(seconds: float, separator: str) -> str:
+    timestamp = format_timestamp(seconds)
+    return timestamp if separator == "." else timestamp.replace(".", separator)
+
+
+def format_srt(segments: Sequence[dict]) -> str:
+    """Format segments as SubRip (.srt) subtitles."""
+    cues = []
+    for index, segment in enumerate(segments, start=1):
+        start = _cue_timestamp(segment["start"], ",")
+        end = _cue_timestamp(segment["end"], ",")
+        cues.append(f"{index}\n{start} --> {end}\n{segment['text'].strip()}\n")
+    return "\n".join(cues)
+
+
+def format_vtt(segments: Sequence[dict]) -> str:
+    """Format segments as WebVTT (.vtt) subtitles."""
+    cues = ["WEBVTT\n"]
+    for segment in segments:
+        start = format_timestamp(segment["start"])
+        end = format_timestamp(segment["end"])
+        cues.append(f"{start} --> {end}\n{segment['text'].strip()}\n")
+    return "\n".join(cues)
+
+
+def format_tsv(segments: Sequence[dict]) -> str:
+    """Format segments as tab-separated start and end (in milliseconds) and text, with a header row."""
+    lines = ["start\tend\ttext"]
+    for segment in segments:
+        # Tabs and newlines inside the text would break the columns
+        text = " ".join(segment["text"].split())
+        lines.append(f"{int(round(segment['start'] * 1000))}\t{int(round(segment['end'] * 1000))}\t{text}")
+    return "\n".join(lines) + "\n"
+
+
+def format_transcript(transcript: str, segments: Sequence[dict], fmt: str) -> str:
+    """
+    Render a transcript in one of the output formats.
+
+    Args:
+        transcript: The transcript text (used for 'txt')
+        segments: Timed segments (used for every other format)
+        fmt: One of FORMAT_EXTENSIONS
+
+    Returns:
+        The file contents
+    """
+    if fmt == "txt":
+        return transcript
+    if fmt == "srt":
+        return format_srt(segments)
+    if fmt == "vtt":
+        return format_vtt(segments)
+    if fmt == "tsv":
+        return format_tsv(segments)
+    if fmt == "json":
+        return "".join(format_segment_line(segment, "jsonl") + "\n" for segment in segments)
+    raise ValueError(f"Unknown output format '{fmt}'. Choose one of: {', '.join(FORMAT_EXTENSIONS)}")
+
+
+def save_transcript_formats(
+    transcript: str,
+    segments: Sequence[dict],
+    output_path: str,
+    audio_filename: str,
+    formats: Sequence[str],
+) -> List[str]:
+    """
+    Save a transcript once per output format.
+
+    A directory output gets one auto-named file per format. A file output is
+    used as is for a single format; with several formats its extension is
+    replaced by each format's extension.
+
+    Args:
+        transcript: The transcript text
+        segments: Timed segments, each with 'start', 'end' and 'text'
+        output_path: User-specified output path (file or directory)
+        audio_filename: Name of the audio file (used for auto-naming)
+        formats: Output formats, e.g. ('srt', 'vtt')
+
+    Returns:
+        The full paths where the files were saved, in the order of formats
+    """
+    saved = []
+    for fmt in formats:
+        final_path = resolve_output_path(output_path, audio_filename, FORMAT_EXTENSIONS[fmt])
+        if len(formats) > 1 and final_path.suffix != FORMAT_EXTENSIONS[fmt]:
+            final_path = final_path.with_suffix(FORMAT_EXTENSIONS[fmt])
+        content = format_transcript(transcript, segments, fmt)
+        with stage("save", bytes=len(content.encode("utf-8"))), open(final_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        saved.append(str(final_path.resolve()))
+    return saved
+
+
+def save_transcript_to_file(
+    transcript: str, output_path: str, audio_filename: str
+) -> str:
+    """
+    Save transcript to a text file.
+
+    Args:
+        transcript: The transcript text to save
+        output_path: User-specified output path (file or directory)
+        audio_filename: Name of the audio file (used for auto-naming)
+
+    Returns:
+        The full path where the transcript was saved
+    """
+    final_path = resolve_output_path(output_path, audio_filename)
 
     # Write the transcript to the file
-    with open(final_path, "w", encoding="utf-8") as f:
+    with stage("save", bytes=len(transcript.encode("utf-8"))), open(final_path, "w", encoding="utf-8") as f:
         f.write(transcript)
 
     return str(final_path.resolve())
@@ -1,13 +1,325 @@
-import mlx_whisper
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Union
+
+import numpy as np
+from macscribe.audio import DEFAULT_DECODER, SAMPLE_RATE, decode_audio, find_split_points, open_pcm
+from macscribe.backends import DEFAULT_BACKEND, get_backend
 from macscribe.clipboard import copy_to_clipboard
+from macscribe.metrics import active as metrics_active, stage
+from macscribe.models import SpeedLog
+
+# Characters of already-emitted text passed as the prompt for the next window
+_PROMPT_CHARS = 224
+
+# Chunk length used by low-memory mode when none is given: about 19 MB of
+# float32 samples per chunk in flight, however long the input is
+LOW_MEMORY_CHUNK_LENGTH = 300.0
+
+# Runs shorter than this are dominated by overhead and don't say much about a model's speed
+_MIN_TIMED_SECONDS = 1.0
+
+def transcribe_audio(
+    audio_file: Union[str, np.ndarray],
+    model: str,
+    copy: bool = True,
+    chunk_length: Optional[float] = None,
+    chunk_overlap: float = 1.0,
+    chunk_workers: int = 1,
+    backend: str = DEFAULT_BACKEND,
+    checkpoint=None,
+    word_timestamps: bool = False,
+    low_memory: bool = False,
+    decoder: str = DEFAULT_DECODER,
+) -> str:
+    """Transcribe the audio file (or 16 kHz mono PCM array) with the given backend (mlx_whisper by default), copy the result to clipboard (unless copy is False), and return the transcript.
+
+    With chunk_length set, long audio is split at pauses and the chunks are
+    transcribed separately (see transcribe_chunked); a checkpoint then lets
+    an interrupted run skip the chunks it already finished. With low_memory,
+    a file is decoded to disk and read a chunk at a time, so memory use stays
+    flat however long it is. decoder 'native' decodes files in-process
+    instead of in an ffmpeg subprocess. Use transcribe_result to keep the
+    segment timings as well.
+    """
+    transcript = transcribe_result(
+        audio_file,
+        model,
+        chunk_length=chunk_length,
+        chunk_overlap=chunk_overlap,
+        chunk_workers=chunk_workers,
+        backend=backend,
+        checkpoint=checkpoint,
+        word_timestamps=word_timestamps,
+        low_memory=low_memory,
+        decoder=decoder,
+    )["text"]
+
+    # Use the clipboard module to copy transcript
+    if copy:
+        copy_to_clipboard(transcript)
+    return transcript
+
+
+def transcribe_result(
+    audio_file: Union[str, np.ndarray],
+    model: str,
+    chunk_length: Optional[float] = None,
+    chunk_overlap: float = 1.0,
+    chunk_workers: int = 1,
+    backend: str = DEFAULT_BACKEND,
+    checkpoint=None,
+    word_timestamps: bool = False,
+    low_memory: bool = False,
+    decoder: str = DEFAULT_DECODER,
+) -> dict:
+    """
+    Transcribe audio and return the text together with its timed segments.
 
-def transcribe_audio(audio_file: str, model: str) -> str:
-    """Transcribe the audio file using mlx_whisper, copy the result to clipboard, and return the transcript."""
-    result = mlx_whisper.transcribe(audio_file, path_or_hf_repo=model)
+    Takes the same options as transcribe_audio but never touches the clipboard.
+
+    Returns:
+        Dict with 'text' and 'segments'; each segment has 'start', 'end' and
+        'text', plus 'words' (each with 'start', 'end' and 'word') when
+        word_timestamps is set
+
+    Raises:
+        ValueError: If the backend produced no text
+    """
+    if low_memory:
+        # Chunks bound what is in memory at once; without them the backend would get the whole file
+        chunk_length = chunk_length or LOW_MEMORY_CHUNK_LENGTH
+        if isinstance(audio_file, str):
+            with open_pcm(audio_file) as pcm:
+                return transcribe_result(
+                    pcm, model, chunk_length, chunk_overlap, chunk_workers,
+                    backend=backend, checkpoint=checkpoint, word_timestamps=word_timestamps,
+                )
+
+    if decoder != DEFAULT_DECODER and isinstance(audio_file, str):
+        # The backend would otherwise decode the file with its own ffmpeg subprocess
+        audio_file = decode_audio(audio_file, decoder=decoder)
+
+    # Only non-default options are passed on, so the plain backend call stays transcribe(audio, model)
+    backend_options = {"word_timestamps": True} if word_timestamps else {}
+    audio_seconds = 0.0
+    engine = get_backend(backend)
+    if metrics_active() is not None:
+        # Profiling: decode and load the model up front so each gets its own stage
+        if isinstance(audio_file, str):
+            audio_file = decode_audio(audio_file)
+        audio_seconds = len(audio_file) / SAMPLE_RATE
+        with stage("model_load"):
+            engine.load(model)
+    else:
+        # Backends load lazily; loading here keeps load time out of the speed measured for --model auto
+        engine.load(model)
+
+    resumed = checkpoint is not None and bool(checkpoint.completed)
+    started = time.perf_counter()
+    with stage("transcribe", audio_seconds=audio_seconds):
+        if chunk_length:
+            result = transcribe_chunked(
+                audio_file, model, chunk_length, chunk_overlap, chunk_workers,
+                backend=backend, checkpoint=checkpoint, **backend_options,
+            )
+        else:
+            result = engine.transcribe(audio_file, model, **backend_options)
+    wall = time.perf_counter() - started
     transcript = result.get("text", "")
     if not transcript:
         raise ValueError("No transcription result.")
+    segments = [_timed_segment(segment) for segment in result.get("segments") or []]
+    if not resumed:
+        _record_speed(audio_file, segments, model, backend, wall)
+    return {"text": transcript, "segments": segments}
 
-    # Use the clipboard module to copy transcript
-    copy_to_clipboard(transcript)
-    return transcript
\ No newline at end of file
+
+def _record_speed(audio, segments: List[dict], model: str, backend: str, wall: float) -> None:
+    """Add this run's real-time factor to the speed log `--model auto` chooses models with."""
+    if wall < _MIN_TIMED_SECONDS:
+        return
+    if isinstance(audio, str):
+        # Not decoded here; the end of the last segment is close enough to the audio length
+        audio_seconds = segments[-1]["end"] if segments else 0.0
+    else:
+        audio_seconds = len(audio) / SAMPLE_RATE
+    try:
+        SpeedLog().record(model, backend, audio_seconds, wall)
+    except OSError:
+        # The speed log is only a hint for model selection; never fail a transcription over it
+        pass
+
+
+def map_segments(segments: List[dict], time_map=None) -> List[dict]:
+    """Map segment and word times from trimmed audio back to the original audio (a no-op without a time_map)."""
+    if time_map is None:
+        return segments
+    mapped = []
+    for segment in segments:
+        segment = dict(segment, start=time_map.to_original(segment["start"]), end=time_map.to_original(segment["end"]))
+        if "words" in segment:
+            segment["words"] = [
+                dict(word, start=time_map.to_original(word["start"]), end=time_map.to_original(word["end"]))
+                for word in segment["words"]
+            ]
+        mapped.append(segment)
+    return mapped
+
+
+def _timed_segment(segment: dict, offset: float = 0.0) -> dict:
+    """Keep only the timing and text of a backend segment, shifting its times by offset seconds."""
+    timed = {
+        "start": round(segment["start"] + offset, 3),
+        "end": round(segment["end"] + offset, 3),
+        "text": segment.get("text", ""),
+    }
+    if segment.get("words"):
+        timed["words"] = [
+            {"start": round(word["start"] + offset, 3), "end": round(word["end"] + offset, 3), "word": word["word"]}
+            for word in segment["words"]
+        ]
+    return timed
+
+def iter_segments(
+    audio_file: Union[str, np.ndarray],
+    model: str,
+    window: float = 30.0,
+    backend: str = DEFAULT_BACKEND,
+    low_memory: bool = False,
+    decoder: str = DEFAULT_DECODER,
+) -> Iterator[dict]:
+    """
+    Transcribe audio window by window, yielding segments as soon as each window is decoded.
+
+    Each window is transcribed on its own with the tail of the previous text as
+    prompt. The last segment of a window may be cut off mid-word, so it is held
+    back and the next window starts at its beginning instead.
+
+    Args:
+        audio_file: Path to an audio/video file or a 16 kHz mono PCM array
+        model: Hugging Face model to use
+        window: Window length in seconds
+        backend: Name of the transcription backend
+        low_memory: Decode a file to disk and read one window at a time instead of decoding it into memory
+        decoder: How a file is decoded: 'ffmpeg' or 'native' (in-process)
+
+    Yields:
+        Segment dicts with 'start', 'end' (seconds from the start of the audio) and 'text'
+    """
+    if low_memory and isinstance(audio_file, str):
+        with open_pcm(audio_file) as pcm:
+            yield from iter_segments(pcm, model, window, backend)
+        return
+
+    if decoder != DEFAULT_DECODER and isinstance(audio_file, str):
+        audio_file = decode_audio(audio_file, decoder=decoder)
+    audio = decode_audio(audio_file) if isinstance(audio_file, str) else audio_file
+    engine = get_backend(backend)
+    window_samples = int(window * SAMPLE_RATE)
+    position = 0
+    emitted = ""
+    while position < len(audio):
+        chunk = audio[position:position + window_samples]
+        is_last = position + window_samples >= len(audio)
+        with stage("transcribe", audio_seconds=len(chunk) / SAMPLE_RATE):
+            result = engine.transcribe(chunk, model, initial_prompt=emitted[-_PROMPT_CHARS:] or None)
+        segments = result.get("segments") or []
+
+        advance = window_samples
+        if not is_last and len(segments) > 1:
+            resume = int(segments[-1]["start"] * SAMPLE_RATE)
+            if resume > 0:
+                segments = segments[:-1]
+                advance = resume
+
+        offset = position / SAMPLE_RATE
+        for segment in segments:
+            text = segment.get("text", "")
+            emitted += text
+            yield {
+                "start": round(offset + segment["start"], 3),
+                "end": round(offset + segment["end"], 3),
+                "text": text,
+            }
+        position += advance
+
+
+def transcribe_chunked(
+    audio_file: Union[str, np.ndarray],
+    model: str,
+    chunk_length: float = 600.0,
+    overlap: float = 1.0,
+    workers: int = 1,
+    backend: str = DEFAULT_BACKEND,
+    checkpoint=None,
+    word_timestamps: bool = False,
+) -> dict:
+    """
+    Transcribe long audio as independent chunks split at pauses, optionally several at a time.
+
+    Split points come from find_split_points. Each chunk is decoded with
+    `overlap` seconds of context on both sides; afterwards a segment is kept
+    only by the chunk whose own range contains the segment's midpoint, so the
+    overlap never produces duplicate text.
+
+    Args:
+        audio_file: Path to an audio/video file, a 16 kHz mono PCM array or an audio.PCMFile
+        model: Hugging Face model to use
+        chunk_length: Target chunk length in seconds
+        overlap: Extra audio decoded on each side of a chunk, in seconds
+        workers: Number of chunks transcribed concurrently; the MLX backend
+            serializes its calls, so on it chunking gives checkpoints and
+            bounded memory but no speedup
+        backend: Name of the transcription backend
+        checkpoint: Optional jobs.Job; chunks it has already finished are
+            reused and every newly finished chunk is recorded in it
+        word_timestamps: Also return per-word timings for each segment
+
+    Returns:
+        Dict with 'text' and 'segments' (timestamps relative to the whole audio)
+    """
+    audio = decode_audio(audio_file) if isinstance(audio_file, str) else audio_file
+    bounds = [0] + find_split_points(audio, chunk_length) + [len(audio)]
+    if checkpoint is not None:
+        bounds = checkpoint.use_bounds(bounds)
+    pad = int(overlap * SAMPLE_RATE)
+    engine = get_backend(backend)
+
+    def run(index: int) -> list:
+        segments = _transcribe_chunk(index)
+        if checkpoint is not None:
+            checkpoint.record(index, segments)
+        return segments
+
+    def _transcribe_chunk(index: int) -> list:
+        core_start, core_end = bounds[index], bounds[index + 1]
+        start = max(0, core_start - pad)
+        end = min(len(audio), core_end + pad)
+        if word_timestamps:
+            result = engine.transcribe(audio[start:end], model, word_timestamps=True)
+        else:
+            result = engine.transcribe(audio[start:end], model)
+        segments = []
+        for segment in result.get("segments") or []:
+            seg_start = start / SAMPLE_RATE + segment["start"]
+            seg_end = start / SAMPLE_RATE + segment["end"]
+            midpoint = (seg_start + seg_end) / 2 * SAMPLE_RATE
+            is_last = index == len(bounds) - 2
+            if core_start <= midpoint < core_end or (is_last and midpoint >= core_end):
+                segments.append(_timed_segment(segment, offset=start / SAMPLE_RATE))
+        return segments
+
+    n_chunks = len(bounds) - 1
+    results = dict(checkpoint.completed) if checkpoint is not None else {}
+    pending = [index for index in range(n_chunks) if index not in results]
+    if pending:
+        # The first chunk runs alone so the model is loaded once before the workers share it
+        results[pending[0]] = run(pending[0])
+    if len(pending) > 1:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            results.update(zip(pending[1:], pool.map(run, pending[1:])))
+    results = [results[index] for index in range(n_chunks)]
+
+    segments = [segment for chunk in results for segment in chunk]
+    return {"text": "".join(segment["text"] for segment in segments), "segments": segments}
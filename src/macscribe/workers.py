@@ -0,0 +1,44 @@
+"""Worker-process side of multi-process transcription of local files.
+
+Each process of the pool loads the model once in init_worker and then
+transcribes whole files with transcribe_file. Both are module-level functions
+so they can be pickled for the pool.
+"""
+
+from typing import Union
+
+
+def init_worker(model: str, backend: str) -> None:
+    """Load the model in this worker process before it takes its first file."""
+    from macscribe.backends import get_backend
+
+    try:
+        get_backend(backend).load(model)
+    except Exception:
+        # Loading again on the first file reports the error against that file
+        pass
+
+
+def transcribe_file(
+    audio_file: str, model: str, options: dict, trim_silence: bool = False, segments: bool = False
+) -> Union[str, dict]:
+    """
+    Transcribe one local file in a worker process.
+
+    Returns the transcript, or with segments the dict from transcribe_result
+    (timestamps refer to the original audio even when silence was trimmed).
+    """
+    from macscribe.transcriber import map_segments, transcribe_audio, transcribe_result
+
+    audio, time_map = audio_file, None
+    if trim_silence:
+        from macscribe.audio import decode_audio, trim_non_speech
+
+        decoded = decode_audio(audio_file, decoder=options["decoder"]) if "decoder" in options else decode_audio(audio_file)
+        audio, time_map = trim_non_speech(decoded)
+        if len(audio) == 0:
+            raise ValueError("No speech detected.")
+    if not segments:
+        return transcribe_audio(audio, model, copy=False, **options)
+    result = transcribe_result(audio, model, **options)
+    return dict(result, segments=map_segments(result["segments"], time_map))
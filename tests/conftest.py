@@ -70,4 +70,11 @@ def invalid_urls():
         "https://vimeo.com/123456789",
         "not-a-url",
         "",
-    ]
\ No newline at end of file
+    ]
+
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(tmp_path, monkeypatch):
+    """Point the transcript cache at a per-test directory."""
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setenv("MACSCRIBE_CACHE_DIR", str(cache_dir))
+    return cache_dir
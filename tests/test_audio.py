@@ -0,0 +1,333 @@
+import json
+import os
+import subprocess
+import wave
+import numpy as np
+import pytest
+from unittest.mock import patch, MagicMock
+
+from macscribe.audio import (
+    NativeDecoder,
+    PCMFile,
+    SAMPLE_RATE,
+    decode_audio,
+    decode_to_pcm_file,
+    find_split_points,
+    frame_energy_db,
+    open_pcm,
+    probe_media,
+    speech_mask,
+    trim_non_speech,
+)
+
+
+class TestDecodeAudio:
+    """Test the decode_audio function."""
+
+    @patch('macscribe.audio.subprocess.run')
+    def test_decodes_to_float32(self, mock_run):
+        """Test that ffmpeg's s16le output is scaled to float32."""
+        pcm = np.array([0, 16384, -32768], dtype=np.int16)
+        mock_run.return_value = MagicMock(stdout=pcm.tobytes())
+
+        audio = decode_audio("/path/to/audio.webm")
+
+        assert audio.dtype == np.float32
+        np.testing.assert_allclose(audio, [0.0, 0.5, -1.0])
+        cmd = mock_run.call_args[0][0]
+        assert cmd[0] == "ffmpeg"
+        assert "/path/to/audio.webm" in cmd
+        assert cmd[cmd.index("-ar") + 1] == str(SAMPLE_RATE)
+        assert cmd[cmd.index("-ac") + 1] == "1"
+
+    @patch('macscribe.audio.subprocess.run')
+    def test_ffmpeg_failure(self, mock_run):
+        """Test that ffmpeg errors are raised with its stderr."""
+        mock_run.side_effect = subprocess.CalledProcessError(1, "ffmpeg", stderr=b"Invalid data found")
+
+        with pytest.raises(RuntimeError, match="Invalid data found"):
+            decode_audio("/path/to/broken.mp3")
+
+
+@pytest.fixture
+def no_optional_readers():
+    """Decode with the standard library wave reader only, whatever is installed."""
+    with patch.dict('macscribe.audio._optional_modules', {"av": None, "soundfile": None}):
+        yield
+
+
+def write_pcm_wav(path, samples, rate, width):
+    """Write interleaved integer samples as a WAV file with the given sample width."""
+    channels = samples.shape[1]
+    if width == 3:
+        data = samples.astype("<i4").view(np.uint8).reshape(-1, 4)[:, :3].tobytes()
+    else:
+        data = samples.astype({1: np.uint8, 2: "<i2", 4: "<i4"}[width]).tobytes()
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(channels)
+        f.setsampwidth(width)
+        f.setframerate(rate)
+        f.writeframes(data)
+
+
+class TestNativeDecoder:
+    """Test in-process decoding."""
+
+    @patch('macscribe.audio.subprocess.run')
+    def test_stereo_wav(self, mock_run, tmp_path, no_optional_readers):
+        """Test that a 44.1 kHz stereo WAV is mixed down and resampled to 16 kHz without ffmpeg."""
+        t = np.arange(44100) / 44100
+        left = np.sin(2 * np.pi * 440 * t) * 0.5
+        samples = np.stack([left, -0.2 * left], axis=1)
+        path = tmp_path / "clip.wav"
+        write_pcm_wav(path, np.round(samples * 32767), 44100, 2)
+
+        audio = decode_audio(str(path), decoder="native")
+
+        mock_run.assert_not_called()
+        assert audio.dtype == np.float32 and len(audio) == SAMPLE_RATE
+        expected = 0.4 * 0.5 * np.sin(2 * np.pi * 440 * np.arange(SAMPLE_RATE) / SAMPLE_RATE)
+        np.testing.assert_allclose(audio[400:-400], expected[400:-400], atol=2e-3)
+
+    @pytest.mark.parametrize("width, full_scale", [(1, 128), (3, 2**23), (4, 2**31)])
+    def test_sample_widths(self, width, full_scale, tmp_path, no_optional_readers):
+        """Test that 8-bit (unsigned), 24-bit and 32-bit PCM are scaled to [-1, 1)."""
+        values = np.array([[0], [full_scale // 2], [-full_scale]])
+        if width == 1:
+            values = values + 128
+        path = tmp_path / "clip.wav"
+        write_pcm_wav(path, values, SAMPLE_RATE, width)
+
+        np.testing.assert_allclose(NativeDecoder().decode(str(path)), [0.0, 0.5, -1.0])
+
+    def test_reuses_mixdown_buffer(self, tmp_path, no_optional_readers):
+        """Test that clips decoded by one decoder share its buffers but not its results."""
+        decoder = NativeDecoder()
+        first_path, second_path = tmp_path / "a.wav", tmp_path / "b.wav"
+        write_pcm_wav(first_path, np.full((800, 1), 1000), SAMPLE_RATE, 2)
+        write_pcm_wav(second_path, np.full((400, 1), -1000), SAMPLE_RATE, 2)
+
+        first = decoder.decode(str(first_path))
+        buffer = decoder._mono
+        second = decoder.decode(str(second_path))
+
+        assert decoder._mono is buffer
+        assert first.max() > 0 and second.max() < 0
+
+    @patch('macscribe.audio.subprocess.run')
+    def test_falls_back_to_ffmpeg(self, mock_run, tmp_path, no_optional_readers):
+        """Test that files no in-process reader supports are decoded by ffmpeg."""
+        mock_run.return_value = MagicMock(stdout=np.array([16384], dtype=np.int16).tobytes())
+        path = tmp_path / "clip.m4a"
+        path.write_bytes(b"not a wav file")
+
+        np.testing.assert_allclose(decode_audio(str(path), decoder="native"), [0.5])
+        assert mock_run.call_args[0][0][0] == "ffmpeg"
+
+    def test_unknown_decoder(self):
+        """Test that an unknown decoder name is rejected."""
+        with pytest.raises(ValueError, match="Unknown decoder 'sox'"):
+            decode_audio("/path/to/audio.wav", decoder="sox")
+
+
+class TestProbeMedia:
+    """Test reading durations and codecs without decoding."""
+
+    @patch('macscribe.audio.subprocess.run')
+    def test_ffprobe(self, mock_run):
+        """Test that the container duration and first audio codec are returned."""
+        mock_run.return_value = MagicMock(stdout=json.dumps({
+            "streams": [{"codec_type": "video", "codec_name": "h264"}, {"codec_type": "audio", "codec_name": "aac"}],
+            "format": {"duration": "1234.567"},
+        }))
+
+        assert probe_media("/path/to/talk.mp4") == {"duration": pytest.approx(1234.567), "codec": "aac"}
+        assert mock_run.call_args[0][0][0] == "ffprobe"
+
+    @patch('macscribe.audio.subprocess.run')
+    def test_no_audio_stream(self, mock_run):
+        """Test that a file without an audio stream reports codec 'none'."""
+        mock_run.return_value = MagicMock(stdout=json.dumps({
+            "streams": [{"codec_type": "video", "codec_name": "h264"}],
+            "format": {"duration": "10.0"},
+        }))
+
+        assert probe_media("/path/to/screen.mov")["codec"] == "none"
+
+    @patch('macscribe.audio.subprocess.run')
+    def test_wav_without_ffprobe(self, mock_run, tmp_path):
+        """Test that WAV files are read from their header when ffprobe is missing."""
+        from macscribe.bench import write_wav
+
+        mock_run.side_effect = FileNotFoundError("ffprobe")
+        path = str(tmp_path / "clip.wav")
+        write_wav(path, np.zeros(SAMPLE_RATE * 3, dtype=np.float32))
+
+        assert probe_media(path) == {"duration": pytest.approx(3.0), "codec": "pcm_s16le"}
+
+    @patch('macscribe.audio.subprocess.run')
+    def test_unreadable(self, mock_run, tmp_path):
+        """Test that an unreadable file gives None."""
+        mock_run.side_effect = subprocess.CalledProcessError(1, "ffprobe")
+        path = tmp_path / "broken.mp3"
+        path.write_bytes(b"not audio")
+
+        assert probe_media(str(path)) is None
+
+
+class TestPCMFile:
+    """Test decoding to disk and reading back a window at a time."""
+
+    def _write(self, path, pcm):
+        with open(path, "wb") as f:
+            f.write(pcm.tobytes())
+
+    def test_slices_read_as_float32(self, tmp_path):
+        """Test that slices match the scaled samples and len() counts samples."""
+        path = str(tmp_path / "audio.pcm")
+        self._write(path, np.array([0, 16384, -32768, 8192], dtype=np.int16))
+
+        with PCMFile(path) as pcm:
+            assert len(pcm) == 4
+            np.testing.assert_allclose(pcm[1:3], [0.5, -1.0])
+            np.testing.assert_allclose(pcm[-1:], [0.25])
+            assert pcm[10:20].dtype == np.float32 and len(pcm[10:20]) == 0
+            with pytest.raises(TypeError):
+                pcm[0]
+
+    @patch('macscribe.audio._ENERGY_BLOCK_FRAMES', 7)
+    def test_energy_matches_in_memory_audio(self, tmp_path):
+        """Test that block-wise analysis of a PCMFile gives the same frame energies as the array."""
+        pcm = (np.random.default_rng(0).standard_normal(16000) * 3000).astype(np.int16)
+        path = str(tmp_path / "audio.pcm")
+        self._write(path, pcm)
+
+        with PCMFile(path) as audio:
+            np.testing.assert_array_equal(
+                frame_energy_db(audio, 480), frame_energy_db(pcm.astype(np.float32) / 32768.0, 480)
+            )
+
+    @patch('macscribe.audio.subprocess.run')
+    def test_decode_to_disk(self, mock_run):
+        """Test that ffmpeg writes raw PCM to a temporary file that is removed afterwards."""
+        def ffmpeg(cmd, **kwargs):
+            self._write(cmd[-1], np.array([16384] * 8, dtype=np.int16))
+        mock_run.side_effect = ffmpeg
+
+        with open_pcm("/path/to/long.mp3") as pcm:
+            assert len(pcm) == 8
+            path = pcm.path
+        assert not os.path.exists(path)
+        cmd = mock_run.call_args[0][0]
+        assert cmd[cmd.index("-f") + 1] == "s16le"
+        assert "-" not in cmd
+
+    @patch('macscribe.audio.subprocess.run')
+    def test_decode_to_disk_failure(self, mock_run):
+        """Test that ffmpeg errors are raised with its stderr."""
+        mock_run.side_effect = subprocess.CalledProcessError(1, "ffmpeg", stderr=b"Invalid data found")
+
+        with pytest.raises(RuntimeError, match="Invalid data found"):
+            decode_to_pcm_file("/path/to/broken.mp3", "/tmp/out.pcm")
+
+
+class TestFindSplitPoints:
+    """Test the energy-based split point search."""
+
+    def noisy(self, seconds, silences=()):
+        """Noise with silent gaps at the given (start, end) seconds."""
+        rng = np.random.default_rng(0)
+        audio = (rng.standard_normal(SAMPLE_RATE * seconds) * 0.3).astype(np.float32)
+        for start, end in silences:
+            audio[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)] = 0
+        return audio
+
+    def test_short_audio_not_split(self):
+        """Test that audio shorter than a chunk has no split points."""
+        assert find_split_points(self.noisy(20), 30.0) == []
+
+    def test_splits_land_in_silence(self):
+        """Test that splits are placed inside the pauses before each boundary."""
+        audio = self.noisy(90, silences=[(26, 27), (52, 53)])
+
+        splits = find_split_points(audio, 30.0)
+
+        assert 26 * SAMPLE_RATE <= splits[0] <= 27 * SAMPLE_RATE
+        assert 52 * SAMPLE_RATE <= splits[1] <= 53 * SAMPLE_RATE
+        assert splits == sorted(splits)
+
+    def test_chunks_never_exceed_length(self):
+        """Test that no chunk is longer than chunk_length."""
+        audio = self.noisy(200)
+
+        bounds = [0] + find_split_points(audio, 30.0) + [len(audio)]
+
+        frame = int(0.03 * SAMPLE_RATE)
+        assert all(b - a <= 30 * SAMPLE_RATE + frame for a, b in zip(bounds, bounds[1:-1]))
+
+
+def test_frame_energy_db():
+    """Test that silent frames have much lower energy than loud ones."""
+    audio = np.concatenate([np.zeros(480, dtype=np.float32), np.full(480, 0.5, dtype=np.float32)])
+
+    energy = frame_energy_db(audio, 480)
+
+    assert len(energy) == 2
+    assert energy[0] < -90
+    assert energy[1] == pytest.approx(10 * np.log10(0.25), abs=1e-3)
+
+
+def tone(seconds, amplitude=0.3):
+    """A 200 Hz tone, standing in for speech."""
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * 200 * t)).astype(np.float32)
+
+
+class TestTrimNonSpeech:
+    """Test non-speech trimming and the resulting time map."""
+
+    def test_drops_long_silence(self):
+        """Test that long silences are removed and short pauses kept."""
+        audio = np.concatenate([
+            np.zeros(SAMPLE_RATE * 10, dtype=np.float32),
+            tone(5),
+            np.zeros(SAMPLE_RATE // 2, dtype=np.float32),
+            tone(5),
+            np.zeros(SAMPLE_RATE * 10, dtype=np.float32),
+        ])
+
+        trimmed, time_map = trim_non_speech(audio, padding=0.0)
+
+        assert len(time_map.regions) == 1
+        assert len(trimmed) / SAMPLE_RATE == pytest.approx(10.5, abs=0.1)
+        assert time_map.skipped_seconds == pytest.approx(20.0, abs=0.1)
+
+    def test_time_map_back_to_original(self):
+        """Test that trimmed timestamps map back to original ones."""
+        audio = np.concatenate([
+            np.zeros(SAMPLE_RATE * 10, dtype=np.float32),
+            tone(5),
+            np.zeros(SAMPLE_RATE * 20, dtype=np.float32),
+            tone(5),
+        ])
+
+        _, time_map = trim_non_speech(audio, padding=0.0)
+
+        assert time_map.to_original(0.0) == pytest.approx(10.0, abs=0.05)
+        assert time_map.to_original(6.0) == pytest.approx(36.0, abs=0.05)
+
+    def test_noise_is_not_speech(self):
+        """Test that quiet broadband noise is classified as non-speech."""
+        rng = np.random.default_rng(0)
+        noise = (rng.standard_normal(SAMPLE_RATE * 5) * 0.01).astype(np.float32)
+        frame = int(0.03 * SAMPLE_RATE)
+
+        assert not speech_mask(noise, frame).any()
+        assert speech_mask(tone(1), frame).all()
+
+    def test_all_silence(self):
+        """Test that silent input trims to nothing."""
+        trimmed, time_map = trim_non_speech(np.zeros(SAMPLE_RATE * 5, dtype=np.float32))
+
+        assert len(trimmed) == 0
+        assert time_map.skipped_seconds == pytest.approx(5.0)
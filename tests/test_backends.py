@@ -0,0 +1,221 @@
+import sys
+import numpy as np
+import pytest
+from types import SimpleNamespace
+from unittest.mock import ANY, patch, MagicMock
+
+from macscribe.backends import (
+    FasterWhisperBackend,
+    MLXBackend,
+    faster_whisper_model_name,
+    get_backend,
+)
+
+
+class TestGetBackend:
+    """Test backend lookup."""
+
+    def test_known_backends(self):
+        """Test that each registered backend is returned as a shared instance."""
+        assert isinstance(get_backend("mlx"), MLXBackend)
+        assert isinstance(get_backend("faster-whisper"), FasterWhisperBackend)
+        assert get_backend("mlx") is get_backend("mlx")
+
+    def test_unknown_backend(self):
+        """Test that unknown names are rejected."""
+        with pytest.raises(ValueError, match="Unknown backend"):
+            get_backend("tensorflow")
+
+
+class TestMLXBackend:
+    """Test the MLX backend."""
+
+    @patch('mlx_whisper.transcribe')
+    def test_transcribe(self, mock_transcribe):
+        """Test that calls are forwarded to mlx_whisper."""
+        mock_transcribe.return_value = {"text": "Hello", "segments": []}
+
+        result = MLXBackend().transcribe("/path/to/audio.mp3", "test-model")
+
+        assert result["text"] == "Hello"
+        mock_transcribe.assert_called_once_with("/path/to/audio.mp3", path_or_hf_repo="test-model")
+
+    @patch('mlx_whisper.transcribe')
+    def test_initial_prompt(self, mock_transcribe):
+        """Test that a prompt is passed through when given."""
+        MLXBackend().transcribe("/path/to/audio.mp3", "test-model", initial_prompt="Earlier text")
+
+        mock_transcribe.assert_called_once_with(
+            "/path/to/audio.mp3", path_or_hf_repo="test-model", initial_prompt="Earlier text"
+        )
+
+    @patch('mlx_whisper.transcribe')
+    def test_word_timestamps(self, mock_transcribe):
+        """Test that word timestamps are requested only when asked for."""
+        MLXBackend().transcribe("/path/to/audio.mp3", "test-model", word_timestamps=True)
+
+        mock_transcribe.assert_called_once_with(
+            "/path/to/audio.mp3", path_or_hf_repo="test-model", word_timestamps=True
+        )
+
+    @patch('mlx_whisper.transcribe')
+    def test_calls_serialized(self, mock_transcribe):
+        """Test that concurrent threads never run mlx_whisper at the same time."""
+        import threading
+        import time
+
+        running = []
+        overlapped = []
+
+        def slow_transcribe(audio, **kwargs):
+            running.append(audio)
+            overlapped.append(len(running) > 1)
+            time.sleep(0.01)
+            running.remove(audio)
+            return {"text": "Hello", "segments": []}
+
+        mock_transcribe.side_effect = slow_transcribe
+        backend = MLXBackend()
+        threads = [
+            threading.Thread(target=backend.transcribe, args=(f"/path/{index}.mp3", "test-model"))
+            for index in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert overlapped == [False] * 4
+
+
+class TestFasterWhisperBackend:
+    """Test the faster-whisper CPU backend."""
+
+    def test_model_name_mapping(self):
+        """Test that mlx-community repo names map to faster-whisper sizes."""
+        assert faster_whisper_model_name("mlx-community/whisper-large-v3-mlx") == "large-v3"
+        assert faster_whisper_model_name("mlx-community/whisper-tiny") == "tiny"
+        assert faster_whisper_model_name("Systran/faster-whisper-small") == "Systran/faster-whisper-small"
+
+    def test_transcribe(self):
+        """Test that segments are converted and the model is loaded once."""
+        fake_module = MagicMock()
+        model = fake_module.WhisperModel.return_value
+        model.transcribe.side_effect = lambda audio, initial_prompt=None, word_timestamps=False: (
+            iter([SimpleNamespace(start=0.0, end=1.5, text=" Hello"), SimpleNamespace(start=1.5, end=3.0, text=" world.")]),
+            SimpleNamespace(language="en"),
+        )
+        backend = FasterWhisperBackend()
+        audio = np.zeros(16000, dtype=np.float32)
+
+        with patch.dict(sys.modules, {"faster_whisper": fake_module}):
+            result = backend.transcribe(audio, "mlx-community/whisper-small-mlx")
+            backend.transcribe(audio, "mlx-community/whisper-small-mlx")
+
+        assert result["text"] == " Hello world."
+        assert result["segments"][1] == {"start": 1.5, "end": 3.0, "text": " world."}
+        fake_module.WhisperModel.assert_called_once_with("small", device="cpu", compute_type="int8")
+
+    def test_word_timestamps(self):
+        """Test that word timings are converted when requested."""
+        fake_module = MagicMock()
+        words = [SimpleNamespace(start=0.0, end=0.7, word=" Hello", probability=0.9)]
+        fake_module.WhisperModel.return_value.transcribe.return_value = (
+            iter([SimpleNamespace(start=0.0, end=0.7, text=" Hello", words=words)]),
+            SimpleNamespace(language="en"),
+        )
+
+        with patch.dict(sys.modules, {"faster_whisper": fake_module}):
+            result = FasterWhisperBackend().transcribe(np.zeros(16000, dtype=np.float32), "tiny", word_timestamps=True)
+
+        assert result["segments"][0]["words"] == [{"start": 0.0, "end": 0.7, "word": " Hello"}]
+        fake_module.WhisperModel.return_value.transcribe.assert_called_once_with(
+            ANY, initial_prompt=None, word_timestamps=True
+        )
+
+    def test_missing_package(self):
+        """Test that a missing faster-whisper install gives an actionable error."""
+        with patch.dict(sys.modules, {"faster_whisper": None}):
+            with pytest.raises(RuntimeError, match="pip install 'macscribe\\[cpu\\]'"):
+                FasterWhisperBackend().transcribe(np.zeros(16000, dtype=np.float32), "tiny")
+
+
+class TestLoad:
+    """Test loading models ahead of transcription."""
+
+    def test_faster_whisper_load(self):
+        """Test that load() builds the model that transcribe() later reuses."""
+        fake_module = MagicMock()
+        backend = FasterWhisperBackend()
+
+        with patch.dict(sys.modules, {"faster_whisper": fake_module}):
+            backend.load("mlx-community/whisper-tiny")
+            backend.load("mlx-community/whisper-tiny")
+
+        fake_module.WhisperModel.assert_called_once_with("tiny", device="cpu", compute_type="int8")
+
+    @patch('mlx_whisper.transcribe')
+    def test_mlx_keeps_recent_models(self, mock_transcribe):
+        """Test that switching back to a recently used model reuses its weights instead of reloading."""
+        class ModelHolder:
+            model = None
+            model_path = None
+            loads = []
+
+            @classmethod
+            def get_model(cls, path, dtype):
+                if path != cls.model_path:
+                    cls.loads.append(path)
+                    cls.model, cls.model_path = object(), path
+                return cls.model
+
+        fake_module = MagicMock(ModelHolder=ModelHolder)
+        mock_transcribe.side_effect = lambda audio, path_or_hf_repo: ModelHolder.get_model(path_or_hf_repo, None) and {}
+        backend = MLXBackend(max_models=2)
+
+        with patch.dict(sys.modules, {"mlx_whisper.transcribe": fake_module}):
+            for model in ["a", "b", "a", "b", "c", "a"]:
+                backend.transcribe("/path/to/audio.mp3", model)
+
+        # "a" was evicted by "c" (least recently used), so only its last use loads again
+        assert ModelHolder.loads == ["a", "b", "c", "a"]
+
+    def test_mlx_transcribe_batch(self):
+        """Test that a batch of padded clips goes through one mel stack and one decode call."""
+        whisper = SimpleNamespace(dims=SimpleNamespace(n_mels=128))
+        holder = MagicMock(model_path=None)
+        holder.get_model.return_value = whisper
+        audio_module = MagicMock(N_FRAMES=3000)
+        decoding_module = MagicMock()
+        decoding_module.decode.return_value = [SimpleNamespace(text=" One."), SimpleNamespace(text=" Two.")]
+        clips = np.zeros((2, 480000), dtype=np.float32)
+
+        with patch.dict(sys.modules, {
+            "mlx_whisper.transcribe": MagicMock(ModelHolder=holder),
+            "mlx_whisper.audio": audio_module,
+            "mlx_whisper.decoding": decoding_module,
+        }):
+            texts = MLXBackend().transcribe_batch(clips, "test-model")
+
+        assert texts == [" One.", " Two."]
+        assert audio_module.log_mel_spectrogram.call_count == 2
+        assert audio_module.log_mel_spectrogram.call_args.kwargs == {"n_mels": 128}
+        decoding_module.decode.assert_called_once()
+        assert decoding_module.decode.call_args.args[0] is whisper
+        decoding_module.DecodingOptions.assert_called_once_with(without_timestamps=True)
+
+    @patch('mlx_whisper.transcribe')
+    def test_mlx_transcribe_batch_without_internals(self, mock_transcribe):
+        """Test that clips are transcribed one by one when mlx_whisper's model holder can't be imported."""
+        mock_transcribe.return_value = {"text": " Hi."}
+
+        with patch.dict(sys.modules, {"mlx_whisper.transcribe": None}):
+            texts = MLXBackend().transcribe_batch(np.zeros((3, 480000), dtype=np.float32), "test-model")
+
+        assert texts == [" Hi."] * 3
+        assert mock_transcribe.call_count == 3
+
+    def test_mlx_load_without_internals(self):
+        """Test that MLX load is skipped when mlx_whisper's model holder can't be imported."""
+        with patch.dict(sys.modules, {"mlx_whisper.transcribe": None}):
+            MLXBackend().load("test-model")
@@ -0,0 +1,81 @@
+import numpy as np
+from unittest.mock import MagicMock, patch
+
+from macscribe.batching import CLIP_SAMPLES, fits_batch, pad_batch, transcribe_clips
+
+
+def clip(seconds, value=0.1):
+    return np.full(int(seconds * 16000), value, dtype=np.float32)
+
+
+class TestPadBatch:
+    """Test padding clips into 30-second windows."""
+
+    def test_pad_batch(self):
+        """Test that each clip starts its own zero-padded row."""
+        batch = pad_batch([clip(1), clip(2, 0.2)])
+
+        assert batch.shape == (2, CLIP_SAMPLES) and batch.dtype == np.float32
+        assert batch[0, 15999] == np.float32(0.1) and batch[0, 16000] == 0
+        assert batch[1, 31999] == np.float32(0.2) and not batch[1, 32000:].any()
+
+    def test_fits_batch(self):
+        """Test that clips of up to 30 seconds are batched."""
+        assert fits_batch(clip(30))
+        assert not fits_batch(clip(30.5))
+
+
+class TestTranscribeClips:
+    """Test batched transcription of short clips."""
+
+    @patch('macscribe.batching.get_backend')
+    def test_batches_in_order(self, mock_get_backend):
+        """Test that clips go to the backend batch_size at a time and come back in input order."""
+        engine = mock_get_backend.return_value
+        engine.transcribe_batch.side_effect = lambda batch, model: [f" clip {row[0]:.1f}" for row in batch]
+        clips = [clip(5, value) for value in (0.1, 0.2, 0.3, 0.4, 0.5)]
+
+        results = transcribe_clips(clips, "test-model", batch_size=2)
+
+        assert [call.args[0].shape for call in engine.transcribe_batch.call_args_list] == [
+            (2, CLIP_SAMPLES), (2, CLIP_SAMPLES), (1, CLIP_SAMPLES)
+        ]
+        assert [result["text"] for result in results] == [" clip 0.1", " clip 0.2", " clip 0.3", " clip 0.4", " clip 0.5"]
+        assert results[0]["segments"] == [{"start": 0.0, "end": 5.0, "text": " clip 0.1"}]
+
+    @patch('macscribe.transcriber.transcribe_result')
+    @patch('macscribe.batching.get_backend')
+    def test_long_clips_alone(self, mock_get_backend, mock_result):
+        """Test that clips longer than one window are transcribed on their own."""
+        engine = mock_get_backend.return_value
+        engine.transcribe_batch.return_value = [" Short."]
+        mock_result.return_value = {"text": " Long.", "segments": []}
+        long_clip = clip(45)
+
+        results = transcribe_clips([long_clip, clip(3)], "test-model")
+
+        mock_result.assert_called_once_with(long_clip, "test-model", backend="mlx")
+        assert [result["text"] for result in results] == [" Long.", " Short."]
+
+    @patch('macscribe.batching.get_backend')
+    def test_backend_without_batches(self, mock_get_backend):
+        """Test that backends without transcribe_batch transcribe each clip unpadded."""
+        engine = MagicMock(spec=["transcribe"])
+        engine.transcribe.side_effect = [{"text": " One."}, {"text": ""}]
+        mock_get_backend.return_value = engine
+
+        results = transcribe_clips([clip(2), clip(4)], "test-model")
+
+        assert [len(call.args[0]) for call in engine.transcribe.call_args_list] == [32000, 64000]
+        assert results[1] == {"text": "", "segments": []}
+
+    @patch('macscribe.batching.decode_audio')
+    @patch('macscribe.batching.get_backend')
+    def test_decodes_paths(self, mock_get_backend, mock_decode):
+        """Test that file paths are decoded with the requested decoder."""
+        mock_decode.return_value = clip(1)
+        mock_get_backend.return_value.transcribe_batch.return_value = [" Hi."]
+
+        transcribe_clips(["/path/to/note.m4a"], "test-model", decoder="native")
+
+        mock_decode.assert_called_once_with("/path/to/note.m4a", decoder="native")
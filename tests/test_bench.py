@@ -0,0 +1,180 @@
+import json
+import os
+import numpy as np
+import pytest
+from typer.testing import CliRunner
+from unittest.mock import patch
+
+from macscribe.backends import get_backend
+from macscribe.bench import (
+    STAGES,
+    StandInBackend,
+    compare_to_baseline,
+    format_clip_report,
+    format_decode_report,
+    format_report,
+    read_wav,
+    run_benchmark,
+    run_clip_benchmark,
+    run_decode_benchmark,
+    synthesize_audio,
+    write_wav,
+)
+from macscribe.cli import app
+
+
+def _report(**stages):
+    timings = dict.fromkeys(STAGES, 0.01)
+    timings.update(stages)
+    return {"results": [{"duration": 30.0, "stages": timings, "rtf": 0.1, "peak_rss_bytes": 0}]}
+
+
+class TestSyntheticAudio:
+    """Test synthetic audio generation."""
+
+    def test_wav_round_trip(self, temp_dir):
+        """Test that synthetic audio survives writing and reading a WAV file."""
+        audio = synthesize_audio(2.0)
+        path = os.path.join(temp_dir, "bench.wav")
+
+        write_wav(path, audio)
+
+        assert len(audio) == 32000
+        assert read_wav(path) == pytest.approx(audio, abs=1e-4)
+
+
+class TestStandInBackend:
+    """Test the stand-in backend."""
+
+    def test_registered(self):
+        """Test that importing the bench module registers the stand-in backend."""
+        assert isinstance(get_backend("stand-in"), StandInBackend)
+
+    def test_transcribe(self):
+        """Test that one segment is produced per second of audio."""
+        result = StandInBackend().transcribe(synthesize_audio(3.0), "any-model")
+
+        assert len(result["segments"]) == 3
+        assert result["text"].strip()
+
+
+class TestRunBenchmark:
+    """Test the benchmark run."""
+
+    @patch('macscribe.bench.shutil.which', return_value=None)
+    def test_all_stages_reported(self, mock_which):
+        """Test that every stage is timed and unavailable ones are skipped."""
+        report = run_benchmark([1.0, 2.0], repeat=2)
+
+        assert [result["duration"] for result in report["results"]] == [1.0, 2.0]
+        for result in report["results"]:
+            assert set(result["stages"]) == set(STAGES)
+            assert result["stages"]["decode"] is None
+            assert result["stages"]["clipboard"] is None
+            assert result["stages"]["transcribe_audio"] > 0
+            assert result["rtf"] == result["stages"]["transcribe_audio"] / result["duration"]
+            assert result["peak_rss_bytes"] > 0
+        json.dumps(report)
+        assert "skipped" in format_report(report)
+
+    def test_unknown_backend(self):
+        """Test that an unknown backend is rejected."""
+        with pytest.raises(ValueError, match="Unknown backend"):
+            run_benchmark([1.0], backend="tensorflow")
+
+
+class TestDecodeBenchmark:
+    """Test the short-clip decoder comparison."""
+
+    @patch('macscribe.bench.shutil.which', return_value=None)
+    def test_clips_per_second(self, mock_which):
+        """Test that each decoder reports clips/sec and ffmpeg is skipped when missing."""
+        report = run_decode_benchmark(clips=3, seconds=0.5)
+
+        assert report["decoders"]["ffmpeg"] is None
+        assert report["decoders"]["native"]["clips_per_sec"] > 0
+        table = format_decode_report(report)
+        assert "decoding 3 clips of 0.5s (44100 Hz, 2 ch)" in table
+        assert "skipped" in table.splitlines()[2]
+
+
+class TestClipBenchmark:
+    """Test the short-clip throughput comparison."""
+
+    def test_stand_in_batch(self):
+        """Test that the stand-in backend transcribes padded batches."""
+        batch = np.zeros((3, 480000), dtype=np.float32)
+        batch[0, :16000] = 0.1
+
+        assert StandInBackend().transcribe_batch(batch, "test-model") == [" word"] * 3
+
+    def test_clips_per_second(self):
+        """Test that sequential and batched runs both report clips/sec."""
+        report = run_clip_benchmark(clips=5, seconds=1.0, batch_size=2)
+
+        assert list(report["modes"]) == ["sequential", "batch of 2"]
+        assert all(mode["clips_per_sec"] > 0 for mode in report["modes"].values())
+        assert "transcribing 5 clips of 1s" in format_clip_report(report)
+
+
+class TestCompareToBaseline:
+    """Test regression detection."""
+
+    def test_regression(self):
+        """Test that a stage well over the tolerance is reported."""
+        regressions = compare_to_baseline(_report(transcribe_audio=0.5), _report(transcribe_audio=0.1))
+
+        assert len(regressions) == 1
+        assert regressions[0].startswith("transcribe_audio @ 30s")
+
+    def test_within_tolerance(self):
+        """Test that small relative or absolute slowdowns are ignored."""
+        assert compare_to_baseline(_report(transcribe_audio=0.11), _report(transcribe_audio=0.1)) == []
+        assert compare_to_baseline(_report(validate_input=0.0002), _report(validate_input=0.0001)) == []
+
+    def test_skipped_and_missing(self):
+        """Test that skipped stages and durations missing from the baseline are not compared."""
+        current = _report(decode=None)
+        current["results"].append({"duration": 60.0, "stages": dict.fromkeys(STAGES, 9.0)})
+
+        assert compare_to_baseline(current, _report(decode=0.001)) == []
+
+
+class TestCLIBench:
+    """Test the bench command."""
+
+    def setup_method(self):
+        """Set up test runner."""
+        self.runner = CliRunner()
+
+    def test_json_and_baseline(self, temp_dir):
+        """Test writing results and comparing a later run against them."""
+        path = os.path.join(temp_dir, "bench.json")
+
+        result = self.runner.invoke(
+            app, ["bench", "--duration", "1", "--json", path, "--decode-clips", "2", "--clips", "2", "--batch-size", "2"]
+        )
+        assert result.exit_code == 0
+        assert "real-time factor" in result.stdout
+        assert "clips/sec" in result.stdout
+        with open(path) as f:
+            saved = json.load(f)
+        assert saved["backend"] == "stand-in"
+        assert saved["decode"]["clips"] == 2
+        assert saved["clips"]["batch_size"] == 2
+
+        result = self.runner.invoke(app, ["bench", "--duration", "1", "--baseline", path, "--tolerance", "1000"])
+        assert result.exit_code == 0
+        assert "No regressions against baseline." in result.stdout
+
+    @patch('macscribe.bench.compare_to_baseline', return_value=["decode @ 1s: 1.0 ms -> 9.0 ms (+800%)"])
+    def test_regression_exit_code(self, mock_compare, temp_dir):
+        """Test that regressions fail the command."""
+        path = os.path.join(temp_dir, "bench.json")
+        with open(path, "w") as f:
+            json.dump({"results": []}, f)
+
+        result = self.runner.invoke(app, ["bench", "--duration", "1", "--baseline", path])
+
+        assert result.exit_code == 1
+        assert "decode @ 1s" in result.stdout
@@ -0,0 +1,165 @@
+import os
+import time
+import pytest
+from pathlib import Path
+
+from macscribe.cache import MediaCache, SyncManifest, TranscriptCache, cache_key, default_cache_dir, file_digest
+
+
+class TestCacheKey:
+    """Test cache key construction."""
+
+    def test_same_inputs_same_key(self):
+        """Test that keys are deterministic."""
+        assert cache_key("youtube:abc", "model") == cache_key("youtube:abc", "model")
+
+    def test_model_and_options_change_key(self):
+        """Test that model and decode options are part of the key."""
+        base = cache_key("youtube:abc", "model")
+        assert cache_key("youtube:abc", "other-model") != base
+        assert cache_key("youtube:abc", "model", language="en") != base
+        assert cache_key("youtube:other", "model") != base
+
+
+class TestDefaultCacheDir:
+    """Test cache directory resolution."""
+
+    def test_override(self, monkeypatch, temp_dir):
+        """Test that MACSCRIBE_CACHE_DIR wins."""
+        monkeypatch.setenv("MACSCRIBE_CACHE_DIR", temp_dir)
+        assert default_cache_dir() == Path(temp_dir)
+
+    def test_xdg_cache_home(self, monkeypatch, temp_dir):
+        """Test that XDG_CACHE_HOME is used when there is no override."""
+        monkeypatch.delenv("MACSCRIBE_CACHE_DIR")
+        monkeypatch.setenv("XDG_CACHE_HOME", temp_dir)
+        assert default_cache_dir() == Path(temp_dir) / "macscribe"
+
+
+class TestTranscriptCache:
+    """Test the TranscriptCache store."""
+
+    def test_miss(self, temp_dir):
+        """Test that unknown keys return None."""
+        assert TranscriptCache(Path(temp_dir)).get("missing") is None
+
+    def test_put_and_get(self, temp_dir):
+        """Test a round trip through the cache."""
+        cache = TranscriptCache(Path(temp_dir))
+        cache.put("key", "Cached transcript", "episode")
+
+        entry = cache.get("key")
+
+        assert entry["text"] == "Cached transcript"
+        assert entry["name"] == "episode"
+
+    def test_corrupt_entry_is_miss(self, temp_dir):
+        """Test that unreadable entries are treated as misses."""
+        Path(temp_dir, "key.json").write_text("{not json")
+        assert TranscriptCache(Path(temp_dir)).get("key") is None
+
+    def test_lru_eviction(self, temp_dir):
+        """Test that the least recently used entry is evicted first."""
+        cache = TranscriptCache(Path(temp_dir), max_bytes=10**9)
+        cache.put("old", "a" * 100, "old")
+        cache.put("used", "b" * 100, "used")
+        past = time.time() - 100
+        os.utime(Path(temp_dir, "old.json"), (past, past))
+        os.utime(Path(temp_dir, "used.json"), (past - 10, past - 10))
+        # Reading bumps "used" so "old" is now the least recently used
+        cache.get("used")
+
+        cache.max_bytes = 2 * os.path.getsize(Path(temp_dir, "used.json"))
+        cache.put("new", "c" * 100, "new")
+
+        assert cache.get("old") is None
+        assert cache.get("used") is not None
+        assert cache.get("new") is not None
+
+
+class TestMediaCache:
+    """Test the downloaded-media cache."""
+
+    def _download(self, cache, identity, size=100):
+        path = cache.entry_dir(identity) / "media.webm"
+        path.write_bytes(b"x" * size)
+        cache.put(identity, str(path))
+        return str(path)
+
+    def test_put_and_get(self, temp_dir):
+        """Test that a recorded download is found again by identity."""
+        cache = MediaCache(Path(temp_dir))
+        assert cache.get("youtube:abc") is None
+
+        path = self._download(cache, "youtube:abc")
+
+        assert cache.get("youtube:abc") == path
+        assert cache.get("youtube:other") is None
+
+    def test_partial_download_is_miss(self, temp_dir):
+        """Test that a download that never finished is not returned but its .part file stays for resuming."""
+        cache = MediaCache(Path(temp_dir))
+        part = cache.entry_dir("youtube:abc") / "media.webm.part"
+        part.write_bytes(b"partial")
+
+        assert cache.get("youtube:abc") is None
+        assert cache.entry_dir("youtube:abc") / "media.webm.part" == part and part.exists()
+
+    def test_files_outside_entry_ignored(self, temp_dir, mock_audio_file):
+        """Test that paths outside the entry directory (local inputs) are not recorded."""
+        cache = MediaCache(Path(temp_dir, "media"))
+        cache.put("file:abc", mock_audio_file)
+
+        assert cache.get("file:abc") is None
+
+    def test_lru_eviction(self, temp_dir):
+        """Test that the least recently used download goes first and the newest is never evicted."""
+        cache = MediaCache(Path(temp_dir), max_bytes=10**9)
+        self._download(cache, "old")
+        self._download(cache, "used")
+        past = time.time() - 100
+        os.utime(cache.entry_dir("old") / "entry.json", (past, past))
+        os.utime(cache.entry_dir("used") / "entry.json", (past - 10, past - 10))
+        cache.get("used")
+
+        cache.max_bytes = 350
+        self._download(cache, "new")
+        assert cache.get("old") is None
+        assert cache.get("used") is not None
+
+        cache.max_bytes = 10
+        self._download(cache, "huge", size=1000)
+        assert cache.get("huge") is not None
+        assert cache.get("used") is None and cache.get("new") is None
+
+
+class TestSyncManifest:
+    """Test the manifest of already-transcribed inputs."""
+
+    def test_round_trip(self, temp_dir):
+        """Test that recorded identities are found by a later run."""
+        manifest = SyncManifest(temp_dir)
+        assert "youtube:abc" not in manifest
+
+        manifest.add(["youtube:abc"])
+
+        assert "youtube:abc" in SyncManifest(temp_dir)
+        assert "youtube:other" not in SyncManifest(temp_dir)
+
+    def test_corrupt_manifest_is_empty(self, temp_dir):
+        """Test that an unreadable manifest starts over instead of failing."""
+        Path(temp_dir, SyncManifest.FILENAME).write_text("{not json")
+
+        assert SyncManifest(temp_dir).done == set()
+
+
+def test_file_digest(temp_dir):
+    """Test that file digests depend on content only."""
+    a = Path(temp_dir, "a.mp3")
+    b = Path(temp_dir, "b.mp3")
+    a.write_bytes(b"audio")
+    b.write_bytes(b"audio")
+
+    assert file_digest(str(a)) == file_digest(str(b))
+    b.write_bytes(b"other audio")
+    assert file_digest(str(a)) != file_digest(str(b))
@@ -1,10 +1,15 @@
+import json
 import os
+import numpy as np
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import ANY, patch, MagicMock
 from typer.testing import CliRunner
 from pathlib import Path
 
 from macscribe.cli import app
+from macscribe.daemon import DaemonError
+from macscribe.downloader import MediaInfo
+from macscribe.jobs import Job
 
 
 class TestCLI:
@@ -14,7 +19,7 @@ class TestCLI:
         """Set up test runner."""
         self.runner = CliRunner()
     
-    @patch('macscribe.cli.transcribe_audio')
+    @patch('macscribe.transcriber.transcribe_audio')
     @patch('macscribe.cli.prepare_audio')
     def test_local_audio_file_success(self, mock_prepare, mock_transcribe, mock_audio_file):
         """Test successful transcription of local audio file."""
@@ -33,7 +38,7 @@ class TestCLI:
         mock_prepare.assert_called_once()
         mock_transcribe.assert_called_once_with(mock_audio_file, "mlx-community/whisper-large-v3-mlx")
     
-    @patch('macscribe.cli.transcribe_audio')
+    @patch('macscribe.transcriber.transcribe_audio')
     @patch('macscribe.cli.prepare_audio')
     def test_url_download_success(self, mock_prepare, mock_transcribe):
         """Test successful transcription of URL."""
@@ -64,7 +69,7 @@ class TestCLI:
     
     def test_custom_model(self, mock_audio_file):
         """Test CLI with custom model parameter."""
-        with patch('macscribe.cli.transcribe_audio') as mock_transcribe, \
+        with patch('macscribe.transcriber.transcribe_audio') as mock_transcribe, \
              patch('macscribe.cli.prepare_audio') as mock_prepare:
             
             mock_prepare.return_value = mock_audio_file
@@ -86,7 +91,7 @@ class TestCLI:
         assert result.exit_code == 1
         assert "Error preparing audio: Download failed" in result.stdout
     
-    @patch('macscribe.cli.transcribe_audio')
+    @patch('macscribe.transcriber.transcribe_audio')
     @patch('macscribe.cli.prepare_audio')
     def test_transcribe_error(self, mock_prepare, mock_transcribe, mock_audio_file):
         """Test CLI when transcription fails."""
@@ -100,13 +105,23 @@ class TestCLI:
     
     def test_help_message(self):
         """Test that help message is displayed correctly."""
-        result = self.runner.invoke(app, ["--help"])
+        result = self.runner.invoke(app, ["transcribe", "--help"])
 
         assert result.exit_code == 0
         assert "YouTube/Apple Podcast/X video, or path" in result.stdout
         assert "Hugging Face model to use for" in result.stdout and "transcription" in result.stdout
         assert "--output" in result.stdout or "-o" in result.stdout
         assert "save the transcript" in result.stdout.lower()
+
+    @pytest.mark.parametrize("flag", ["--help", "-h"])
+    def test_group_help_lists_commands(self, flag):
+        """Test that top-level help lists the subcommands instead of only transcribe's options."""
+        result = self.runner.invoke(app, [flag])
+
+        assert result.exit_code == 0
+        for command in ("transcribe", "serve", "bench", "models"):
+            assert command in result.stdout
+        assert "--chunk-length" not in result.stdout
     
     def test_no_args_shows_help(self):
         """Test that running with no arguments shows help."""
@@ -115,6 +130,7 @@ class TestCLI:
         # no_args_is_help=True shows help, exit code may vary by platform (0 or 2)
         assert result.exit_code in [0, 2]
         assert "Usage:" in result.stdout
+        assert "serve" in result.stdout
 
 
 class TestCLIOutputFlag:
@@ -124,7 +140,7 @@ class TestCLIOutputFlag:
         """Set up test runner."""
         self.runner = CliRunner()
 
-    @patch('macscribe.cli.transcribe_audio')
+    @patch('macscribe.transcriber.transcribe_audio')
     @patch('macscribe.cli.prepare_audio')
     def test_output_to_specific_file(self, mock_prepare, mock_transcribe, mock_audio_file, temp_dir):
         """Test --output flag with specific file path."""
@@ -147,7 +163,7 @@ class TestCLIOutputFlag:
             content = f.read()
         assert content == transcript
 
-    @patch('macscribe.cli.transcribe_audio')
+    @patch('macscribe.transcriber.transcribe_audio')
     @patch('macscribe.cli.prepare_audio')
     def test_output_to_directory(self, mock_prepare, mock_transcribe, mock_audio_file, temp_dir):
         """Test --output flag with directory path."""
@@ -169,7 +185,7 @@ class TestCLIOutputFlag:
             content = f.read()
         assert content == transcript
 
-    @patch('macscribe.cli.transcribe_audio')
+    @patch('macscribe.transcriber.transcribe_audio')
     @patch('macscribe.cli.prepare_audio')
     def test_output_short_flag(self, mock_prepare, mock_transcribe, mock_audio_file, temp_dir):
         """Test -o short flag variant."""
@@ -187,7 +203,7 @@ class TestCLIOutputFlag:
             content = f.read()
         assert content == transcript
 
-    @patch('macscribe.cli.transcribe_audio')
+    @patch('macscribe.transcriber.transcribe_audio')
     @patch('macscribe.cli.prepare_audio')
     def test_output_creates_nested_directories(self, mock_prepare, mock_transcribe, mock_audio_file, temp_dir):
         """Test that --output creates nested directories if they don't exist."""
@@ -205,7 +221,7 @@ class TestCLIOutputFlag:
             content = f.read()
         assert content == transcript
 
-    @patch('macscribe.cli.transcribe_audio')
+    @patch('macscribe.transcriber.transcribe_audio')
     @patch('macscribe.cli.prepare_audio')
     def test_output_with_custom_model(self, mock_prepare, mock_transcribe, mock_audio_file, temp_dir):
         """Test --output flag combined with --model flag."""
@@ -226,7 +242,7 @@ class TestCLIOutputFlag:
         assert os.path.exists(output_file)
         mock_transcribe.assert_called_once_with(mock_audio_file, custom_model)
 
-    @patch('macscribe.cli.transcribe_audio')
+    @patch('macscribe.transcriber.transcribe_audio')
     @patch('macscribe.cli.prepare_audio')
     def test_no_output_flag_does_not_save(self, mock_prepare, mock_transcribe, mock_audio_file, temp_dir):
         """Test that without --output flag, no file is saved."""
@@ -246,7 +262,7 @@ class TestCLIOutputFlag:
         assert len(txt_files) == 0
 
     @patch('macscribe.cli.save_transcript_to_file')
-    @patch('macscribe.cli.transcribe_audio')
+    @patch('macscribe.transcriber.transcribe_audio')
     @patch('macscribe.cli.prepare_audio')
     def test_output_save_error_handling(self, mock_prepare, mock_transcribe, mock_save, mock_audio_file):
         """Test error handling when saving transcript fails."""
@@ -283,4 +299,1160 @@ class TestCLIIntegration:
         result = self.runner.invoke(app, [mock_unsupported_file])
 
         assert result.exit_code == 1
-        assert "Invalid input" in result.stdout
\ No newline at end of file
+        assert "Invalid input" in result.stdout
+
+class TestCLIBatch:
+    """Test transcribing several inputs in one invocation."""
+
+    def setup_method(self):
+        """Set up test runner."""
+        self.runner = CliRunner()
+
+    @patch('macscribe.transcriber.transcribe_audio')
+    @patch('macscribe.cli.prepare_audio')
+    def test_multiple_positional_inputs(self, mock_prepare, mock_transcribe, mock_audio_file, mock_video_file, temp_dir):
+        """Test that each input gets its own transcript file."""
+        mock_prepare.side_effect = lambda source, tmpdir: source
+        mock_transcribe.side_effect = lambda audio, model, copy: f"Transcript of {Path(audio).stem}"
+        output_dir = os.path.join(temp_dir, "out")
+
+        result = self.runner.invoke(app, [mock_audio_file, mock_video_file, "--output", output_dir])
+
+        assert result.exit_code == 0
+        assert "Done: 2 of 2 inputs transcribed." in result.stdout
+        assert mock_transcribe.call_count == 2
+        mock_transcribe.assert_any_call(mock_audio_file, "mlx-community/whisper-large-v3-mlx", copy=False)
+        with open(os.path.join(output_dir, "test_audio.txt")) as f:
+            assert f.read() == "Transcript of test_audio"
+        with open(os.path.join(output_dir, "test_video.txt")) as f:
+            assert f.read() == "Transcript of test_video"
+
+    @patch('macscribe.transcriber.transcribe_audio')
+    @patch('macscribe.cli.prepare_audio')
+    def test_from_file(self, mock_prepare, mock_transcribe, mock_audio_file, mock_video_file, temp_dir):
+        """Test reading inputs from a list file, skipping blanks and comments."""
+        list_file = os.path.join(temp_dir, "inputs.txt")
+        with open(list_file, "w") as f:
+            f.write(f"# episodes\n{mock_audio_file}\n\n{mock_video_file}\n")
+        mock_prepare.side_effect = lambda source, tmpdir: source
+        mock_transcribe.return_value = "Transcript"
+
+        result = self.runner.invoke(app, ["--from-file", list_file, "-o", temp_dir])
+
+        assert result.exit_code == 0
+        assert mock_transcribe.call_count == 2
+        assert "Done: 2 of 2 inputs transcribed." in result.stdout
+
+    @patch('macscribe.transcriber.transcribe_audio')
+    @patch('macscribe.cli.prepare_audio')
+    def test_from_stdin(self, mock_prepare, mock_transcribe, mock_audio_file, temp_dir):
+        """Test reading inputs from stdin."""
+        mock_prepare.side_effect = lambda source, tmpdir: source
+        mock_transcribe.return_value = "Transcript"
+
+        result = self.runner.invoke(app, ["--from-file", "-", "-o", temp_dir], input=f"{mock_audio_file}\n")
+
+        assert result.exit_code == 0
+        assert "Done: 1 of 1 inputs transcribed." in result.stdout
+
+    @patch('macscribe.transcriber.transcribe_audio')
+    @patch('macscribe.cli.prepare_audio')
+    def test_failures_do_not_stop_batch(self, mock_prepare, mock_transcribe, mock_audio_file, mock_video_file, temp_dir):
+        """Test that a failing input is reported and the rest still run."""
+        mock_prepare.side_effect = lambda source, tmpdir: source
+        def transcribe(audio, model, copy):
+            if audio == mock_audio_file:
+                raise Exception("Transcription failed")
+            return "Second transcript"
+        mock_transcribe.side_effect = transcribe
+
+        result = self.runner.invoke(app, [mock_audio_file, "invalid_input", mock_video_file, "-o", temp_dir])
+
+        assert result.exit_code == 1
+        assert "Error during transcription: Transcription failed" in result.stdout
+        assert "Done: 1 of 3 inputs transcribed." in result.stdout
+        assert "Failed: invalid_input" in result.stdout
+        assert os.path.exists(os.path.join(temp_dir, "test_video.txt"))
+
+
+    @patch('macscribe.audio.decode_audio')
+    @patch('macscribe.transcriber.transcribe_audio')
+    @patch('macscribe.cli.prepare_audio')
+    def test_batch_predecode(self, mock_prepare, mock_transcribe, mock_decode, mock_audio_file, mock_video_file, temp_dir):
+        """Test that --predecode hands PCM arrays to the transcriber."""
+        mock_prepare.side_effect = lambda source, tmpdir: source
+        mock_decode.side_effect = lambda path: f"pcm:{path}"
+        mock_transcribe.return_value = "Transcript"
+
+        result = self.runner.invoke(app, [mock_audio_file, mock_video_file, "-o", temp_dir, "--predecode", "--no-cache"])
+
+        assert result.exit_code == 0
+        mock_transcribe.assert_any_call(f"pcm:{mock_audio_file}", "mlx-community/whisper-large-v3-mlx", copy=False)
+
+    @patch('macscribe.batching.transcribe_clips')
+    @patch('macscribe.audio.decode_audio')
+    @patch('macscribe.transcriber.transcribe_audio')
+    @patch('macscribe.cli.prepare_audio')
+    def test_batch_size(self, mock_prepare, mock_transcribe, mock_decode, mock_clips, temp_dir):
+        """Test that --batch-size collects short inputs into batches and transcribes long ones alone."""
+        paths = []
+        for name in ("a.m4a", "b.m4a", "long.mp3", "c.m4a"):
+            paths.append(os.path.join(temp_dir, name))
+            Path(paths[-1]).touch()
+        mock_prepare.side_effect = lambda source, tmpdir: source
+        mock_decode.side_effect = lambda path: np.zeros(16000 * (40 if "long" in path else 5), dtype=np.float32)
+        mock_clips.side_effect = lambda clips, model, **kwargs: [{"text": " Note.", "segments": []} for _ in clips]
+        mock_transcribe.return_value = "Long transcript"
+        output_dir = os.path.join(temp_dir, "out")
+
+        result = self.runner.invoke(app, paths + ["-o", output_dir, "--batch-size", "2", "--download-workers", "1", "--no-cache"])
+
+        assert result.exit_code == 0
+        assert [len(call.args[0]) for call in mock_clips.call_args_list] == [2, 1]
+        assert mock_clips.call_args.kwargs == {"backend": "mlx", "batch_size": 2}
+        assert len(mock_transcribe.call_args[0][0]) == 16000 * 40
+        assert sorted(os.listdir(output_dir)) == ["a.txt", "b.txt", "c.txt", "long.txt"]
+        with open(os.path.join(output_dir, "c.txt")) as f:
+            assert f.read() == " Note."
+
+    def test_batch_size_with_word_timestamps(self, mock_audio_file, mock_video_file):
+        """Test that batching, which has no timestamps inside a clip, refuses --word-timestamps."""
+        result = self.runner.invoke(app, [mock_audio_file, mock_video_file, "--batch-size", "4", "--word-timestamps"])
+
+        assert result.exit_code == 1
+        assert "--batch-size" in result.stdout
+
+    @patch('macscribe.cli.copy_to_clipboard')
+    @patch('macscribe.batching.transcribe_clips')
+    @patch('macscribe.audio.decode_audio')
+    @patch('macscribe.transcriber.transcribe_audio')
+    @patch('macscribe.cli.prepare_audio')
+    def test_batched_clips_cached_separately(
+        self, mock_prepare, mock_transcribe, mock_decode, mock_clips, mock_clipboard, temp_dir
+    ):
+        """Test that a batched clip's transcript is reused by batched runs but never by a normal run."""
+        paths = []
+        for name in ("a.m4a", "b.m4a"):
+            paths.append(os.path.join(temp_dir, name))
+            Path(paths[-1]).write_bytes(name.encode())
+        mock_prepare.side_effect = lambda source, tmpdir: source
+        mock_decode.side_effect = lambda path: np.zeros(16000 * 5, dtype=np.float32)
+        mock_clips.side_effect = lambda clips, model, **kwargs: [{"text": " Note.", "segments": []} for _ in clips]
+        mock_transcribe.return_value = "Full transcript"
+        output_dir = os.path.join(temp_dir, "out")
+
+        self.runner.invoke(app, paths + ["-o", output_dir, "--batch-size", "2", "--download-workers", "1"])
+        result = self.runner.invoke(app, paths + ["-o", output_dir, "--batch-size", "2", "--download-workers", "1"])
+        assert result.stdout.count("(cached)") == 2
+        assert mock_clips.call_count == 1
+
+        result = self.runner.invoke(app, [paths[0]])
+        assert result.exit_code == 0
+        assert "Using cached transcript." not in result.stdout
+        mock_transcribe.assert_called_once()
+
+class TestCLICache:
+    """Test the transcript cache integration."""
+
+    def setup_method(self):
+        """Set up test runner."""
+        self.runner = CliRunner()
+
+    @patch('macscribe.cli.copy_to_clipboard')
+    @patch('macscribe.transcriber.transcribe_audio')
+    @patch('macscribe.cli.prepare_audio')
+    def test_second_run_hits_cache(self, mock_prepare, mock_transcribe, mock_clipboard, mock_audio_file, temp_dir):
+        """Test that a repeated run skips prepare and transcribe."""
+        mock_prepare.return_value = mock_audio_file
+        mock_transcribe.return_value = "Cached transcript"
+
+        self.runner.invoke(app, [mock_audio_file])
+        result = self.runner.invoke(app, [mock_audio_file, "-o", temp_dir])
+
+        assert result.exit_code == 0
+        assert "Using cached transcript." in result.stdout
+        assert mock_prepare.call_count == 1
+        assert mock_transcribe.call_count == 1
+        mock_clipboard.assert_called_once_with("Cached transcript")
+        with open(os.path.join(temp_dir, "test_audio.txt")) as f:
+            assert f.read() == "Cached transcript"
+
+    @patch('macscribe.cli.copy_to_clipboard')
+    @patch('macscribe.transcriber.transcribe_audio')
+    @patch('macscribe.cli.prepare_audio')
+    def test_decoder_shares_cache(self, mock_prepare, mock_transcribe, mock_clipboard, mock_audio_file):
+        """Test that --decoder native reaches the transcriber and doesn't change the cache key."""
+        mock_prepare.side_effect = lambda source, tmpdir: source
+        mock_transcribe.return_value = "Transcript"
+
+        result = self.runner.invoke(app, [mock_audio_file, "--decoder", "native"])
+        assert result.exit_code == 0
+        mock_transcribe.assert_called_once_with(mock_audio_file, "mlx-community/whisper-large-v3-mlx", decoder="native")
+
+        result = self.runner.invoke(app, [mock_audio_file])
+        assert result.exit_code == 0
+        assert mock_transcribe.call_count == 1
+
+    @patch('macscribe.transcriber.transcribe_audio')
+    @patch('macscribe.cli.prepare_audio')
+    def test_model_change_misses_cache(self, mock_prepare, mock_transcribe, mock_audio_file):
+        """Test that a different model is transcribed again."""
+        mock_prepare.return_value = mock_audio_file
+        mock_transcribe.return_value = "Transcript"
+
+        self.runner.invoke(app, [mock_audio_file])
+        self.runner.invoke(app, [mock_audio_file, "--model", "custom/whisper-model"])
+
+        assert mock_transcribe.call_count == 2
+
+    @patch('macscribe.transcriber.transcribe_audio')
+    @patch('macscribe.cli.prepare_audio')
+    def test_no_cache(self, mock_prepare, mock_transcribe, mock_audio_file, isolated_cache_dir):
+        """Test that --no-cache neither reads nor writes the cache."""
+        mock_prepare.return_value = mock_audio_file
+        mock_transcribe.return_value = "Transcript"
+
+        self.runner.invoke(app, [mock_audio_file, "--no-cache"])
+        self.runner.invoke(app, [mock_audio_file, "--no-cache"])
+
+        assert mock_transcribe.call_count == 2
+        assert not isolated_cache_dir.exists()
+
+    @patch('macscribe.transcriber.transcribe_audio')
+    @patch('macscribe.cli.prepare_audio')
+    def test_refresh(self, mock_prepare, mock_transcribe, mock_audio_file, temp_dir):
+        """Test that --refresh transcribes again and updates the cache."""
+        mock_prepare.return_value = mock_audio_file
+        mock_transcribe.side_effect = ["Old transcript", "New transcript"]
+
+        self.runner.invoke(app, [mock_audio_file])
+        self.runner.invoke(app, [mock_audio_file, "--refresh"])
+        with patch('macscribe.cli.copy_to_clipboard'):
+            result = self.runner.invoke(app, [mock_audio_file, "-o", temp_dir])
+
+        assert mock_transcribe.call_count == 2
+        assert "Using cached transcript." in result.stdout
+        with open(os.path.join(temp_dir, "test_audio.txt")) as f:
+            assert f.read() == "New transcript"
+
+    @patch('macscribe.transcriber.transcribe_audio')
+    @patch('macscribe.cli.prepare_audio')
+    def test_batch_uses_cache(self, mock_prepare, mock_transcribe, mock_audio_file, mock_video_file, temp_dir):
+        """Test that cached inputs in a batch skip the pipeline."""
+        mock_prepare.side_effect = lambda source, tmpdir: source
+        mock_transcribe.return_value = "Transcript"
+        Path(mock_video_file).write_bytes(b"different content")
+
+        self.runner.invoke(app, [mock_audio_file, "-o", temp_dir])
+        result = self.runner.invoke(app, [mock_audio_file, mock_video_file, "-o", temp_dir])
+
+        assert result.exit_code == 0
+        assert "(cached)" in result.stdout
+        assert "Done: 2 of 2 inputs transcribed." in result.stdout
+        assert mock_transcribe.call_count == 2
+
+
+class TestCLIChunking:
+    """Test the long-audio chunking options."""
+
+    def setup_method(self):
+        """Set up test runner."""
+        self.runner = CliRunner()
+
+    @patch('macscribe.transcriber.transcribe_audio')
+    @patch('macscribe.cli.prepare_audio')
+    def test_chunk_options(self, mock_prepare, mock_transcribe, mock_audio_file):
+        """Test that long-audio options reach transcribe_audio and get their own cache entry."""
+        mock_prepare.return_value = mock_audio_file
+        mock_transcribe.return_value = "Transcript"
+
+        self.runner.invoke(app, [mock_audio_file])
+        result = self.runner.invoke(app, [mock_audio_file, "--chunk-length", "600", "--chunk-workers", "4"])
+
+        assert result.exit_code == 0
+        assert mock_transcribe.call_count == 2
+        mock_transcribe.assert_called_with(
+            mock_audio_file, "mlx-community/whisper-large-v3-mlx",
+            chunk_length=600.0, chunk_overlap=1.0, chunk_workers=4, checkpoint=ANY,
+        )
+
+
+class TestCLIBackend:
+    """Test choosing the transcription backend."""
+
+    def setup_method(self):
+        """Set up test runner."""
+        self.runner = CliRunner()
+
+    @patch('macscribe.transcriber.transcribe_audio')
+    @patch('macscribe.cli.prepare_audio')
+    def test_backend_option(self, mock_prepare, mock_transcribe, mock_audio_file):
+        """Test that --backend reaches transcribe_audio and gets its own cache entry."""
+        mock_prepare.return_value = mock_audio_file
+        mock_transcribe.return_value = "Transcript"
+
+        self.runner.invoke(app, [mock_audio_file])
+        result = self.runner.invoke(app, [mock_audio_file, "--backend", "faster-whisper"])
+
+        assert result.exit_code == 0
+        assert mock_transcribe.call_count == 2
+        mock_transcribe.assert_called_with(
+            mock_audio_file, "mlx-community/whisper-large-v3-mlx", backend="faster-whisper"
+        )
+
+
+class TestCLIStream:
+    """Test the --stream option."""
+
+    def setup_method(self):
+        """Set up test runner."""
+        self.runner = CliRunner()
+
+    @patch('macscribe.cli.copy_to_clipboard')
+    @patch('macscribe.transcriber.iter_segments')
+    @patch('macscribe.cli.prepare_audio')
+    def test_stream_to_stdout_and_file(self, mock_prepare, mock_segments, mock_clipboard, mock_audio_file, temp_dir):
+        """Test that segments are printed and appended to the output file."""
+        mock_prepare.return_value = mock_audio_file
+        mock_segments.return_value = iter([
+            {"start": 0.0, "end": 2.0, "text": " Hello"},
+            {"start": 2.0, "end": 4.0, "text": " world."},
+        ])
+        output_file = os.path.join(temp_dir, "stream.txt")
+
+        result = self.runner.invoke(app, [mock_audio_file, "--stream", "-o", output_file])
+
+        assert result.exit_code == 0
+        assert "[00:00:00.000 --> 00:00:02.000] Hello" in result.stdout
+        assert "[00:00:02.000 --> 00:00:04.000] world." in result.stdout
+        mock_clipboard.assert_called_once_with(" Hello world.")
+        with open(output_file) as f:
+            assert f.read() == " Hello world."
+
+    @patch('macscribe.cli.copy_to_clipboard')
+    @patch('macscribe.transcriber.iter_segments')
+    @patch('macscribe.cli.prepare_audio')
+    def test_stream_jsonl(self, mock_prepare, mock_segments, mock_clipboard, mock_audio_file, temp_dir):
+        """Test JSON lines output to a directory."""
+        mock_prepare.return_value = mock_audio_file
+        mock_segments.return_value = iter([{"start": 0.0, "end": 2.0, "text": " Hello"}])
+
+        result = self.runner.invoke(app, [mock_audio_file, "--stream", "--stream-format", "jsonl", "-o", temp_dir])
+
+        assert result.exit_code == 0
+        assert '{"start": 0.0, "end": 2.0, "text": " Hello"}' in result.stdout
+        with open(os.path.join(temp_dir, "test_audio.jsonl")) as f:
+            assert f.read() == '{"start": 0.0, "end": 2.0, "text": " Hello"}\n'
+
+    @patch('macscribe.transcriber.iter_segments')
+    @patch('macscribe.cli.prepare_audio')
+    def test_stream_empty(self, mock_prepare, mock_segments, mock_audio_file):
+        """Test that an empty stream is reported as a transcription error."""
+        mock_prepare.return_value = mock_audio_file
+        mock_segments.return_value = iter([])
+
+        result = self.runner.invoke(app, [mock_audio_file, "--stream"])
+
+        assert result.exit_code == 1
+        assert "Error during transcription: No transcription result." in result.stdout
+
+    @patch('macscribe.transcriber.transcribe_audio')
+    def test_stream_with_several_inputs(self, mock_transcribe, mock_audio_file, mock_video_file):
+        """Test that --stream is refused rather than ignored when the run is a batch."""
+        result = self.runner.invoke(app, [mock_audio_file, mock_video_file, "--stream"])
+
+        assert result.exit_code == 1
+        assert "--stream applies to a single input" in result.stdout
+        mock_transcribe.assert_not_called()
+
+
+class TestCLITrimSilence:
+    """Test the --trim-silence option."""
+
+    def setup_method(self):
+        """Set up test runner."""
+        self.runner = CliRunner()
+
+    @patch('macscribe.audio.decode_audio')
+    @patch('macscribe.transcriber.transcribe_audio')
+    @patch('macscribe.cli.prepare_audio')
+    def test_trimmed_audio_is_transcribed(self, mock_prepare, mock_transcribe, mock_decode, mock_audio_file):
+        """Test that the trimmed array is transcribed and the skip is reported."""
+        audio = np.concatenate([np.zeros(16000 * 10, dtype=np.float32), np.full(16000 * 10, 0.3, dtype=np.float32)])
+        mock_prepare.return_value = mock_audio_file
+        mock_decode.return_value = audio
+        mock_transcribe.return_value = "Transcript"
+
+        result = self.runner.invoke(app, [mock_audio_file, "--trim-silence"])
+
+        assert result.exit_code == 0
+        assert "Skipped" in result.stdout and "non-speech audio" in result.stdout
+        transcribed = mock_transcribe.call_args[0][0]
+        assert len(transcribed) < len(audio)
+
+    @patch('macscribe.audio.decode_audio')
+    @patch('macscribe.cli.prepare_audio')
+    def test_no_speech(self, mock_prepare, mock_decode, mock_audio_file):
+        """Test that silent input is reported instead of transcribed."""
+        mock_prepare.return_value = mock_audio_file
+        mock_decode.return_value = np.zeros(16000 * 5, dtype=np.float32)
+
+        result = self.runner.invoke(app, [mock_audio_file, "--trim-silence"])
+
+        assert result.exit_code == 1
+        assert "No speech detected." in result.stdout
+
+    @patch('macscribe.cli.copy_to_clipboard')
+    @patch('macscribe.transcriber.iter_segments')
+    @patch('macscribe.audio.decode_audio')
+    @patch('macscribe.cli.prepare_audio')
+    def test_stream_timestamps_are_original(self, mock_prepare, mock_decode, mock_segments, mock_clipboard, mock_audio_file):
+        """Test that streamed timestamps refer to the untrimmed audio."""
+        audio = np.concatenate([np.zeros(16000 * 10, dtype=np.float32), np.full(16000 * 10, 0.3, dtype=np.float32)])
+        mock_prepare.return_value = mock_audio_file
+        mock_decode.return_value = audio
+        mock_segments.return_value = iter([{"start": 0.0, "end": 2.0, "text": " Hello"}])
+
+        result = self.runner.invoke(app, [mock_audio_file, "--trim-silence", "--stream", "--stream-format", "jsonl"])
+
+        assert result.exit_code == 0
+        line = [l for l in result.stdout.splitlines() if l.startswith("{")][0]
+        assert 9.5 < json.loads(line)["start"] < 10.0
+
+
+class TestCLIDaemon:
+    """Test forwarding to a running daemon and the serve command."""
+
+    def setup_method(self):
+        """Set up test runner."""
+        self.runner = CliRunner()
+
+    @patch('macscribe.cli.copy_to_clipboard')
+    @patch('macscribe.cli.request_transcription')
+    @patch('macscribe.cli.is_running', return_value=True)
+    @patch('macscribe.transcriber.transcribe_audio')
+    def test_forwards_to_daemon(self, mock_transcribe, mock_running, mock_request, mock_clipboard, mock_audio_file, temp_dir):
+        """Test that a running daemon does the work instead of this process."""
+        mock_request.return_value = {"ok": True, "text": "Daemon transcript", "name": "test_audio"}
+
+        result = self.runner.invoke(app, [mock_audio_file, "-o", temp_dir])
+
+        assert result.exit_code == 0
+        assert "Transcription copied to clipboard." in result.stdout
+        mock_transcribe.assert_not_called()
+        mock_request.assert_called_once_with(mock_audio_file, "mlx-community/whisper-large-v3-mlx", {}, segments=False, download={})
+        mock_clipboard.assert_called_once_with("Daemon transcript")
+        with open(os.path.join(temp_dir, "test_audio.txt")) as f:
+            assert f.read() == "Daemon transcript"
+
+    @patch('macscribe.cli.copy_to_clipboard')
+    @patch('macscribe.cli.request_transcription')
+    @patch('macscribe.cli.is_running', return_value=True)
+    @patch('macscribe.transcriber.transcribe_audio')
+    @patch('macscribe.cli.prepare_audio')
+    def test_urls_needing_local_audio(self, mock_prepare, mock_transcribe, mock_running, mock_request, mock_clipboard, temp_dir):
+        """Test that URLs stay out of the daemon when their audio goes to the media cache or is kept."""
+        def download(source, tmpdir, **download_options):
+            path = os.path.join(tmpdir, "abc.webm")
+            Path(path).touch()
+            return path
+
+        mock_prepare.side_effect = download
+        mock_transcribe.return_value = "Local transcript"
+        mock_request.return_value = {"ok": True, "text": "Daemon transcript", "name": "abc"}
+        url = "https://www.youtube.com/watch?v=abc"
+
+        result = self.runner.invoke(app, [url, "--refresh"])
+        assert result.exit_code == 0
+        result = self.runner.invoke(app, [url, "--no-cache", "--keep-audio", "-o", temp_dir])
+        assert result.exit_code == 0
+        assert "Audio saved to:" in result.stdout
+        assert mock_transcribe.call_count == 2
+        mock_request.assert_not_called()
+
+        result = self.runner.invoke(app, [url, "--no-cache"])
+        assert result.exit_code == 0
+        mock_request.assert_called_once()
+
+    @patch('macscribe.cli.request_transcription')
+    @patch('macscribe.cli.is_running', return_value=True)
+    def test_daemon_error(self, mock_running, mock_request, mock_audio_file):
+        """Test that daemon-side failures use the usual error messages."""
+        mock_request.side_effect = DaemonError("prepare", "Download failed")
+
+        result = self.runner.invoke(app, [mock_audio_file])
+
+        assert result.exit_code == 1
+        assert "Error preparing audio: Download failed" in result.stdout
+
+    @patch('macscribe.cli.request_transcription')
+    @patch('macscribe.cli.is_running', return_value=True)
+    @patch('macscribe.transcriber.transcribe_audio')
+    @patch('macscribe.cli.prepare_audio')
+    def test_no_daemon_flag(self, mock_prepare, mock_transcribe, mock_running, mock_request, mock_audio_file):
+        """Test that --no-daemon transcribes locally."""
+        mock_prepare.return_value = mock_audio_file
+        mock_transcribe.return_value = "Local transcript"
+
+        result = self.runner.invoke(app, [mock_audio_file, "--no-daemon"])
+
+        assert result.exit_code == 0
+        mock_request.assert_not_called()
+        mock_transcribe.assert_called_once()
+
+    def test_serve_help(self):
+        """Test that serve is reachable as a subcommand."""
+        result = self.runner.invoke(app, ["serve", "--help"])
+
+        assert result.exit_code == 0
+        assert "--socket" in result.stdout
+
+    @patch('macscribe.cli.TranscriptionServer')
+    def test_serve_runs_server(self, mock_server):
+        """Test that serve warms the model and serves until interrupted."""
+        mock_server.return_value.serve_forever.side_effect = KeyboardInterrupt
+
+        result = self.runner.invoke(app, ["serve", "--socket", "/tmp/macscribe-test.sock"])
+
+        assert result.exit_code == 0
+        mock_server.return_value.warm_up.assert_called_once()
+        mock_server.return_value.server_close.assert_called_once()
+
+
+class TestCLIProfile:
+    """Test the --profile, --metrics-json and --profile-dump options."""
+
+    def setup_method(self):
+        """Set up test runner."""
+        self.runner = CliRunner()
+
+    @patch('macscribe.cli.is_running', return_value=True)
+    @patch('macscribe.transcriber.get_backend')
+    @patch('macscribe.audio.subprocess.run')
+    @patch('macscribe.transcriber.copy_to_clipboard')
+    def test_profile_summary_and_json(self, mock_clipboard, mock_run, mock_get_backend, mock_running, mock_audio_file, temp_dir):
+        """Test that every stage is reported, in-process even when a daemon runs."""
+        mock_run.return_value.stdout = np.zeros(16000 * 2, dtype=np.int16).tobytes()
+        mock_get_backend.return_value.transcribe.return_value = {"text": "Hello"}
+        metrics_path = os.path.join(temp_dir, "metrics.json")
+
+        result = self.runner.invoke(app, [mock_audio_file, "--profile", "--metrics-json", metrics_path])
+
+        assert result.exit_code == 0
+        assert "Total:" in result.stdout
+        with open(metrics_path) as f:
+            data = json.load(f)
+        stages = {s["name"]: s for s in data["stages"]}
+        assert list(stages) == ["validate", "cache_lookup", "decode", "model_load", "transcribe"]
+        assert stages["decode"]["bytes"] == 64000
+        assert stages["transcribe"]["audio_seconds"] == 2.0
+        assert data["audio_seconds"] == 2.0
+
+    @patch('macscribe.transcriber.transcribe_audio')
+    @patch('macscribe.cli.prepare_audio')
+    def test_profile_dump_on_failure(self, mock_prepare, mock_transcribe, mock_audio_file, temp_dir):
+        """Test that the cProfile dump and summary are still written when the run fails."""
+        mock_prepare.return_value = mock_audio_file
+        mock_transcribe.side_effect = Exception("Model failed")
+        dump_path = os.path.join(temp_dir, "run.prof")
+
+        result = self.runner.invoke(app, [mock_audio_file, "--profile", "--profile-dump", dump_path])
+
+        assert result.exit_code == 1
+        assert "Error during transcription: Model failed" in result.stdout
+        assert "validate" in result.stdout
+        assert os.path.getsize(dump_path) > 0
+
+
+class TestCLIResume:
+    """Test checkpointed long-audio runs and --resume."""
+
+    def setup_method(self):
+        """Set up test runner."""
+        self.runner = CliRunner()
+
+    @patch('macscribe.cli.copy_to_clipboard')
+    @patch('macscribe.transcriber.transcribe_audio')
+    @patch('macscribe.cli.prepare_audio')
+    def test_resume_after_failure(self, mock_prepare, mock_transcribe, mock_clipboard, mock_audio_file, isolated_cache_dir):
+        """Test that a failed long-audio run keeps its job and --resume reuses it."""
+        downloads = []
+
+        def prepare(input_source, temp_path):
+            path = os.path.join(temp_path, "abc.webm")
+            open(path, "wb").close()
+            downloads.append(temp_path)
+            return path
+        mock_prepare.side_effect = prepare
+        mock_transcribe.side_effect = Exception("Interrupted")
+
+        result = self.runner.invoke(app, [mock_audio_file, "--chunk-length", "300"])
+
+        assert result.exit_code == 1
+        assert "Progress saved. Run the same command with --resume to continue." in result.stdout
+        jobs = list((isolated_cache_dir / "jobs").iterdir())
+        assert len(jobs) == 1
+        assert downloads == [str(jobs[0] / "media")]
+
+        mock_transcribe.side_effect = None
+        mock_transcribe.return_value = "Transcript"
+        result = self.runner.invoke(app, [mock_audio_file, "--resume"])
+
+        assert result.exit_code == 0
+        assert "Resuming: 0 chunk(s) already transcribed." in result.stdout
+        assert "Using audio saved by the interrupted run..." in result.stdout
+        assert mock_prepare.call_count == 1
+        kwargs = mock_transcribe.call_args.kwargs
+        assert kwargs["chunk_length"] == 300.0
+        assert isinstance(kwargs["checkpoint"], Job)
+        assert not (isolated_cache_dir / "jobs" / jobs[0].name).exists()
+
+    @patch('macscribe.cli.copy_to_clipboard')
+    @patch('macscribe.transcriber.transcribe_audio')
+    @patch('macscribe.cli.prepare_audio')
+    def test_resume_without_job(self, mock_prepare, mock_transcribe, mock_clipboard, mock_audio_file):
+        """Test that --resume without an interrupted run starts a new long-audio run."""
+        mock_prepare.return_value = mock_audio_file
+        mock_transcribe.return_value = "Transcript"
+
+        result = self.runner.invoke(app, [mock_audio_file, "--resume"])
+
+        assert result.exit_code == 0
+        assert "No interrupted job to resume; starting a new one." in result.stdout
+        assert mock_transcribe.call_args.kwargs["chunk_length"] == 600.0
+
+    @patch('macscribe.transcriber.transcribe_audio')
+    def test_resume_with_several_inputs(self, mock_transcribe, mock_audio_file, mock_video_file):
+        """Test that --resume is refused where no job would be checkpointed."""
+        result = self.runner.invoke(app, [mock_audio_file, mock_video_file, "--resume"])
+
+        assert result.exit_code == 1
+        assert "--resume applies to a single input" in result.stdout
+        mock_transcribe.assert_not_called()
+
+    @patch('macscribe.transcriber.transcribe_audio')
+    @patch('macscribe.cli.prepare_audio')
+    def test_plain_runs_are_not_checkpointed(self, mock_prepare, mock_transcribe, mock_audio_file, isolated_cache_dir):
+        """Test that runs without long-audio mode leave no job behind."""
+        mock_prepare.return_value = mock_audio_file
+        mock_transcribe.side_effect = Exception("Model failed")
+
+        result = self.runner.invoke(app, [mock_audio_file])
+
+        assert result.exit_code == 1
+        assert "--resume" not in result.stdout
+        assert not (isolated_cache_dir / "jobs").exists()
+
+
+class TestCLIMediaCache:
+    """Test the download cache and --keep-audio."""
+
+    url = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+
+    def setup_method(self):
+        """Set up test runner."""
+        self.runner = CliRunner()
+
+    def _fake_download(self, input_source, temp_path):
+        path = os.path.join(temp_path, "dQw4w9WgXcQ.webm")
+        with open(path, "wb") as f:
+            f.write(b"audio")
+        return path
+
+    @patch('macscribe.cli.copy_to_clipboard')
+    @patch('macscribe.transcriber.transcribe_audio')
+    @patch('macscribe.cli.prepare_audio')
+    def test_other_model_reuses_download(self, mock_prepare, mock_transcribe, mock_clipboard):
+        """Test that a second model on the same URL needs no download."""
+        mock_prepare.side_effect = self._fake_download
+        mock_transcribe.return_value = "Transcript"
+
+        self.runner.invoke(app, [self.url])
+        result = self.runner.invoke(app, [self.url, "--model", "mlx-community/whisper-tiny"])
+
+        assert result.exit_code == 0
+        assert "Using cached audio..." in result.stdout
+        assert mock_prepare.call_count == 1
+        assert mock_transcribe.call_args[0][0].endswith("dQw4w9WgXcQ.webm")
+
+    @patch('macscribe.cli.copy_to_clipboard')
+    @patch('macscribe.transcriber.transcribe_audio')
+    @patch('macscribe.cli.prepare_audio')
+    def test_no_cache_downloads_again(self, mock_prepare, mock_transcribe, mock_clipboard):
+        """Test that --no-cache skips the download cache too."""
+        mock_prepare.side_effect = self._fake_download
+        mock_transcribe.return_value = "Transcript"
+
+        self.runner.invoke(app, [self.url, "--no-cache"])
+        self.runner.invoke(app, [self.url, "--no-cache", "--model", "mlx-community/whisper-tiny"])
+
+        assert mock_prepare.call_count == 2
+
+    @patch('macscribe.cli.copy_to_clipboard')
+    @patch('macscribe.transcriber.transcribe_audio')
+    @patch('macscribe.cli.prepare_audio')
+    def test_keep_audio(self, mock_prepare, mock_transcribe, mock_clipboard, temp_dir):
+        """Test that --keep-audio saves the download next to the transcript."""
+        mock_prepare.side_effect = self._fake_download
+        mock_transcribe.return_value = "Transcript"
+
+        result = self.runner.invoke(app, [self.url, "-o", temp_dir, "--keep-audio"])
+
+        assert result.exit_code == 0
+        assert "Audio saved to:" in result.stdout
+        with open(os.path.join(temp_dir, "dQw4w9WgXcQ.webm"), "rb") as f:
+            assert f.read() == b"audio"
+        assert os.path.exists(os.path.join(temp_dir, "dQw4w9WgXcQ.txt"))
+
+
+class TestCLISync:
+    """Test playlist and feed expansion with incremental sync."""
+
+    feed = "https://feeds.example.com/show.rss"
+    episodes = ["https://cdn.example.com/ep1.mp3", "https://cdn.example.com/ep2.mp3"]
+
+    def setup_method(self):
+        """Set up test runner."""
+        self.runner = CliRunner()
+
+    def _fake_download(self, input_source, temp_path):
+        path = os.path.join(temp_path, os.path.basename(input_source))
+        open(path, "wb").close()
+        return path
+
+    @patch('macscribe.transcriber.transcribe_audio')
+    @patch('macscribe.cli.prepare_audio')
+    @patch('macscribe.cli.expand_collection')
+    def test_only_new_episodes(self, mock_expand, mock_prepare, mock_transcribe, temp_dir):
+        """Test that a second sync only transcribes episodes added since the first."""
+        mock_expand.return_value = self.episodes[:1]
+        mock_prepare.side_effect = self._fake_download
+        mock_transcribe.return_value = "Transcript"
+
+        result = self.runner.invoke(app, [self.feed, "-o", temp_dir, "--no-cache"])
+
+        assert result.exit_code == 0
+        assert "Found 1 episode(s)." in result.stdout
+        assert os.path.exists(os.path.join(temp_dir, "ep1.txt"))
+
+        mock_expand.return_value = self.episodes
+        result = self.runner.invoke(app, [self.feed, "-o", temp_dir, "--no-cache"])
+
+        assert result.exit_code == 0
+        assert "Skipping 1 episode(s) already transcribed" in result.stdout
+        assert "Done: 1 of 1 inputs transcribed." in result.stdout
+        assert [call.args[0] for call in mock_prepare.call_args_list] == self.episodes
+
+        result = self.runner.invoke(app, [self.feed, "-o", temp_dir])
+        assert "Nothing new to transcribe." in result.stdout
+        assert mock_transcribe.call_count == 2
+
+    @patch('macscribe.transcriber.transcribe_audio')
+    @patch('macscribe.cli.prepare_audio')
+    @patch('macscribe.cli.expand_collection')
+    def test_failed_episodes_are_retried(self, mock_expand, mock_prepare, mock_transcribe, temp_dir):
+        """Test that only saved transcripts go into the manifest."""
+        mock_expand.return_value = self.episodes
+        mock_prepare.side_effect = self._fake_download
+        def transcribe(audio, model, **kwargs):
+            if audio.endswith("ep2.mp3"):
+                raise ValueError("No transcription result.")
+            return "Transcript"
+        mock_transcribe.side_effect = transcribe
+
+        result = self.runner.invoke(app, [self.feed, "-o", temp_dir])
+        assert result.exit_code == 1
+
+        mock_transcribe.side_effect = None
+        mock_transcribe.return_value = "Transcript"
+        result = self.runner.invoke(app, [self.feed, "-o", temp_dir])
+
+        assert result.exit_code == 0
+        assert "Skipping 1 episode(s)" in result.stdout
+        assert mock_transcribe.call_args[0][0].endswith("ep2.mp3")
+
+    @patch('macscribe.cli.expand_collection')
+    def test_listing_error(self, mock_expand):
+        """Test that a feed that can't be listed fails the run."""
+        mock_expand.side_effect = Exception("HTTP Error 404")
+
+        result = self.runner.invoke(app, [self.feed])
+
+        assert result.exit_code == 1
+        assert "Error listing https://feeds.example.com/show.rss: HTTP Error 404" in result.stdout
+
+
+class TestCLIDirectories:
+    """Test directory and glob inputs and the worker-process pool."""
+
+    def setup_method(self):
+        """Set up test runner."""
+        self.runner = CliRunner()
+
+    def _tree(self, root):
+        sizes = {"small.wav": 10, "talks/big.mp4": 1000, "talks/2024/medium.mp3": 100, "talks/readme.txt": 5}
+        for name, size in sizes.items():
+            path = Path(root, "in", name)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(b"x" * size)
+        return os.path.join(root, "in")
+
+    @patch('macscribe.transcriber.transcribe_audio')
+    def test_directory_mirrors_tree(self, mock_transcribe, temp_dir):
+        """Test that a directory is walked and transcripts mirror its layout."""
+        input_dir = self._tree(temp_dir)
+        output_dir = os.path.join(temp_dir, "out")
+        mock_transcribe.return_value = "Transcript"
+
+        result = self.runner.invoke(app, [input_dir, "-o", output_dir])
+
+        assert result.exit_code == 0
+        assert "Done: 3 of 3 inputs transcribed." in result.stdout
+        for name in ["small.txt", "talks/big.txt", "talks/2024/medium.txt"]:
+            assert os.path.exists(os.path.join(output_dir, name))
+
+    def test_empty_pattern(self, temp_dir):
+        """Test that a pattern without media files is reported."""
+        result = self.runner.invoke(app, [os.path.join(temp_dir, "*.wav")])
+
+        assert result.exit_code == 1
+        assert "No supported audio or video files found" in result.stdout
+
+    @patch('concurrent.futures.ProcessPoolExecutor')
+    @patch('macscribe.backends.get_backend')
+    @patch('macscribe.transcriber.transcribe_audio')
+    def test_worker_pool_largest_first(self, mock_transcribe, mock_get_backend, mock_pool, temp_dir):
+        """Test that --workers fans local files out to a pool, largest first, one model load per worker."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        input_dir = self._tree(temp_dir)
+        output_dir = os.path.join(temp_dir, "out")
+        # One thread keeps the order observable; real runs use processes
+        mock_pool.side_effect = lambda max_workers, initializer, initargs: ThreadPoolExecutor(1, initializer=initializer, initargs=initargs)
+
+        def transcribe(audio, model, **kwargs):
+            if "small" in audio:
+                raise ValueError("No transcription result.")
+            return "Transcript"
+        mock_transcribe.side_effect = transcribe
+
+        result = self.runner.invoke(app, [input_dir, "-o", output_dir, "--workers", "3"])
+
+        assert result.exit_code == 1
+        assert mock_pool.call_args.kwargs["max_workers"] == 3
+        mock_get_backend.return_value.load.assert_called_once_with("mlx-community/whisper-large-v3-mlx")
+        order = [os.path.basename(call.args[0]) for call in mock_transcribe.call_args_list]
+        assert order == ["big.mp4", "medium.mp3", "small.wav"]
+        assert os.path.exists(os.path.join(output_dir, "talks", "2024", "medium.txt"))
+        assert "Failed: " + os.path.join(input_dir, "small.wav") in result.stdout
+
+
+class TestCLIFormats:
+    """Test subtitle and data output formats."""
+
+    RESULT = {"text": " Hello there.", "segments": [{"start": 0.0, "end": 1.5, "text": " Hello there."}]}
+
+    def setup_method(self):
+        """Set up test runner."""
+        self.runner = CliRunner()
+
+    @patch('macscribe.cli.copy_to_clipboard')
+    @patch('macscribe.transcriber.transcribe_result')
+    @patch('macscribe.cli.prepare_audio')
+    def test_several_formats_from_one_transcription(self, mock_prepare, mock_result, mock_clipboard, mock_audio_file, temp_dir):
+        """Test that every requested format is written from a single transcription."""
+        mock_prepare.return_value = mock_audio_file
+        mock_result.return_value = self.RESULT
+        output_dir = os.path.join(temp_dir, "out")
+
+        result = self.runner.invoke(app, [mock_audio_file, "-o", output_dir + os.sep, "--format", "srt", "-f", "vtt", "-f", "srt"])
+
+        assert result.exit_code == 0
+        mock_result.assert_called_once_with(mock_audio_file, "mlx-community/whisper-large-v3-mlx")
+        mock_clipboard.assert_called_once_with(" Hello there.")
+        assert sorted(os.listdir(output_dir)) == ["test_audio.srt", "test_audio.vtt"]
+        with open(os.path.join(output_dir, "test_audio.srt")) as f:
+            assert f.read() == "1\n00:00:00,000 --> 00:00:01,500\nHello there.\n"
+
+    @patch('macscribe.cli.copy_to_clipboard')
+    @patch('macscribe.transcriber.transcribe_result')
+    @patch('macscribe.transcriber.transcribe_audio')
+    @patch('macscribe.cli.prepare_audio')
+    def test_cache_keeps_segments(self, mock_prepare, mock_transcribe, mock_result, mock_clipboard, mock_audio_file, temp_dir):
+        """Test that a text-only cache entry is redone for subtitles, and later formats come from the cache."""
+        mock_prepare.return_value = mock_audio_file
+        mock_transcribe.return_value = " Hello there."
+        mock_result.return_value = self.RESULT
+
+        self.runner.invoke(app, [mock_audio_file])
+        self.runner.invoke(app, [mock_audio_file, "-f", "srt"])
+        result = self.runner.invoke(app, [mock_audio_file, "-o", temp_dir, "-f", "tsv"])
+
+        assert result.exit_code == 0
+        assert "Using cached transcript." in result.stdout
+        assert mock_transcribe.call_count == 1
+        assert mock_result.call_count == 1
+        with open(os.path.join(temp_dir, "test_audio.tsv")) as f:
+            assert f.read() == "start\tend\ttext\n0\t1500\tHello there.\n"
+
+    @patch('macscribe.transcriber.transcribe_result')
+    @patch('macscribe.cli.prepare_audio')
+    def test_batch_formats_and_word_timestamps(self, mock_prepare, mock_result, temp_dir):
+        """Test that batch runs write each format per input and pass --word-timestamps on."""
+        first = os.path.join(temp_dir, "first.mp3")
+        second = os.path.join(temp_dir, "second.mp3")
+        for path in (first, second):
+            Path(path).touch()
+        mock_prepare.side_effect = lambda source, tmpdir: source
+        mock_result.return_value = self.RESULT
+        output_dir = os.path.join(temp_dir, "out")
+
+        result = self.runner.invoke(app, [first, second, "-o", output_dir, "-f", "json", "-f", "txt", "--word-timestamps"])
+
+        assert result.exit_code == 0
+        mock_result.assert_called_with(ANY, "mlx-community/whisper-large-v3-mlx", word_timestamps=True)
+        assert sorted(os.listdir(output_dir)) == ["first.jsonl", "first.txt", "second.jsonl", "second.txt"]
+
+
+class TestCLIModels:
+    """Test model presets, offline mode and the models commands."""
+
+    def setup_method(self):
+        """Set up test runner."""
+        self.runner = CliRunner()
+
+    @patch('macscribe.transcriber.transcribe_audio')
+    @patch('macscribe.cli.prepare_audio')
+    def test_preset_name(self, mock_prepare, mock_transcribe, mock_audio_file):
+        """Test that a preset is resolved to its repo before transcription."""
+        mock_prepare.return_value = mock_audio_file
+        mock_transcribe.return_value = "Transcript"
+
+        result = self.runner.invoke(app, [mock_audio_file, "--model", "small-4bit"])
+
+        assert result.exit_code == 0
+        mock_transcribe.assert_called_once_with(mock_audio_file, "mlx-community/whisper-small-mlx-4bit")
+
+    @patch('macscribe.transcriber.transcribe_audio')
+    def test_offline_fails_fast(self, mock_transcribe, mock_audio_file, tmp_path, monkeypatch):
+        """Test that offline mode refuses to start without the model on disk."""
+        monkeypatch.setenv("HF_HUB_CACHE", str(tmp_path / "hub"))
+
+        result = self.runner.invoke(app, [mock_audio_file, "--model", "tiny"], env={"MACSCRIBE_OFFLINE": "1"})
+
+        assert result.exit_code == 1
+        assert "Model 'mlx-community/whisper-tiny-mlx' is not downloaded" in result.stdout
+        mock_transcribe.assert_not_called()
+
+    @patch('macscribe.transcriber.transcribe_audio')
+    @patch('macscribe.cli.prepare_audio')
+    def test_offline_with_local_model(self, mock_prepare, mock_transcribe, mock_audio_file, temp_dir, monkeypatch):
+        """Test that offline mode runs when the model is present and blocks hub downloads."""
+        # Set through monkeypatch so the variable the run sets is undone afterwards
+        monkeypatch.setenv("HF_HUB_OFFLINE", "0")
+        mock_prepare.return_value = mock_audio_file
+        mock_transcribe.return_value = "Transcript"
+
+        result = self.runner.invoke(app, [mock_audio_file, "--model", temp_dir, "--offline"])
+
+        assert result.exit_code == 0
+        assert os.environ["HF_HUB_OFFLINE"] == "1"
+
+    @patch('macscribe.cli.probe_input')
+    @patch('macscribe.transcriber.transcribe_audio')
+    @patch('macscribe.cli.prepare_audio')
+    def test_auto_model(self, mock_prepare, mock_transcribe, mock_probe, mock_audio_file):
+        """Test that --latency-budget picks the model from the probed duration."""
+        mock_prepare.return_value = mock_audio_file
+        mock_transcribe.return_value = "Transcript"
+        mock_probe.return_value = MediaInfo(duration=3600.0)
+
+        result = self.runner.invoke(app, [mock_audio_file, "--latency-budget", "90"])
+
+        assert result.exit_code == 0
+        mock_transcribe.assert_called_once_with(mock_audio_file, "mlx-community/whisper-large-v3-turbo")
+        assert "Auto-selected mlx-community/whisper-large-v3-turbo" in result.stdout
+
+    @patch('macscribe.cli.probe_input')
+    @patch('macscribe.transcriber.transcribe_audio')
+    def test_auto_model_batch(self, mock_transcribe, mock_probe, temp_dir):
+        """Test that batch inputs are grouped by their chosen model."""
+        paths = []
+        for name in ("short.mp3", "long.mp3"):
+            path = os.path.join(temp_dir, name)
+            Path(path).write_bytes(b"audio")
+            paths.append(path)
+        mock_probe.side_effect = lambda path, **kwargs: MediaInfo(duration=60.0 if "short" in path else 36000.0)
+        mock_transcribe.return_value = "Transcript"
+
+        result = self.runner.invoke(app, [*paths, "--model", "auto", "-o", temp_dir])
+
+        assert result.exit_code == 0
+        called = {call.args[0]: call.args[1] for call in mock_transcribe.call_args_list}
+        assert called[paths[0]] == "mlx-community/whisper-large-v3-mlx"
+        assert called[paths[1]] == "mlx-community/whisper-tiny-mlx"
+
+    @pytest.mark.parametrize("model", ["small", "large", "mlx-community/whisper-large-v3-mlx"])
+    def test_budget_with_explicit_model(self, mock_audio_file, model):
+        """Test that a latency budget can't be combined with a specific model, even the default one."""
+        result = self.runner.invoke(app, [mock_audio_file, "--model", model, "--latency-budget", "30"])
+
+        assert result.exit_code == 1
+        assert "--latency-budget chooses the model itself" in result.stdout
+
+    @patch('macscribe.models.pull')
+    def test_pull(self, mock_pull):
+        """Test that presets are pulled by repo and failures set the exit code."""
+        mock_pull.side_effect = [{"bytes": 3 * 2**20}, RuntimeError("offline")]
+
+        result = self.runner.invoke(app, ["models", "pull", "tiny", "nope/model", "--backend", "faster-whisper"])
+
+        assert result.exit_code == 1
+        mock_pull.assert_any_call("mlx-community/whisper-tiny-mlx", "faster-whisper")
+        assert "Pulled mlx-community/whisper-tiny-mlx (3 MB)." in result.stdout
+        assert "Error pulling nope/model: offline" in result.stdout
+
+    def test_list_and_prune(self, tmp_path):
+        """Test that pulled models are listed and pruned."""
+        from macscribe.models import ModelRegistry
+
+        registry = ModelRegistry()
+        registry.record("mlx-community/whisper-tiny-mlx", "mlx", str(tmp_path / "missing"))
+
+        listed = self.runner.invoke(app, ["models", "list"])
+        pruned = self.runner.invoke(app, ["models", "prune", "--unused-days", "0"])
+
+        assert listed.exit_code == 0
+        assert "small-4bit" in listed.stdout
+        assert "mlx-community/whisper-tiny-mlx" in listed.stdout.split("pulled model")[1]
+        assert pruned.exit_code == 0
+        assert "Deleted 1 model(s)" in pruned.stdout
+        assert registry.entries() == {}
+
+
+class TestCLIDownloadPolicy:
+    """Test download format policy options and download reports."""
+
+    def setup_method(self):
+        """Set up test runner."""
+        self.runner = CliRunner()
+
+    @patch('macscribe.transcriber.transcribe_audio')
+    @patch('macscribe.cli.prepare_audio')
+    def test_options_and_report(self, mock_prepare, mock_transcribe):
+        """Test that download options reach prepare_audio and the bytes saved are reported."""
+        from macscribe.downloader import DownloadReport, _last_download
+
+        def download(source, tmpdir, **download_options):
+            _last_download.report = DownloadReport('249', 3 * 2**20, 8 * 2**20)
+            return "/tmp/abc.webm"
+
+        mock_prepare.side_effect = download
+        mock_transcribe.return_value = "Transcript"
+
+        result = self.runner.invoke(app, [
+            "https://www.youtube.com/watch?v=abc", "--download-quality", "best", "--fragments", "4",
+            "--rate-limit", "1M", "--no-cache",
+        ])
+
+        assert result.exit_code == 0
+        assert mock_prepare.call_args.kwargs == {"policy": "best", "concurrent_fragments": 4, "rate_limit": 2**20}
+        assert "Downloaded 3.0 MB (format 249), 5.0 MB less than the best-quality stream." in result.stdout
+
+    @patch('macscribe.cli.copy_to_clipboard')
+    @patch('macscribe.transcriber.transcribe_audio')
+    @patch('macscribe.cli.prepare_audio')
+    def test_policy_separates_caches(self, mock_prepare, mock_transcribe, mock_clipboard):
+        """Test that a best-quality run neither reuses the asr stream nor its transcript."""
+        def download(source, tmpdir, **download_options):
+            path = os.path.join(tmpdir, f"abc-{download_options.get('policy', 'asr')}.webm")
+            Path(path).touch()
+            return path
+
+        mock_prepare.side_effect = download
+        mock_transcribe.return_value = "Transcript"
+        url = "https://www.youtube.com/watch?v=abc"
+
+        for args in ([], ["--download-quality", "best"], ["--download-quality", "best", "--refresh"]):
+            result = self.runner.invoke(app, [url, "--no-daemon"] + args)
+            assert result.exit_code == 0
+
+        assert mock_transcribe.call_count == 3
+        # The refreshed best run found its own stream in the media cache
+        assert mock_prepare.call_count == 2
+        assert mock_transcribe.call_args[0][0].endswith("abc-best.webm")
+
+    def test_invalid_rate_limit(self, mock_audio_file):
+        """Test that an unparseable rate is a usage error."""
+        result = self.runner.invoke(app, [mock_audio_file, "--rate-limit", "fast"])
+
+        assert result.exit_code == 2
+
+
+class TestCLIPreflight:
+    """Test the pre-flight probe, its guards and --plan."""
+
+    def setup_method(self):
+        """Set up test runner."""
+        self.runner = CliRunner()
+
+    def make_files(self, temp_dir, *names):
+        paths = []
+        for name in names:
+            path = os.path.join(temp_dir, name)
+            # Distinct contents, so each file has its own cache key
+            Path(path).write_bytes(name.encode())
+            paths.append(path)
+        return paths
+
+    @patch('macscribe.cli.probe_input')
+    @patch('macscribe.transcriber.transcribe_audio')
+    def test_max_duration(self, mock_transcribe, mock_probe, temp_dir):
+        """Test that inputs over --max-duration are skipped before they are prepared."""
+        short, long = self.make_files(temp_dir, "short.mp3", "long.mp3")
+        mock_probe.side_effect = lambda path, **kwargs: MediaInfo(duration=60.0 if path == short else 3600.0, codec="mp3")
+        mock_transcribe.return_value = "Transcript"
+
+        result = self.runner.invoke(app, [short, long, "--max-duration", "600", "-o", temp_dir])
+
+        assert result.exit_code == 0
+        assert f"Skipping {long}: 1:00:00 is longer than --max-duration 10:00." in result.stdout
+        assert [call.args[0] for call in mock_transcribe.call_args_list] == [short]
+
+    @patch('macscribe.cli.probe_input')
+    @patch('macscribe.cli.prepare_audio')
+    def test_live_stream_skipped(self, mock_prepare, mock_probe):
+        """Test that a live stream is never downloaded."""
+        mock_probe.return_value = MediaInfo(is_live=True)
+
+        result = self.runner.invoke(app, ["https://www.youtube.com/watch?v=live", "--max-duration", "600"])
+
+        assert result.exit_code == 0
+        assert "live stream" in result.stdout
+        assert "Nothing to transcribe." in result.stdout
+        mock_prepare.assert_not_called()
+
+    @patch('macscribe.cli.probe_input')
+    @patch('macscribe.transcriber.transcribe_audio')
+    def test_plan(self, mock_transcribe, mock_probe, temp_dir):
+        """Test that --plan reports each input without transcribing, and cached inputs aren't probed."""
+        from macscribe.cache import TranscriptCache, cache_key
+        from macscribe.downloader import source_id
+
+        cached, new, silent = self.make_files(temp_dir, "cached.mp3", "new.mp3", "silent.mov")
+        TranscriptCache().put(cache_key(source_id(cached), "mlx-community/whisper-large-v3-mlx"), "Old", "cached")
+        mock_probe.side_effect = lambda path, **kwargs: (
+            MediaInfo(duration=10.0, size=5, codec="none") if path == silent
+            else MediaInfo(duration=5400.0, size=80 * 2**20, codec="mp3")
+        )
+
+        result = self.runner.invoke(app, [cached, new, silent, "--plan"])
+
+        assert result.exit_code == 0
+        lines = result.stdout.splitlines()
+        assert lines[0] == "Plan: 1 to transcribe, 1 cached, 1 skipped (1.5 h of audio, 80 MB to fetch or read)"
+        assert lines[1].startswith("cached") and lines[1].endswith(cached)
+        assert lines[2].startswith("transcribe") and "1:30:00" in lines[2] and "80.0 MB" in lines[2]
+        assert lines[3].startswith("skip") and lines[3].endswith("(no audio stream)")
+        assert [call.args[0] for call in mock_probe.call_args_list] == [new, silent]
+        mock_transcribe.assert_not_called()
@@ -0,0 +1,104 @@
+import os
+import shutil
+import tempfile
+import threading
+import pytest
+from pathlib import Path
+from unittest.mock import patch
+
+from macscribe.daemon import (
+    DaemonError,
+    TranscriptionServer,
+    _send,
+    default_socket_path,
+    is_running,
+    request_transcription,
+)
+
+
+@pytest.fixture
+def socket_path():
+    """A short socket path (Unix socket paths are length-limited)."""
+    directory = tempfile.mkdtemp(prefix="ms-", dir="/tmp")
+    yield Path(directory) / "d.sock"
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+@pytest.fixture
+def server(socket_path):
+    """Run a TranscriptionServer in a background thread."""
+    server = TranscriptionServer(socket_path, "test-model")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class TestDaemon:
+    """Test the transcription daemon and its client."""
+
+    def test_default_socket_path(self, isolated_cache_dir):
+        """Test that the socket lives in the cache directory."""
+        assert default_socket_path() == isolated_cache_dir / "daemon.sock"
+
+    def test_not_running(self, socket_path):
+        """Test that a missing socket means no daemon."""
+        assert is_running(socket_path) is False
+
+    def test_ping(self, server, socket_path):
+        """Test that a running daemon answers pings."""
+        assert is_running(socket_path) is True
+
+    @patch('macscribe.transcriber.transcribe_audio')
+    @patch('macscribe.downloader.prepare_audio')
+    def test_transcription_request(self, mock_prepare, mock_transcribe, server, socket_path, mock_audio_file):
+        """Test a full request round trip."""
+        mock_prepare.side_effect = lambda source, tmpdir: source
+        mock_transcribe.return_value = "Daemon transcript"
+
+        response = request_transcription(mock_audio_file, "test-model", {"backend": "faster-whisper"}, socket_path)
+
+        assert response["text"] == "Daemon transcript"
+        assert response["name"] == "test_audio"
+        mock_transcribe.assert_called_once_with(mock_audio_file, "test-model", copy=False, backend="faster-whisper")
+
+    def test_invalid_input(self, server, socket_path):
+        """Test that invalid inputs are rejected by the daemon."""
+        with pytest.raises(DaemonError) as excinfo:
+            request_transcription("not-a-url", "test-model", socket_path=socket_path)
+
+        assert excinfo.value.stage == "invalid"
+
+    @pytest.mark.parametrize("payload", [[1, 2], "x", 3])
+    def test_request_not_an_object(self, server, socket_path, payload):
+        """Test that valid JSON that isn't an object gets an error reply instead of a dropped connection."""
+        response = _send(socket_path, payload, timeout=5.0)
+
+        assert response["ok"] is False
+        assert response["stage"] == "invalid"
+        assert is_running(socket_path) is True
+
+    @patch('macscribe.downloader.prepare_audio')
+    def test_prepare_error(self, mock_prepare, server, socket_path, mock_audio_file):
+        """Test that preparation failures are reported with their stage."""
+        mock_prepare.side_effect = Exception("Download failed")
+
+        with pytest.raises(DaemonError, match="Download failed") as excinfo:
+            request_transcription(mock_audio_file, "test-model", socket_path=socket_path)
+
+        assert excinfo.value.stage == "prepare"
+
+    def test_second_server_refused(self, server, socket_path):
+        """Test that a second daemon can't take over a live socket."""
+        with pytest.raises(RuntimeError, match="already running"):
+            TranscriptionServer(socket_path, "test-model")
+
+    def test_stale_socket_replaced(self, socket_path):
+        """Test that a leftover socket file from a dead daemon is removed."""
+        socket_path.touch()
+
+        server = TranscriptionServer(socket_path, "test-model")
+        server.server_close()
+
+        assert not socket_path.exists()
@@ -3,7 +3,25 @@ import pytest
 from unittest.mock import patch, MagicMock
 from pathlib import Path
 
-from macscribe.downloader import validate_input, prepare_audio
+import io
+import json
+
+from macscribe.downloader import (
+    validate_input,
+    prepare_audio,
+    source_id,
+    is_collection_url,
+    expand_collection,
+    is_local_pattern,
+    find_media_files,
+    probe_input,
+    download_audio,
+    parse_rate,
+    pop_download_report,
+    FORMAT_POLICIES,
+    DownloadReport,
+    MediaInfo,
+)
 
 
 class TestValidateInput:
@@ -77,13 +95,16 @@ class TestPrepareAudio:
         result = prepare_audio(mock_audio_file, "/tmp")
         assert result == mock_audio_file
     
-    @patch('macscribe.downloader.yt_dlp.YoutubeDL')
+    @patch('yt_dlp.YoutubeDL')
     def test_url_download_preparation(self, mock_ydl):
-        """Test that URLs are processed through yt-dlp."""
+        """Test that URLs are processed through yt-dlp and keep the native audio stream."""
         # Mock the YoutubeDL behavior
         mock_ydl_instance = MagicMock()
         mock_ydl.return_value.__enter__.return_value = mock_ydl_instance
-        mock_ydl_instance.extract_info.return_value = {'id': 'test_video_id'}
+        mock_ydl_instance.extract_info.return_value = {
+            'id': 'test_video_id',
+            'requested_downloads': [{'filepath': '/tmp/test/test_video_id.webm'}],
+        }
         
         url = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
         temp_path = "/tmp/test"
@@ -93,11 +114,43 @@ class TestPrepareAudio:
         # Should call yt-dlp
         mock_ydl_instance.extract_info.assert_called_once_with(url, download=True)
         
-        # Should return the expected audio file path
-        expected_path = os.path.join(temp_path, "test_video_id.mp3")
-        assert result == expected_path
+        # Should not re-encode the download, and should continue partial downloads
+        ydl_opts = mock_ydl.call_args[0][0]
+        assert 'postprocessors' not in ydl_opts
+        assert ydl_opts['continuedl'] is True
+        assert ydl_opts['noplaylist'] is True
+        
+        # Should return the downloaded file
+        assert result == '/tmp/test/test_video_id.webm'
+    
+    @patch('yt_dlp.YoutubeDL')
+    def test_url_download_without_requested_downloads(self, mock_ydl):
+        """Test falling back to yt-dlp's filename template."""
+        mock_ydl_instance = MagicMock()
+        mock_ydl.return_value.__enter__.return_value = mock_ydl_instance
+        mock_ydl_instance.extract_info.return_value = {'id': 'test_video_id', 'ext': 'm4a'}
+        mock_ydl_instance.prepare_filename.return_value = '/tmp/test/test_video_id.m4a'
+        
+        result = prepare_audio("https://youtu.be/dQw4w9WgXcQ", "/tmp/test")
+        
+        assert result == '/tmp/test/test_video_id.m4a'
     
-    @patch('macscribe.downloader.yt_dlp.YoutubeDL')
+    @patch('yt_dlp.YoutubeDL')
+    def test_url_download_with_audio_codec(self, mock_ydl):
+        """Test that audio_codec re-encodes through FFmpegExtractAudio."""
+        mock_ydl_instance = MagicMock()
+        mock_ydl.return_value.__enter__.return_value = mock_ydl_instance
+        mock_ydl_instance.extract_info.return_value = {'id': 'test_video_id'}
+        
+        temp_path = "/tmp/test"
+        result = prepare_audio("https://youtu.be/dQw4w9WgXcQ", temp_path, audio_codec='mp3')
+        
+        ydl_opts = mock_ydl.call_args[0][0]
+        assert ydl_opts['postprocessors'][0]['key'] == 'FFmpegExtractAudio'
+        assert ydl_opts['postprocessors'][0]['preferredcodec'] == 'mp3'
+        assert result == os.path.join(temp_path, "test_video_id.mp3")
+    
+    @patch('yt_dlp.YoutubeDL')
     def test_nonexistent_local_file(self, mock_ydl):
         """Test behavior with non-existent local file."""
         # Mock yt-dlp to handle the nonexistent file as a URL
@@ -111,7 +164,7 @@ class TestPrepareAudio:
         with pytest.raises(Exception, match="Not a valid URL"):
             prepare_audio(nonexistent_file, "/tmp")
     
-    @patch('macscribe.downloader.yt_dlp.YoutubeDL')
+    @patch('yt_dlp.YoutubeDL')
     def test_ydl_download_error(self, mock_ydl):
         """Test handling of yt-dlp download errors."""
         # Mock yt-dlp to raise an exception
@@ -124,4 +177,268 @@ class TestPrepareAudio:
         
         # Should propagate the exception
         with pytest.raises(Exception, match="Download failed"):
-            prepare_audio(url, temp_path)
\ No newline at end of file
+            prepare_audio(url, temp_path)
+
+
+class TestProbeInput:
+    """Test the pre-flight metadata probe."""
+
+    @patch('macscribe.audio.probe_media')
+    def test_local_file(self, mock_probe, mock_audio_file):
+        """Test that local files are probed from their container."""
+        mock_probe.return_value = {"duration": 42.0, "codec": "mp3"}
+
+        assert probe_input(mock_audio_file) == MediaInfo(duration=42.0, size=0, codec="mp3")
+        mock_probe.assert_called_once_with(mock_audio_file)
+
+    @patch('yt_dlp.YoutubeDL')
+    def test_url_metadata_only(self, mock_ydl):
+        """Test that URLs are probed with the download's format selection, without downloading."""
+        mock_ydl_instance = MagicMock()
+        mock_ydl.return_value.__enter__.return_value = mock_ydl_instance
+        mock_ydl_instance.extract_info.return_value = {
+            'id': 'abc', 'duration': 3600, 'filesize_approx': 55_000_000, 'acodec': 'opus', 'live_status': 'not_live',
+        }
+        url = "https://www.youtube.com/watch?v=abc"
+
+        info = probe_input(url)
+
+        assert info == MediaInfo(duration=3600.0, size=55_000_000, codec='opus')
+        mock_ydl_instance.extract_info.assert_called_once_with(url, download=False)
+        ydl_opts = mock_ydl.call_args[0][0]
+        assert ydl_opts['skip_download'] is True
+        assert ydl_opts["format"] == FORMAT_POLICIES["asr"]
+
+    @patch('yt_dlp.YoutubeDL')
+    def test_live_and_unavailable(self, mock_ydl):
+        """Test that live streams are flagged and failed lookups carry the error."""
+        import yt_dlp
+
+        mock_ydl_instance = MagicMock()
+        mock_ydl.return_value.__enter__.return_value = mock_ydl_instance
+        mock_ydl_instance.extract_info.return_value = {'id': 'live', 'is_live': True}
+        assert probe_input("https://www.youtube.com/watch?v=live").is_live
+
+        mock_ydl_instance.extract_info.side_effect = yt_dlp.utils.DownloadError("private video")
+        info = probe_input("https://www.youtube.com/watch?v=private")
+        assert info.duration is None
+        assert "private video" in info.error
+
+
+# Formats as yt-dlp lists them for a YouTube video, worst to best
+YOUTUBE_FORMATS = [
+    {'format_id': '139', 'ext': 'm4a', 'vcodec': 'none', 'acodec': 'mp4a.40.5', 'abr': 48.8, 'filesize': 900},
+    {'format_id': '249', 'ext': 'webm', 'vcodec': 'none', 'acodec': 'opus', 'abr': 50, 'filesize': 1000},
+    {'format_id': '140', 'ext': 'm4a', 'vcodec': 'none', 'acodec': 'mp4a.40.2', 'abr': 129, 'filesize': 2600},
+    {'format_id': '251', 'ext': 'webm', 'vcodec': 'none', 'acodec': 'opus', 'abr': 135, 'filesize': 2700},
+    {'format_id': '18', 'ext': 'mp4', 'vcodec': 'avc1', 'acodec': 'mp4a.40.2', 'tbr': 500, 'filesize': 9000},
+]
+
+
+def select_format(policy, formats):
+    """Run a policy's selector through yt-dlp's own format selection."""
+    import yt_dlp
+
+    with yt_dlp.YoutubeDL({'quiet': True}) as ydl:
+        selector = ydl.build_format_selector(FORMAT_POLICIES[policy])
+        ctx = {'formats': formats, 'has_merged_format': False, 'incomplete_formats': False}
+        return [fmt['format_id'] for fmt in selector(ctx)]
+
+
+class TestDownloadPolicy:
+    """Test format selection, rate control and download reports."""
+
+    def test_asr_policy_picks_small_audio(self):
+        """Test that the asr policy picks low-bitrate opus where the best policy picks the largest stream."""
+        assert select_format('asr', YOUTUBE_FORMATS) == ['249']
+        assert select_format('best', YOUTUBE_FORMATS) == ['251']
+
+    def test_asr_policy_without_audio_only_streams(self):
+        """Test that sources with only muxed video fall back to the smallest file, not the largest."""
+        formats = [
+            {'format_id': 'hls-256', 'ext': 'mp4', 'vcodec': 'avc1', 'acodec': 'mp4a', 'tbr': 256},
+            {'format_id': 'hls-2000', 'ext': 'mp4', 'vcodec': 'avc1', 'acodec': 'mp4a', 'tbr': 2000},
+        ]
+        assert select_format('asr', formats) == ['hls-256']
+        podcast = [{'format_id': '0', 'ext': 'mp3', 'vcodec': 'none', 'acodec': 'mp3'}]
+        assert select_format('asr', podcast) == ['0']
+
+    @patch('yt_dlp.YoutubeDL')
+    def test_download_report(self, mock_ydl, tmp_path):
+        """Test that the report compares the downloaded bytes with the stream the best policy would pick."""
+        audio_file = tmp_path / "abc.webm"
+        audio_file.write_bytes(b"\0" * 1100)
+        mock_ydl_instance = MagicMock()
+        mock_ydl.return_value.__enter__.return_value = mock_ydl_instance
+        mock_ydl_instance.extract_info.return_value = {
+            'id': 'abc',
+            'duration': 60,
+            'formats': YOUTUBE_FORMATS,
+            'requested_downloads': [{'format_id': '249', 'filepath': str(audio_file)}],
+        }
+
+        path, report = download_audio(
+            "https://www.youtube.com/watch?v=abc", str(tmp_path), concurrent_fragments=4, rate_limit=2 * 2**20
+        )
+
+        assert path == str(audio_file)
+        assert (report.format_id, report.bytes, report.baseline_bytes, report.saved_bytes) == ('249', 1100, 2700, 1600)
+        ydl_opts = mock_ydl.call_args[0][0]
+        assert ydl_opts['format'] == FORMAT_POLICIES['asr']
+        assert ydl_opts['concurrent_fragment_downloads'] == 4
+        assert ydl_opts['ratelimit'] == 2 * 2**20
+
+    @patch('macscribe.downloader.download_audio')
+    def test_pop_download_report(self, mock_download, mock_audio_file):
+        """Test that prepare_audio leaves its report for the calling thread to pick up once."""
+        mock_download.return_value = ('/tmp/abc.webm', DownloadReport('249', 1100, 2700))
+
+        prepare_audio("https://www.youtube.com/watch?v=abc", "/tmp", policy='best')
+
+        mock_download.assert_called_once_with("https://www.youtube.com/watch?v=abc", "/tmp", None, policy='best')
+        assert pop_download_report().saved_bytes == 1600
+        assert pop_download_report() is None
+        prepare_audio(mock_audio_file, "/tmp")
+        assert pop_download_report() is None
+
+    def test_parse_rate(self):
+        """Test download rates in bytes per second with binary units."""
+        assert parse_rate("500K") == 500 * 1024
+        assert parse_rate("2.5M") == int(2.5 * 2**20)
+        assert parse_rate("1000") == 1000
+        with pytest.raises(ValueError, match="Invalid rate"):
+            parse_rate("fast")
+
+
+class TestSourceId:
+    """Test the source_id function."""
+
+    def test_youtube_urls_share_identity(self):
+        """Test that different URL forms of one video map to the same id."""
+        assert source_id("https://www.youtube.com/watch?v=dQw4w9WgXcQ") == "youtube:dQw4w9WgXcQ"
+        assert source_id("https://youtu.be/dQw4w9WgXcQ") == "youtube:dQw4w9WgXcQ"
+
+    def test_x_url(self):
+        """Test that X status URLs are identified by status id."""
+        assert source_id("https://x.com/user/status/123456789") == "twitter:123456789"
+
+    def test_local_file_hashes_content(self, temp_dir):
+        """Test that local files are identified by content, not path."""
+        a = os.path.join(temp_dir, "a.mp3")
+        b = os.path.join(temp_dir, "b.mp3")
+        Path(a).write_bytes(b"same audio")
+        Path(b).write_bytes(b"same audio")
+
+        assert source_id(a) == source_id(b)
+        assert source_id(a).startswith("file:")
+
+    def test_unknown_url_falls_back_to_url(self):
+        """Test that URLs no extractor recognises use the URL itself."""
+        assert source_id("https://podcasts.apple.com/us/podcast/test") == "url:https://podcasts.apple.com/us/podcast/test"
+
+
+class TestCollections:
+    """Test playlist, channel and feed detection and expansion."""
+
+    def test_is_collection_url(self, mock_audio_file):
+        """Test which URLs are listings rather than single episodes."""
+        assert is_collection_url("https://www.youtube.com/playlist?list=PL123")
+        assert is_collection_url("https://www.youtube.com/@veritasium")
+        assert is_collection_url("https://www.youtube.com/channel/UC123/videos")
+        assert is_collection_url("https://podcasts.apple.com/us/podcast/some-show/id123456789")
+        assert is_collection_url("https://feeds.megaphone.fm/show")
+        assert is_collection_url("https://example.com/podcast.rss")
+
+        assert not is_collection_url("https://www.youtube.com/watch?v=dQw4w9WgXcQ")
+        assert not is_collection_url("https://www.youtube.com/watch?v=dQw4w9WgXcQ&list=PL123")
+        assert not is_collection_url("https://podcasts.apple.com/us/podcast/test/id123456789?i=1000")
+        assert not is_collection_url("https://www.example.com/video.mp4")
+        assert not is_collection_url(mock_audio_file)
+        assert not is_collection_url("not-a-url")
+
+    @patch('yt_dlp.YoutubeDL')
+    def test_expand_channel(self, mock_ydl):
+        """Test flat extraction, including nested channel tabs and duplicates."""
+        ydl = mock_ydl.return_value.__enter__.return_value
+        tab_url = "https://www.youtube.com/@show/videos"
+        listings = {
+            "https://www.youtube.com/@show": {"entries": [
+                {"_type": "url", "ie_key": "YoutubeTab", "url": tab_url},
+                {"_type": "playlist", "entries": [{"ie_key": "Youtube", "url": "ccc"}]},
+            ]},
+            tab_url: {"entries": [
+                {"ie_key": "Youtube", "url": "https://www.youtube.com/watch?v=aaa"},
+                {"ie_key": "Youtube", "url": "https://www.youtube.com/watch?v=bbb"},
+                {"ie_key": "Youtube", "url": "https://www.youtube.com/watch?v=aaa"},
+                None,
+            ]},
+        }
+        ydl.extract_info.side_effect = lambda url, download: listings[url]
+
+        urls = expand_collection("https://www.youtube.com/@show")
+
+        assert urls == [
+            "https://www.youtube.com/watch?v=aaa",
+            "https://www.youtube.com/watch?v=bbb",
+            "https://www.youtube.com/watch?v=ccc",
+        ]
+        ydl_opts = mock_ydl.call_args[0][0]
+        assert ydl_opts['extract_flat'] == 'in_playlist'
+        assert all(call.kwargs == {"download": False} for call in ydl.extract_info.call_args_list)
+
+    @patch('yt_dlp.YoutubeDL')
+    @patch('macscribe.downloader.urllib.request.urlopen')
+    def test_expand_apple_show(self, mock_urlopen, mock_ydl):
+        """Test that Apple Podcasts shows are expanded through their RSS feed."""
+        mock_urlopen.return_value.__enter__.return_value = io.BytesIO(
+            json.dumps({"results": [{"feedUrl": "https://feeds.example.com/show.rss"}]}).encode()
+        )
+        ydl = mock_ydl.return_value.__enter__.return_value
+        ydl.extract_info.return_value = {"entries": [{"url": "https://cdn.example.com/ep1.mp3"}]}
+
+        urls = expand_collection("https://podcasts.apple.com/us/podcast/some-show/id123456789")
+
+        assert urls == ["https://cdn.example.com/ep1.mp3"]
+        assert "id=123456789" in mock_urlopen.call_args[0][0]
+        ydl.extract_info.assert_called_once_with("https://feeds.example.com/show.rss", download=False)
+
+
+class TestLocalPatterns:
+    """Test directory and glob inputs."""
+
+    def _tree(self, root):
+        for name in ["a.wav", "notes.txt", "talks/b.mp4", "talks/2024/c.MP3", "talks/2024/d.pdf"]:
+            path = Path(root, name)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.touch()
+
+    def test_is_local_pattern(self, temp_dir, mock_audio_file):
+        """Test that directories and globs are patterns but files and URLs are not."""
+        assert is_local_pattern(temp_dir)
+        assert is_local_pattern(os.path.join(temp_dir, "**", "*.wav"))
+        assert not is_local_pattern(mock_audio_file)
+        assert not is_local_pattern("https://www.youtube.com/watch?v=abc")
+        assert not is_local_pattern("https://example.com/search?q=[a]*")
+
+    def test_directory(self, temp_dir):
+        """Test that a directory is walked recursively with the validate_input extensions."""
+        self._tree(temp_dir)
+
+        files = find_media_files(temp_dir)
+
+        assert files == [
+            (os.path.join(temp_dir, "a.wav"), ""),
+            (os.path.join(temp_dir, "talks", "2024", "c.MP3"), os.path.join("talks", "2024")),
+            (os.path.join(temp_dir, "talks", "b.mp4"), "talks"),
+        ]
+
+    def test_glob(self, temp_dir):
+        """Test that relative directories start below the fixed part of a glob."""
+        self._tree(temp_dir)
+
+        files = find_media_files(os.path.join(temp_dir, "talks", "**", "*.*"))
+
+        assert files == [
+            (os.path.join(temp_dir, "talks", "2024", "c.MP3"), "2024"),
+            (os.path.join(temp_dir, "talks", "b.mp4"), ""),
+        ]
@@ -0,0 +1,60 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+SRC = str(Path(__file__).resolve().parents[1] / "src")
+
+# Cumulative import time allowed for macscribe.cli, in microseconds. Generous
+# enough for slow CI machines; importing yt_dlp or numpy alone blows through it.
+IMPORT_BUDGET_US = 400_000
+
+HEAVY_MODULES = ("yt_dlp", "numpy", "mlx", "mlx_whisper", "faster_whisper")
+
+
+def run_python(code, *args):
+    """Run code in a fresh interpreter with src/ on the path."""
+    env = dict(os.environ, PYTHONPATH=SRC)
+    return subprocess.run(
+        [sys.executable, *args, "-c", code], env=env, capture_output=True, text=True, check=True
+    )
+
+
+def imported_modules(importtime_stderr):
+    """Parse `python -X importtime` output into {module: cumulative microseconds}."""
+    modules = {}
+    for line in importtime_stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            modules[name.strip()] = int(cumulative)
+    return modules
+
+
+class TestImportTime:
+    """Regression tests for CLI startup cost."""
+
+    def test_cli_import_is_light(self):
+        """Test that importing the CLI skips heavy dependencies and stays within budget."""
+        result = run_python("import macscribe.cli", "-X", "importtime")
+        modules = imported_modules(result.stderr)
+
+        heavy = [name for name in modules if name.split(".")[0] in HEAVY_MODULES]
+        assert heavy == []
+        assert modules["macscribe.cli"] < IMPORT_BUDGET_US
+
+    def test_local_file_never_imports_yt_dlp(self, mock_audio_file):
+        """Test that validating, identifying and preparing a local file leaves yt_dlp unimported."""
+        code = (
+            "import sys\n"
+            "from macscribe.downloader import validate_input, prepare_audio, source_id\n"
+            f"path = {mock_audio_file!r}\n"
+            "assert validate_input(path)\n"
+            "source_id(path)\n"
+            "assert prepare_audio(path, '/tmp') == path\n"
+            "print('yt_dlp' in sys.modules)\n"
+        )
+        result = run_python(code)
+
+        assert result.stdout.strip() == "False"
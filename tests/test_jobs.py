@@ -0,0 +1,58 @@
+import json
+
+from macscribe.jobs import Job, default_jobs_dir, job_key
+
+
+class TestJob:
+    """Test checkpointed job directories."""
+
+    def test_default_location(self, isolated_cache_dir):
+        """Test that jobs live in the cache directory and are keyed without chunk options."""
+        assert default_jobs_dir() == isolated_cache_dir / "jobs"
+        assert job_key("file:abc", "model", "mlx") == job_key("file:abc", "model", "mlx")
+        assert job_key("file:abc", "model", "mlx") != job_key("file:abc", "model", "faster-whisper")
+
+    def test_round_trip(self, tmp_path):
+        """Test that metadata, audio and finished chunks survive reopening the job."""
+        job = Job.create(tmp_path / "job", "input.mp3", "model", {"chunk_length": 600.0})
+        audio_file = tmp_path / "job" / "media" / "abc.webm"
+        audio_file.write_bytes(b"audio")
+        job.audio_file = str(audio_file)
+        assert job.use_bounds([0, 100, 200]) == [0, 100, 200]
+        job.record(1, [{"start": 0.0, "end": 1.0, "text": " Hi."}])
+
+        reopened = Job.load(tmp_path / "job")
+
+        assert reopened.options == {"chunk_length": 600.0}
+        assert reopened.audio_file == str(audio_file)
+        assert reopened.completed == {1: [{"start": 0.0, "end": 1.0, "text": " Hi."}]}
+        assert reopened.use_bounds([0, 120, 200]) == [0, 100, 200]
+
+    def test_partial_line_ignored(self, tmp_path):
+        """Test that a chunk cut off by a crash mid-write is treated as unfinished."""
+        job = Job.create(tmp_path / "job", "input.mp3", "model", {})
+        job.record(0, [])
+        with open(tmp_path / "job" / "segments.jsonl", "a") as f:
+            f.write(json.dumps({"index": 1, "segments": []})[:10])
+
+        assert Job.load(tmp_path / "job").completed == {0: []}
+
+    def test_changed_audio_discards_chunks(self, tmp_path):
+        """Test that boundaries for different audio reset the finished chunks."""
+        job = Job.create(tmp_path / "job", "input.mp3", "model", {})
+        job.use_bounds([0, 100, 200])
+        job.record(0, [])
+
+        assert job.use_bounds([0, 150, 300]) == [0, 150, 300]
+        assert job.completed == {}
+        assert Job.load(tmp_path / "job").completed == {}
+
+    def test_missing_or_removed(self, tmp_path):
+        """Test that a missing job loads as None and remove() deletes the directory."""
+        assert Job.load(tmp_path / "missing") is None
+
+        job = Job.create(tmp_path / "job", "input.mp3", "model", {})
+        job.remove()
+
+        assert not (tmp_path / "job").exists()
+        assert Job.load(tmp_path / "job") is None
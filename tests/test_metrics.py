@@ -0,0 +1,86 @@
+import json
+import os
+import threading
+
+from macscribe.metrics import Metrics, active, collecting, stage
+
+
+class TestStage:
+    """Test stage timing."""
+
+    def test_noop_without_collector(self):
+        """Test that stages outside collecting() record nothing and still accept add()."""
+        assert active() is None
+        with stage("decode") as timing:
+            timing.add(bytes=10, audio_seconds=1.0)
+
+    def test_totals(self):
+        """Test that repeated stages are summed, with bytes and audio attached."""
+        with collecting() as metrics:
+            with stage("download", bytes=100):
+                pass
+            with stage("download") as timing:
+                timing.add(bytes=50)
+            with stage("transcribe", audio_seconds=10.0):
+                pass
+
+        assert active() is None
+        download = metrics.stages["download"]
+        assert download.count == 2
+        assert download.bytes == 150
+        assert download.wall >= 0 and download.peak_rss_bytes > 0
+        assert metrics.stages["transcribe"].rtf == metrics.stages["transcribe"].wall / 10.0
+        assert download.rtf is None
+        assert metrics.audio_seconds == 10.0
+        assert metrics.wall is not None and metrics.cpu is not None
+
+    def test_recorded_on_error(self):
+        """Test that a failing stage is still timed."""
+        with collecting() as metrics:
+            try:
+                with stage("decode"):
+                    raise RuntimeError("boom")
+            except RuntimeError:
+                pass
+
+        assert metrics.stages["decode"].count == 1
+
+    def test_threads(self):
+        """Test that stages from worker threads land in the same collector."""
+        def work():
+            with stage("download", bytes=1):
+                pass
+
+        with collecting() as metrics:
+            threads = [threading.Thread(target=work) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert metrics.stages["download"].count == 8
+        assert metrics.stages["download"].bytes == 8
+
+
+class TestReport:
+    """Test the summary and JSON output."""
+
+    def test_summary_and_json(self, temp_dir):
+        """Test that stages appear in run order and the JSON is complete."""
+        metrics = Metrics()
+        metrics.record("decode", 1.0, 0.5, bytes=2 * 2**20, audio_seconds=60.0)
+        metrics.record("transcribe", 6.0, 5.0, audio_seconds=60.0)
+        metrics.finish()
+
+        summary = metrics.summary()
+        assert summary.index("decode") < summary.index("transcribe")
+        assert "RTF" in summary and "Total:" in summary
+
+        path = os.path.join(temp_dir, "metrics.json")
+        metrics.save(path)
+        with open(path) as f:
+            data = json.load(f)
+        assert [s["name"] for s in data["stages"]] == ["decode", "transcribe"]
+        assert data["stages"][1]["rtf"] == 0.1
+        assert data["audio_seconds"] == 60.0
+        assert data["rtf"] == data["wall"] / 60.0
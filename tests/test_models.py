@@ -0,0 +1,175 @@
+import os
+import sys
+import time
+import pytest
+from pathlib import Path
+from unittest.mock import patch, MagicMock
+
+from macscribe.models import (
+    ModelNotAvailableError,
+    ModelRegistry,
+    PRESETS,
+    SpeedLog,
+    choose_model,
+    ensure_available,
+    hub_repo,
+    is_available,
+    prune,
+    pull,
+    resolve_model,
+)
+
+
+@pytest.fixture
+def hub_cache(tmp_path, monkeypatch):
+    """Point the Hugging Face hub cache at an empty temporary directory."""
+    path = tmp_path / "hub"
+    monkeypatch.setenv("HF_HUB_CACHE", str(path))
+    return path
+
+
+def fake_snapshot(hub_cache, repo, size=1000):
+    """Lay out a downloaded repo the way huggingface_hub does and return its snapshot directory."""
+    repo_dir = hub_cache / ("models--" + repo.replace("/", "--"))
+    snapshot = repo_dir / "snapshots" / "abc123"
+    snapshot.mkdir(parents=True)
+    (repo_dir / "blobs").mkdir()
+    (repo_dir / "blobs" / "weights").write_bytes(b"\0" * size)
+    os.symlink(repo_dir / "blobs" / "weights", snapshot / "weights.npz")
+    return snapshot
+
+
+class TestPresets:
+    """Test preset names and backend repos."""
+
+    def test_resolve_model(self):
+        """Test that presets map to repos and other names pass through."""
+        assert resolve_model("small-4bit") == "mlx-community/whisper-small-mlx-4bit"
+        assert resolve_model("large") == "mlx-community/whisper-large-v3-mlx"
+        assert resolve_model("someone/custom-whisper") == "someone/custom-whisper"
+
+    def test_hub_repo(self, temp_dir):
+        """Test the repo each backend downloads for a model."""
+        assert hub_repo("mlx-community/whisper-small-mlx") == "mlx-community/whisper-small-mlx"
+        assert hub_repo("mlx-community/whisper-small-mlx-4bit", "faster-whisper") == "Systran/faster-whisper-small"
+        assert hub_repo("mlx-community/whisper-large-v3-turbo", "faster-whisper") == "mobiuslabsgmbh/faster-whisper-large-v3-turbo"
+        assert hub_repo(temp_dir) is None
+
+
+class TestAvailability:
+    """Test offline availability checks."""
+
+    def test_missing_and_present(self, hub_cache):
+        """Test that only models with a snapshot in the hub cache are available."""
+        assert not is_available("mlx-community/whisper-tiny-mlx")
+        with pytest.raises(ModelNotAvailableError, match="macscribe models pull mlx-community/whisper-tiny-mlx"):
+            ensure_available("mlx-community/whisper-tiny-mlx")
+
+        fake_snapshot(hub_cache, "mlx-community/whisper-tiny-mlx")
+
+        assert is_available("mlx-community/whisper-tiny-mlx")
+        assert not is_available("mlx-community/whisper-tiny-mlx", "faster-whisper")
+
+    def test_local_directory(self, temp_dir, hub_cache):
+        """Test that a local model directory is always available."""
+        assert is_available(temp_dir)
+
+
+class TestPullAndPrune:
+    """Test the local model registry."""
+
+    def test_pull_registers_model(self, hub_cache):
+        """Test that a pulled model is recorded with its size on disk."""
+        fake_hub = MagicMock()
+        fake_hub.snapshot_download.side_effect = lambda repo: str(fake_snapshot(hub_cache, repo, size=2048))
+        registry = ModelRegistry()
+
+        with patch.dict(sys.modules, {"huggingface_hub": fake_hub}):
+            entry = pull("mlx-community/whisper-base-mlx", registry=registry)
+
+        fake_hub.snapshot_download.assert_called_once_with("mlx-community/whisper-base-mlx")
+        assert entry["bytes"] == 2048
+        assert entry["path"] == str(hub_cache / "models--mlx-community--whisper-base-mlx")
+        assert "mlx-community/whisper-base-mlx" in registry.entries()
+
+    def test_pull_without_hub(self):
+        """Test that a missing huggingface_hub gives a clear error."""
+        with patch.dict(sys.modules, {"huggingface_hub": None}):
+            with pytest.raises(RuntimeError, match="huggingface_hub"):
+                pull("mlx-community/whisper-base-mlx")
+
+    def test_prune_old_models(self, hub_cache):
+        """Test that models unused for too long are deleted unless kept."""
+        registry = ModelRegistry()
+        for repo in ("mlx-community/whisper-tiny-mlx", "mlx-community/whisper-small-mlx", "mlx-community/whisper-base-mlx"):
+            registry.record(repo, "mlx", str(fake_snapshot(hub_cache, repo).parents[1]))
+        entries = registry.entries()
+        old = time.time() - 60 * 86400
+        for repo in ("mlx-community/whisper-tiny-mlx", "mlx-community/whisper-small-mlx"):
+            entries[repo]["last_used"] = old
+        registry._save(entries)
+
+        assert prune(registry, keep=["small"], dry_run=True) == ["mlx-community/whisper-tiny-mlx"]
+        assert is_available("mlx-community/whisper-tiny-mlx")
+
+        assert prune(registry, keep=["small"]) == ["mlx-community/whisper-tiny-mlx"]
+        assert not is_available("mlx-community/whisper-tiny-mlx")
+        assert sorted(registry.entries()) == ["mlx-community/whisper-base-mlx", "mlx-community/whisper-small-mlx"]
+
+    def test_touch(self, tmp_path):
+        """Test that using a model updates its last-used time and ignores unknown repos."""
+        registry = ModelRegistry(tmp_path / "models.json")
+        registry.record("mlx-community/whisper-tiny-mlx", "mlx", str(tmp_path))
+        entries = registry.entries()
+        entries["mlx-community/whisper-tiny-mlx"]["last_used"] = 0
+        registry._save(entries)
+
+        registry.touch("mlx-community/whisper-tiny-mlx")
+        registry.touch("unknown/model")
+
+        assert registry.entries()["mlx-community/whisper-tiny-mlx"]["last_used"] > 0
+        assert list(registry.entries()) == ["mlx-community/whisper-tiny-mlx"]
+
+
+class TestAutoSelection:
+    """Test measured speeds and --model auto selection."""
+
+    def test_speed_log_average(self, tmp_path):
+        """Test that measurements are averaged per backend and model."""
+        speeds = SpeedLog(tmp_path / "speeds.json")
+        assert speeds.get("mlx-community/whisper-small-mlx") is None
+
+        speeds.record("mlx-community/whisper-small-mlx", "mlx", 100.0, 10.0)
+        assert speeds.get("mlx-community/whisper-small-mlx") == pytest.approx(0.1)
+
+        speeds.record("mlx-community/whisper-small-mlx", "mlx", 100.0, 20.0)
+        assert speeds.get("mlx-community/whisper-small-mlx") == pytest.approx(0.7 * 0.1 + 0.3 * 0.2)
+        assert speeds.get("mlx-community/whisper-small-mlx", "faster-whisper") is None
+
+    def test_estimates_without_measurements(self, tmp_path):
+        """Test that preset speedups stand in until the machine has measured a model."""
+        speeds = SpeedLog(tmp_path / "speeds.json")
+
+        # Estimated large RTF 0.15: ten minutes fit a 90 s budget, an hour needs turbo
+        assert choose_model(600, 90, speeds=speeds) == PRESETS["large"].repo
+        assert choose_model(3600, 90, speeds=speeds) == PRESETS["turbo"].repo
+        assert choose_model(None, 90, speeds=speeds) == PRESETS["large"].repo
+
+    def test_measured_speeds_win(self, tmp_path):
+        """Test that measured speeds override the estimates and the fastest model is the fallback."""
+        speeds = SpeedLog(tmp_path / "speeds.json")
+        for name, rtf in (("large", 1.0), ("turbo", 0.5), ("medium", 0.3), ("small", 0.1), ("base", 0.05), ("tiny", 0.02)):
+            speeds.record(PRESETS[name].repo, "mlx", 100.0, 100.0 * rtf)
+
+        assert choose_model(600, 90, speeds=speeds) == PRESETS["small"].repo
+        assert choose_model(600, 1, speeds=speeds) == PRESETS["tiny"].repo
+
+    def test_offline_candidates(self, tmp_path, hub_cache):
+        """Test that offline selection only considers downloaded models."""
+        speeds = SpeedLog(tmp_path / "speeds.json")
+        with pytest.raises(ModelNotAvailableError, match="models pull"):
+            choose_model(600, 90, speeds=speeds, available_only=True)
+
+        fake_snapshot(hub_cache, PRESETS["base"].repo)
+
+        assert choose_model(600, 90, speeds=speeds, available_only=True) == PRESETS["base"].repo
@@ -0,0 +1,143 @@
+import os
+import threading
+import time
+import pytest
+from pathlib import Path
+
+from macscribe.pipeline import DownloadPipeline
+
+
+def fake_download(source, tmpdir, size=1024):
+    """Write a fake audio file of the given size into tmpdir."""
+    path = os.path.join(tmpdir, f"{source}.mp3")
+    with open(path, "wb") as f:
+        f.write(b"\0" * size)
+    return path
+
+
+class TestDownloadPipeline:
+    """Test the DownloadPipeline producer/consumer scheduler."""
+
+    def test_yields_every_input(self):
+        """Test that all inputs are prepared and yielded once."""
+        sources = [f"episode{i}" for i in range(5)]
+        pipeline = DownloadPipeline(sources, fake_download, workers=3, queue_depth=2)
+
+        seen = [item.input_source for item in pipeline]
+
+        assert sorted(seen) == sorted(sources)
+
+    def test_temp_dirs_removed_after_consumption(self):
+        """Test that each item's temp dir is gone once the consumer moves on."""
+        dirs = []
+        for item in DownloadPipeline(["a", "b", "c"], fake_download, workers=2):
+            assert os.path.exists(item.audio_file)
+            dirs.append(os.path.dirname(item.audio_file))
+
+        assert dirs and not any(os.path.exists(d) for d in dirs)
+
+    def test_errors_are_reported_per_item(self):
+        """Test that a failing download does not stop the other inputs."""
+        def prepare(source, tmpdir):
+            if source == "bad":
+                raise RuntimeError("Download failed")
+            return fake_download(source, tmpdir)
+
+        items = {item.input_source: item for item in DownloadPipeline(["good", "bad"], prepare)}
+
+        assert items["good"].error is None
+        assert isinstance(items["bad"].error, RuntimeError)
+
+    def test_local_files_not_counted_as_temp(self, mock_audio_file):
+        """Test that local inputs passed through as-is use no temp budget."""
+        pipeline = DownloadPipeline([mock_audio_file], lambda source, tmpdir: source)
+
+        items = list(pipeline)
+
+        assert items[0].audio_file == mock_audio_file
+        assert os.path.exists(mock_audio_file)
+
+    def test_downloads_overlap_with_consumer(self):
+        """Test that workers keep downloading while the consumer is busy."""
+        started = []
+
+        def prepare(source, tmpdir):
+            started.append(source)
+            return fake_download(source, tmpdir)
+
+        pipeline = DownloadPipeline(["a", "b", "c"], prepare, workers=2, queue_depth=2)
+        for _ in pipeline:
+            time.sleep(0.2)
+            # While the first item is "transcribing", the other downloads already ran
+            assert len(started) == 3
+            break
+
+    def test_temp_budget_limits_outstanding_downloads(self):
+        """Test that downloads pause while waiting files exceed the temp budget."""
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def prepare(source, tmpdir):
+            path = fake_download(source, tmpdir, size=1000)
+            with lock:
+                active.append(source)
+                peak.append(len(active))
+            return path
+
+        pipeline = DownloadPipeline(
+            [f"e{i}" for i in range(6)], prepare, workers=1, queue_depth=4, max_temp_bytes=1000
+        )
+        for item in pipeline:
+            time.sleep(0.05)
+            with lock:
+                active.remove(item.input_source)
+
+        # With a budget of one file, the next download waits until the
+        # consumer has released the previous one
+        assert max(peak) == 1
+        assert len(peak) == 6
+
+    def test_temp_budget_counts_files_outside_tmpdir(self, temp_dir):
+        """Test that downloads written to the media cache instead of the tmpdir still use the budget."""
+        active = []
+        peak = []
+        sizes = []
+        lock = threading.Lock()
+
+        def prepare(source, tmpdir):
+            path = fake_download(source, temp_dir, size=1000)
+            with lock:
+                active.append(source)
+                peak.append(len(active))
+            return path
+
+        pipeline = DownloadPipeline([f"e{i}" for i in range(4)], prepare, workers=1, queue_depth=4, max_temp_bytes=1)
+        for item in pipeline:
+            sizes.append(item.size)
+            time.sleep(0.05)
+            with lock:
+                active.remove(item.input_source)
+
+        assert max(peak) == 1
+        assert sizes == [1000] * 4
+
+    def test_early_exit_cleans_up(self):
+        """Test that stopping iteration early removes all temp dirs."""
+        paths = []
+
+        def prepare(source, tmpdir):
+            path = fake_download(source, tmpdir)
+            paths.append(path)
+            return path
+
+        pipeline = DownloadPipeline([f"e{i}" for i in range(4)], prepare, workers=2, queue_depth=1)
+        for _ in pipeline:
+            break
+
+        assert not any(os.path.exists(p) for p in paths)
+
+    def test_decode_runs_in_worker(self):
+        """Test that the optional decode step stores its result on the item."""
+        for item in DownloadPipeline(["a"], fake_download, decode=lambda path: "pcm"):
+            assert item.audio == "pcm"
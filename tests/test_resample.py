@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from macscribe.resample import Resampler
+
+
+def tone(frequency, rate, seconds=1.0):
+    return np.sin(2 * np.pi * frequency * np.arange(int(rate * seconds)) / rate).astype(np.float32)
+
+
+class TestResampler:
+    """Test polyphase resampling to 16 kHz."""
+
+    @pytest.mark.parametrize("rate", [44100, 48000, 22050, 8000])
+    def test_matches_analytic_signal(self, rate):
+        """Test that an in-band tone comes out as the same tone sampled at 16 kHz."""
+        resampled = Resampler().resample(tone(1000, rate), rate, 16000)
+
+        assert len(resampled) == 16000
+        assert resampled.dtype == np.float32
+        # Edges are left out: the filter runs into the zero padding there
+        np.testing.assert_allclose(resampled[400:-400], tone(1000, 16000)[400:-400], atol=2e-3)
+
+    def test_rejects_aliases(self):
+        """Test that content above the new Nyquist frequency is filtered out instead of folding down."""
+        resampled = Resampler().resample(tone(12000, 44100), 44100, 16000)
+
+        assert np.abs(resampled[400:-400]).max() < 0.01
+
+    def test_lengths(self):
+        """Test output lengths for short and empty inputs, and that equal rates copy."""
+        resampler = Resampler()
+        audio = np.ones(5, dtype=np.float32)
+
+        assert len(resampler.resample(audio[:0], 44100, 16000)) == 0
+        assert len(resampler.resample(audio[:1], 44100, 16000)) == 1
+        assert len(resampler.resample(audio, 8000, 16000)) == 10
+        same = resampler.resample(audio, 16000, 16000)
+        assert same is not audio and np.array_equal(same, audio)
+
+    def test_reuses_filters_and_buffers(self):
+        """Test that repeated calls design each filter once and keep the padding buffer."""
+        resampler = Resampler()
+        first = resampler.resample(tone(440, 44100), 44100, 16000)
+        buffer = resampler._padded
+
+        second = resampler.resample(tone(440, 44100, 0.5), 44100, 16000)
+
+        assert list(resampler._banks) == [(160, 441)]
+        assert resampler._padded is buffer
+        # Results never alias the shared buffer
+        np.testing.assert_allclose(first[:7600], second[:7600], atol=1e-6)
@@ -0,0 +1,119 @@
+import asyncio
+import os
+import threading
+import time
+from collections import Counter
+from unittest.mock import patch
+
+from macscribe.cache import TranscriptCache
+from macscribe.downloader import DownloadReport
+from macscribe.runner import AsyncJobRunner, host_of, transcribe_many
+
+
+def fake_result(audio_file, model, **options):
+    """Stand-in for transcribe_result that records the thread it ran on."""
+    return {
+        "text": f" {os.path.basename(audio_file)} on {threading.current_thread().name}",
+        "segments": [{"start": 0.0, "end": 1.0, "text": " Hi."}],
+    }
+
+
+class TestTranscribeMany:
+    """Test the asyncio job runner."""
+
+    @patch('macscribe.transcriber.transcribe_result', side_effect=fake_result)
+    def test_local_files(self, mock_transcribe, temp_dir):
+        """Test that results come back in input order, transcribed off the event loop and saved."""
+        paths = []
+        for name in ("b.mp3", "a.mp3"):
+            path = os.path.join(temp_dir, name)
+            with open(path, "wb") as f:
+                f.write(b"audio")
+            paths.append(path)
+        output = os.path.join(temp_dir, "out") + os.sep
+        os.makedirs(output)
+
+        results = asyncio.run(transcribe_many(paths, "small", output=output, formats=("txt", "srt")))
+
+        assert [result.input_source for result in results] == paths
+        assert all(result.ok for result in results)
+        assert results[0].text.startswith(" b.mp3 on macscribe-compute")
+        assert mock_transcribe.call_args[0][1] == "mlx-community/whisper-small-mlx"
+        assert sorted(os.listdir(output)) == ["a.srt", "a.txt", "b.srt", "b.txt"]
+
+    @patch('macscribe.transcriber.transcribe_result', side_effect=fake_result)
+    @patch('macscribe.runner.download_audio')
+    def test_per_host_limit(self, mock_prepare, mock_transcribe, temp_dir):
+        """Test that downloads run concurrently, at most per_host at a time per host, without blocking the loop."""
+        active = Counter()
+        peak = Counter()
+        lock = threading.Lock()
+
+        def download(url, tmpdir):
+            host = host_of(url)
+            with lock:
+                active[host] += 1
+                peak[host] = max(peak[host], active[host])
+                peak["total"] = max(peak["total"], sum(active.values()))
+            time.sleep(0.05)
+            with lock:
+                active[host] -= 1
+            path = os.path.join(tmpdir, url.rsplit("=", 1)[-1] + ".m4a")
+            with open(path, "wb") as f:
+                f.write(b"audio")
+            return path, DownloadReport("249", 5, 20)
+
+        mock_prepare.side_effect = download
+        urls = [f"https://www.youtube.com/watch?v=yt{i}" for i in range(6)]
+        urls += [f"https://x.com/user/status/1?v=x{i}" for i in range(2)]
+
+        async def run():
+            ticks = 0
+            runner = AsyncJobRunner(per_host=2, max_downloads=4, max_pending=8)
+            task = asyncio.ensure_future(runner.run(urls))
+            while not task.done():
+                ticks += 1
+                await asyncio.sleep(0.005)
+            return task.result(), ticks
+
+        results, ticks = asyncio.run(run())
+
+        assert all(result.ok for result in results)
+        assert results[0].download.saved_bytes == 15
+        assert peak["youtube.com"] == 2
+        assert peak["x.com"] == 2
+        assert peak["total"] > 2
+        # The loop kept running while downloads and transcription were in flight
+        assert ticks > 10
+
+    @patch('macscribe.transcriber.transcribe_result', side_effect=fake_result)
+    def test_errors_per_input(self, mock_transcribe, mock_audio_file):
+        """Test that a failing input is reported on its result without stopping the others."""
+        results = asyncio.run(transcribe_many(["not-a-valid-input", mock_audio_file]))
+
+        assert isinstance(results[0].error, ValueError)
+        assert results[1].ok
+
+    @patch('macscribe.transcriber.transcribe_result', side_effect=fake_result)
+    @patch('macscribe.runner.download_audio')
+    def test_cache(self, mock_prepare, mock_transcribe, mock_audio_file):
+        """Test that a second run is served from the transcript cache."""
+        cache = TranscriptCache()
+
+        first = asyncio.run(transcribe_many([mock_audio_file], cache=cache))
+        second = asyncio.run(transcribe_many([mock_audio_file], cache=cache))
+
+        assert not first[0].cached
+        assert second[0].cached
+        assert second[0].text == first[0].text
+        mock_transcribe.assert_called_once()
+        mock_prepare.assert_not_called()
+
+    @patch('macscribe.runner.copy_to_clipboard')
+    @patch('macscribe.transcriber.transcribe_result', side_effect=fake_result)
+    def test_copy(self, mock_transcribe, mock_clipboard, mock_audio_file):
+        """Test that transcripts are copied together once all jobs are done."""
+        asyncio.run(transcribe_many([mock_audio_file, mock_audio_file], copy=True))
+
+        mock_clipboard.assert_called_once()
+        assert mock_clipboard.call_args[0][0].count("\n\n") == 1
@@ -2,7 +2,17 @@ import os
 import pytest
 from pathlib import Path
 
-from macscribe.saver import save_transcript_to_file
+import json
+
+from macscribe.saver import (
+    format_segment_line,
+    format_srt,
+    format_timestamp,
+    format_tsv,
+    format_vtt,
+    save_transcript_formats,
+    save_transcript_to_file,
+)
 
 
 class TestSaveTranscriptToFile:
@@ -167,3 +177,77 @@ class TestSaveTranscriptToFile:
         # Verify path is absolute
         assert os.path.isabs(saved_path)
         assert Path(saved_path).is_absolute()
+
+
+class TestSegmentFormatting:
+    """Test formatting of streamed segments."""
+
+    def test_format_timestamp(self):
+        """Test HH:MM:SS.mmm formatting."""
+        assert format_timestamp(0) == "00:00:00.000"
+        assert format_timestamp(3723.5) == "01:02:03.500"
+
+    def test_text_line(self):
+        """Test the timestamped text line format."""
+        segment = {"start": 1.0, "end": 2.25, "text": " Hello there."}
+        assert format_segment_line(segment) == "[00:00:01.000 --> 00:00:02.250] Hello there."
+
+    def test_jsonl_line(self):
+        """Test the JSON lines format."""
+        segment = {"start": 1.0, "end": 2.25, "text": " Hej med dig."}
+        assert json.loads(format_segment_line(segment, "jsonl")) == segment
+
+
+SEGMENTS = [
+    {"start": 0.0, "end": 2.5, "text": " Hello there."},
+    {"start": 2.5, "end": 3661.25, "text": " General\tKenobi."},
+]
+
+
+class TestOutputFormats:
+    """Test subtitle and data output formats."""
+
+    def test_srt(self):
+        """Test numbered cues with comma-separated milliseconds."""
+        assert format_srt(SEGMENTS) == (
+            "1\n00:00:00,000 --> 00:00:02,500\nHello there.\n\n"
+            "2\n00:00:02,500 --> 01:01:01,250\nGeneral\tKenobi.\n"
+        )
+
+    def test_vtt(self):
+        """Test the WEBVTT header and dot-separated milliseconds."""
+        assert format_vtt(SEGMENTS) == (
+            "WEBVTT\n\n"
+            "00:00:00.000 --> 00:00:02.500\nHello there.\n\n"
+            "00:00:02.500 --> 01:01:01.250\nGeneral\tKenobi.\n"
+        )
+
+    def test_tsv(self):
+        """Test millisecond columns and that tabs in the text don't break them."""
+        assert format_tsv(SEGMENTS) == "start\tend\ttext\n0\t2500\tHello there.\n2500\t3661250\tGeneral Kenobi.\n"
+
+    def test_several_formats_to_directory(self, temp_dir):
+        """Test that each format is auto-named with its own extension."""
+        saved = save_transcript_formats("Hello there.", SEGMENTS, temp_dir, "episode.mp3", ["srt", "json", "txt"])
+
+        assert [Path(path).name for path in saved] == ["episode.srt", "episode.jsonl", "episode.txt"]
+        with open(saved[1], encoding="utf-8") as f:
+            assert [json.loads(line) for line in f] == SEGMENTS
+        with open(saved[2], encoding="utf-8") as f:
+            assert f.read() == "Hello there."
+
+    def test_single_format_to_file(self, temp_dir):
+        """Test that a single format is written to exactly the path given."""
+        output_file = os.path.join(temp_dir, "subtitles.txt")
+
+        saved = save_transcript_formats("Hello there.", SEGMENTS, output_file, "episode.mp3", ["vtt"])
+
+        assert saved == [str(Path(output_file).resolve())]
+
+    def test_several_formats_to_file(self, temp_dir):
+        """Test that a file path gets each format's extension when several are written."""
+        output_file = os.path.join(temp_dir, "talk.txt")
+
+        saved = save_transcript_formats("Hello there.", SEGMENTS, output_file, "episode.mp3", ["txt", "tsv"])
+
+        assert [Path(path).name for path in saved] == ["talk.txt", "talk.tsv"]
@@ -1,14 +1,20 @@
+import time
+import numpy as np
 import pytest
 from unittest.mock import patch, MagicMock
 
-from macscribe.transcriber import transcribe_audio
+from macscribe.audio import SAMPLE_RATE
+from macscribe.jobs import Job
+from tests.test_import_time import run_python
+from macscribe.metrics import collecting
+from macscribe.transcriber import iter_segments, map_segments, transcribe_audio, transcribe_chunked, transcribe_result
 
 
 class TestTranscriber:
     """Test the transcriber module."""
     
     @patch('macscribe.transcriber.copy_to_clipboard')
-    @patch('macscribe.transcriber.mlx_whisper.transcribe')
+    @patch('mlx_whisper.transcribe')
     def test_successful_transcription(self, mock_transcribe, mock_clipboard):
         """Test successful audio transcription."""
         # Mock the transcription result
@@ -28,7 +34,7 @@ class TestTranscriber:
         assert result == "This is a test transcription."
     
     @patch('macscribe.transcriber.copy_to_clipboard')
-    @patch('macscribe.transcriber.mlx_whisper.transcribe')
+    @patch('mlx_whisper.transcribe')
     def test_empty_transcription(self, mock_transcribe, mock_clipboard):
         """Test handling of empty transcription result."""
         # Mock empty transcription result
@@ -47,7 +53,7 @@ class TestTranscriber:
         mock_clipboard.assert_not_called()
     
     @patch('macscribe.transcriber.copy_to_clipboard')
-    @patch('macscribe.transcriber.mlx_whisper.transcribe')
+    @patch('mlx_whisper.transcribe')
     def test_missing_text_key(self, mock_transcribe, mock_clipboard):
         """Test handling when transcription result lacks 'text' key."""
         # Mock result without 'text' key
@@ -66,7 +72,7 @@ class TestTranscriber:
         mock_clipboard.assert_not_called()
     
     @patch('macscribe.transcriber.copy_to_clipboard')
-    @patch('macscribe.transcriber.mlx_whisper.transcribe')
+    @patch('mlx_whisper.transcribe')
     def test_mlx_whisper_exception(self, mock_transcribe, mock_clipboard):
         """Test handling of mlx_whisper exceptions."""
         # Mock transcription to raise an exception
@@ -83,7 +89,7 @@ class TestTranscriber:
         mock_clipboard.assert_not_called()
     
     @patch('macscribe.transcriber.copy_to_clipboard')
-    @patch('macscribe.transcriber.mlx_whisper.transcribe')
+    @patch('mlx_whisper.transcribe')
     def test_clipboard_exception(self, mock_transcribe, mock_clipboard):
         """Test handling of clipboard exceptions."""
         # Mock successful transcription but failing clipboard
@@ -102,7 +108,7 @@ class TestTranscriber:
         mock_transcribe.assert_called_once_with(audio_file, path_or_hf_repo=model)
     
     @patch('macscribe.transcriber.copy_to_clipboard')
-    @patch('macscribe.transcriber.mlx_whisper.transcribe')
+    @patch('mlx_whisper.transcribe')
     def test_whitespace_only_transcription(self, mock_transcribe, mock_clipboard):
         """Test handling of whitespace-only transcription."""
         # Mock transcription with only whitespace
@@ -116,4 +122,330 @@ class TestTranscriber:
         
         # Should treat whitespace as valid content (not empty)
         mock_clipboard.assert_called_once_with("   \n\t  ")
-        assert result == "   \n\t  "
\ No newline at end of file
+        assert result == "   \n\t  "
+    
+    @patch('macscribe.transcriber.copy_to_clipboard')
+    @patch('mlx_whisper.transcribe')
+    def test_copy_disabled(self, mock_transcribe, mock_clipboard):
+        """Test that copy=False skips the clipboard."""
+        mock_transcribe.return_value = {"text": "Batch transcript"}
+        
+        result = transcribe_audio("/path/to/audio.mp3", "test-model", copy=False)
+        
+        assert result == "Batch transcript"
+        mock_clipboard.assert_not_called()
+
+
+class TestIterSegments:
+    """Test the streaming iter_segments generator."""
+
+    @patch('mlx_whisper.transcribe')
+    def test_offsets_and_held_back_segment(self, mock_transcribe):
+        """Test that timestamps are absolute and a window's last segment is retried in the next window."""
+        audio = np.zeros(16000 * 50, dtype=np.float32)
+        mock_transcribe.side_effect = [
+            {"segments": [
+                {"start": 0.0, "end": 10.0, "text": " One."},
+                {"start": 10.0, "end": 25.0, "text": " Two."},
+                {"start": 25.0, "end": 30.0, "text": " Thr"},
+            ]},
+            {"segments": [
+                {"start": 0.0, "end": 8.0, "text": " Three."},
+                {"start": 8.0, "end": 25.0, "text": " Four."},
+            ]},
+        ]
+
+        segments = list(iter_segments(audio, "test-model"))
+
+        assert [s["text"] for s in segments] == [" One.", " Two.", " Three.", " Four."]
+        assert segments[2]["start"] == 25.0
+        assert segments[3]["end"] == 50.0
+        # Second window starts where the held-back segment started
+        second_chunk = mock_transcribe.call_args_list[1][0][0]
+        assert len(second_chunk) == 16000 * 25
+        assert mock_transcribe.call_args_list[1][1]["initial_prompt"] == " One. Two."
+
+    @patch('mlx_whisper.transcribe')
+    def test_is_lazy(self, mock_transcribe):
+        """Test that the first segment arrives before later windows are decoded."""
+        audio = np.zeros(16000 * 90, dtype=np.float32)
+        mock_transcribe.return_value = {"segments": [{"start": 0.0, "end": 30.0, "text": " Hello."}]}
+
+        first = next(iter_segments(audio, "test-model"))
+
+        assert first["text"] == " Hello."
+        assert mock_transcribe.call_count == 1
+
+    @patch('macscribe.transcriber.decode_audio')
+    @patch('mlx_whisper.transcribe')
+    def test_decodes_paths(self, mock_transcribe, mock_decode):
+        """Test that file paths are decoded once before windowing."""
+        mock_decode.return_value = np.zeros(16000 * 5, dtype=np.float32)
+        mock_transcribe.return_value = {"segments": [{"start": 0.0, "end": 5.0, "text": " Short."}]}
+
+        segments = list(iter_segments("/path/to/audio.mp3", "test-model"))
+
+        mock_decode.assert_called_once_with("/path/to/audio.mp3")
+        assert len(segments) == 1
+
+
+class TestTranscribeChunked:
+    """Test long-audio chunked transcription."""
+
+    @patch('macscribe.transcriber.find_split_points')
+    @patch('mlx_whisper.transcribe')
+    def test_stitches_chunks_without_duplicates(self, mock_transcribe, mock_splits):
+        """Test that overlapping context is decoded but each segment is kept once."""
+        audio = np.zeros(16000 * 60, dtype=np.float32)
+        mock_splits.return_value = [16000 * 30]
+
+        def transcribe(chunk, path_or_hf_repo):
+            if len(chunk) == 16000 * 31:
+                if mock_transcribe.call_count == 1:
+                    # First chunk: 0-31 s, last segment lies in the overlap
+                    return {"segments": [
+                        {"start": 0.0, "end": 29.0, "text": " First."},
+                        {"start": 30.2, "end": 31.0, "text": " Dup."},
+                    ]}
+                # Second chunk: 29-60 s, first segment lies in the overlap
+                return {"segments": [
+                    {"start": 0.0, "end": 0.8, "text": " Tail."},
+                    {"start": 1.2, "end": 2.0, "text": " Dup."},
+                    {"start": 2.0, "end": 31.0, "text": " Second."},
+                ]}
+            raise AssertionError(f"unexpected chunk length {len(chunk)}")
+        mock_transcribe.side_effect = transcribe
+
+        result = transcribe_chunked(audio, "test-model", chunk_length=30.0, overlap=1.0)
+
+        assert result["text"] == " First. Dup. Second."
+        assert [s["start"] for s in result["segments"]] == [0.0, 30.2, 31.0]
+
+    @patch('macscribe.transcriber.find_split_points')
+    @patch('mlx_whisper.transcribe')
+    def test_checkpoint_skips_finished_chunks(self, mock_transcribe, mock_splits, tmp_path):
+        """Test that finished chunks come from the checkpoint and new ones are recorded."""
+        audio = np.zeros(16000 * 60, dtype=np.float32)
+        mock_splits.return_value = [16000 * 30]
+        mock_transcribe.return_value = {"segments": [{"start": 5.0, "end": 10.0, "text": " Second."}]}
+        job = Job.create(tmp_path / "job", "input.mp3", "test-model", {})
+        job.use_bounds([0, 16000 * 30, 16000 * 60])
+        job.record(0, [{"start": 0.0, "end": 29.0, "text": " First."}])
+
+        result = transcribe_chunked(audio, "test-model", chunk_length=30.0, overlap=0.0, checkpoint=job)
+
+        assert result["text"] == " First. Second."
+        assert mock_transcribe.call_count == 1
+        assert Job.load(tmp_path / "job").completed[1] == [{"start": 35.0, "end": 40.0, "text": " Second."}]
+
+    @patch('macscribe.transcriber.copy_to_clipboard')
+    @patch('macscribe.transcriber.transcribe_chunked')
+    def test_transcribe_audio_chunk_mode(self, mock_chunked, mock_clipboard):
+        """Test that chunk_length routes transcribe_audio through transcribe_chunked."""
+        mock_chunked.return_value = {"text": " Long transcript.", "segments": []}
+        audio = np.zeros(16000, dtype=np.float32)
+
+        result = transcribe_audio(audio, "test-model", chunk_length=600.0, chunk_overlap=2.0, chunk_workers=4)
+
+        assert result == " Long transcript."
+        mock_chunked.assert_called_once_with(audio, "test-model", 600.0, 2.0, 4, backend="mlx", checkpoint=None)
+
+
+class TestBackendSelection:
+    """Test that transcription goes through the selected backend."""
+
+    @patch('macscribe.transcriber.copy_to_clipboard')
+    @patch('macscribe.transcriber.get_backend')
+    def test_named_backend(self, mock_get_backend, mock_clipboard):
+        """Test that transcribe_audio uses the backend it is given."""
+        mock_get_backend.return_value.transcribe.return_value = {"text": "CPU transcript", "segments": []}
+
+        result = transcribe_audio("/path/to/audio.mp3", "tiny", backend="faster-whisper")
+
+        assert result == "CPU transcript"
+        mock_get_backend.assert_called_once_with("faster-whisper")
+        mock_get_backend.return_value.transcribe.assert_called_once_with("/path/to/audio.mp3", "tiny")
+
+
+class TestTranscribeResult:
+    """Test transcription that keeps segment timings."""
+
+    @patch('macscribe.transcriber.copy_to_clipboard')
+    @patch('macscribe.transcriber.get_backend')
+    def test_keeps_segments(self, mock_get_backend, mock_clipboard):
+        """Test that segments are returned with only their timing and text, and nothing is copied."""
+        mock_get_backend.return_value.transcribe.return_value = {
+            "text": " Hello.",
+            "segments": [{"id": 0, "start": 0.0, "end": 1.2345, "text": " Hello.", "tokens": [1, 2]}],
+        }
+
+        result = transcribe_result("/path/to/audio.mp3", "test-model")
+
+        assert result == {"text": " Hello.", "segments": [{"start": 0.0, "end": 1.234, "text": " Hello."}]}
+        mock_clipboard.assert_not_called()
+
+    @patch('macscribe.transcriber.get_backend')
+    def test_word_timestamps(self, mock_get_backend):
+        """Test that word timings are requested from the backend and kept."""
+        engine = mock_get_backend.return_value
+        engine.transcribe.return_value = {
+            "text": " Hi.",
+            "segments": [{"start": 0.0, "end": 0.5, "text": " Hi.", "words": [
+                {"start": 0.0, "end": 0.5, "word": " Hi.", "probability": 0.9},
+            ]}],
+        }
+
+        result = transcribe_result("/path/to/audio.mp3", "test-model", word_timestamps=True)
+
+        engine.transcribe.assert_called_once_with("/path/to/audio.mp3", "test-model", word_timestamps=True)
+        assert result["segments"][0]["words"] == [{"start": 0.0, "end": 0.5, "word": " Hi."}]
+
+    @patch('macscribe.transcriber.time.perf_counter')
+    @patch('macscribe.transcriber.get_backend')
+    def test_records_speed(self, mock_get_backend, mock_clock):
+        """Test that each run's real-time factor is recorded for --model auto."""
+        from macscribe.models import SpeedLog
+
+        mock_clock.side_effect = [0.0, 12.0]
+        mock_get_backend.return_value.transcribe.return_value = {
+            "text": " Hi.",
+            "segments": [{"start": 0.0, "end": 120.0, "text": " Hi."}],
+        }
+
+        transcribe_result(np.zeros(SAMPLE_RATE * 60, dtype=np.float32), "test-model")
+
+        assert SpeedLog().get("test-model") == pytest.approx(0.2)
+
+    @patch('macscribe.transcriber.get_backend')
+    def test_model_load_not_timed(self, mock_get_backend):
+        """Test that the model is loaded before the clock starts, so load time isn't recorded as speed."""
+        from macscribe.models import SpeedLog
+
+        engine = mock_get_backend.return_value
+        engine.load.side_effect = lambda model: time.sleep(1.2)
+        engine.transcribe.return_value = {"text": " Hi.", "segments": [{"start": 0.0, "end": 5.0, "text": " Hi."}]}
+
+        transcribe_result(np.zeros(SAMPLE_RATE * 5, dtype=np.float32), "test-model")
+
+        engine.load.assert_called_once_with("test-model")
+        assert SpeedLog().get("test-model") is None
+
+    @patch('macscribe.transcriber.get_backend')
+    def test_short_runs_not_recorded(self, mock_get_backend):
+        """Test that runs too short to time meaningfully leave the speed log alone."""
+        from macscribe.models import SpeedLog
+
+        mock_get_backend.return_value.transcribe.return_value = {"text": " Hi.", "segments": []}
+
+        transcribe_result("/path/to/audio.mp3", "test-model")
+
+        assert SpeedLog().get("test-model") is None
+
+    def test_map_segments(self):
+        """Test that segment and word times are mapped back through a time map."""
+        time_map = MagicMock()
+        time_map.to_original.side_effect = lambda seconds: seconds + 10
+        segments = [{"start": 1.0, "end": 2.0, "text": " Hi.", "words": [{"start": 1.0, "end": 2.0, "word": " Hi."}]}]
+
+        mapped = map_segments(segments, time_map)
+
+        assert mapped == [{"start": 11.0, "end": 12.0, "text": " Hi.", "words": [{"start": 11.0, "end": 12.0, "word": " Hi."}]}]
+        assert map_segments(segments) is segments
+
+
+class TestLowMemory:
+    """Test memory-bounded transcription of long files."""
+
+    @patch('macscribe.transcriber.open_pcm')
+    @patch('mlx_whisper.transcribe')
+    def test_file_is_read_in_chunks(self, mock_transcribe, mock_open_pcm):
+        """Test that a path is decoded to disk and the backend only ever sees bounded chunks."""
+        audio = np.zeros(16000 * 700, dtype=np.float32)
+        mock_open_pcm.return_value.__enter__.return_value = audio
+        mock_transcribe.return_value = {"text": " Hi.", "segments": [{"start": 100.0, "end": 101.0, "text": " Hi."}]}
+
+        result = transcribe_result("/path/to/long.mp3", "test-model", low_memory=True)
+
+        mock_open_pcm.assert_called_once_with("/path/to/long.mp3")
+        assert mock_transcribe.call_count == 3
+        assert max(len(call.args[0]) for call in mock_transcribe.call_args_list) <= 16000 * 302
+        assert result["text"] == " Hi. Hi. Hi."
+
+    def test_rss_ceiling(self, tmp_path):
+        """Test that peak memory doesn't grow with the length of the input."""
+        code = (
+            "import numpy as np\n"
+            "from macscribe.audio import PCMFile, SAMPLE_RATE\n"
+            "from macscribe.bench import synthesize_audio\n"
+            "from macscribe.metrics import peak_rss_bytes\n"
+            "from macscribe.transcriber import transcribe_result\n"
+            "def write(path, minutes):\n"
+            "    block = (synthesize_audio(60) * 32767).astype(np.int16).tobytes()\n"
+            "    with open(path, 'wb') as f:\n"
+            "        for _ in range(minutes):\n"
+            "            f.write(block)\n"
+            "def run(path):\n"
+            "    with PCMFile(path) as pcm:\n"
+            "        return transcribe_result(pcm, 'm', backend='stand-in', low_memory=True)\n"
+            f"short, long = {str(tmp_path / 'short.pcm')!r}, {str(tmp_path / 'long.pcm')!r}\n"
+            "write(short, 12)\n"
+            "write(long, 120)\n"
+            "run(short)\n"
+            "before = peak_rss_bytes()\n"
+            "result = run(long)\n"
+            "assert len(result['segments']) == 7200, len(result['segments'])\n"
+            "print(peak_rss_bytes() - before)\n"
+        )
+
+        growth = int(run_python(code).stdout)
+
+        # Two hours decoded in memory would be 460 MB of float32 samples; two
+        # 5-minute chunks in flight stay well under a quarter of that
+        assert growth < 96 * 2**20
+
+
+class TestTranscriberMetrics:
+    """Test stage metrics recorded while profiling."""
+
+    @patch('macscribe.transcriber.get_backend')
+    @patch('macscribe.transcriber.decode_audio')
+    def test_stages(self, mock_decode, mock_get_backend):
+        """Test that paths are decoded up front and model load is timed separately."""
+        audio = np.zeros(16000 * 4, dtype=np.float32)
+        mock_decode.return_value = audio
+        engine = mock_get_backend.return_value
+        engine.transcribe.return_value = {"text": "Hello"}
+
+        with collecting() as metrics:
+            transcribe_audio("/path/to/audio.mp3", "test-model", copy=False)
+
+        mock_decode.assert_called_once_with("/path/to/audio.mp3")
+        engine.load.assert_called_once_with("test-model")
+        engine.transcribe.assert_called_once_with(audio, "test-model")
+        assert metrics.stages["model_load"].count == 1
+        assert metrics.stages["transcribe"].audio_seconds == 4.0
+
+    @patch('macscribe.transcriber.get_backend')
+    @patch('macscribe.transcriber.decode_audio')
+    def test_no_decode_without_metrics(self, mock_decode, mock_get_backend):
+        """Test that without profiling the path goes straight to the backend."""
+        mock_get_backend.return_value.transcribe.return_value = {"text": "Hello"}
+
+        transcribe_audio("/path/to/audio.mp3", "test-model", copy=False)
+
+        mock_decode.assert_not_called()
+        mock_get_backend.return_value.transcribe.assert_called_once_with("/path/to/audio.mp3", "test-model")
+
+    @patch('macscribe.transcriber.get_backend')
+    @patch('macscribe.transcriber.decode_audio')
+    def test_native_decoder(self, mock_decode, mock_get_backend):
+        """Test that the native decoder hands the backend an array instead of a path."""
+        audio = np.zeros(16000, dtype=np.float32)
+        mock_decode.return_value = audio
+        engine = mock_get_backend.return_value
+        engine.transcribe.return_value = {"text": "Hello"}
+
+        transcribe_audio("/path/to/audio.mp3", "test-model", copy=False, decoder="native")
+
+        mock_decode.assert_called_once_with("/path/to/audio.mp3", decoder="native")
+        engine.transcribe.assert_called_once_with(audio, "test-model")
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from unittest.mock import patch
+
+from macscribe.workers import init_worker, transcribe_file
+
+
+class TestWorkers:
+    """Test the worker-process functions."""
+
+    @patch('macscribe.backends.get_backend')
+    def test_init_loads_model(self, mock_get_backend):
+        """Test that each worker loads the model up front."""
+        init_worker("test-model", "mlx")
+
+        mock_get_backend.assert_called_once_with("mlx")
+        mock_get_backend.return_value.load.assert_called_once_with("test-model")
+
+    @patch('macscribe.backends.get_backend')
+    def test_init_ignores_load_errors(self, mock_get_backend):
+        """Test that a failed load is left for the first file to report."""
+        mock_get_backend.return_value.load.side_effect = RuntimeError("no model")
+
+        init_worker("test-model", "mlx")
+
+    @patch('macscribe.transcriber.transcribe_audio')
+    def test_transcribe_file(self, mock_transcribe):
+        """Test that files are transcribed without touching the clipboard."""
+        mock_transcribe.return_value = "Transcript"
+
+        assert transcribe_file("/path/a.wav", "test-model", {"backend": "faster-whisper"}) == "Transcript"
+        mock_transcribe.assert_called_once_with("/path/a.wav", "test-model", copy=False, backend="faster-whisper")
+
+    @patch('macscribe.audio.decode_audio')
+    def test_trim_silence_no_speech(self, mock_decode):
+        """Test that silent files fail instead of being transcribed."""
+        mock_decode.return_value = np.zeros(16000 * 5, dtype=np.float32)
+
+        with pytest.raises(ValueError, match="No speech detected."):
+            transcribe_file("/path/a.wav", "test-model", {}, trim_silence=True)